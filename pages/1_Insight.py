@@ -1,8 +1,19 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import functools
+import uuid
+from collections import OrderedDict
 from pathlib import Path
 
+from src.aggregate import MemoView, period_insight, period_totals, top_insight
+from src.dataset_cache import cache_stats, load_dataset
+from src.engine import InsightEngine
+from src.figure_cache import cached_figure
+from src.filter_index import FilterIndex, IncrementalFilter, freeze_state
+from src.sort_index import SortIndex
+from src.stage_timer import ALWAYS_ON as TIMING_ALWAYS_ON, TRACE_ALLOC as TIMING_TRACE_ALLOC, RerunTimer
+
 st.set_page_config(page_title="Insight", layout="wide")
 
 # =========================
@@ -19,15 +30,69 @@ load_css()
 
 st.title("Page 1 — Insight Dashboard")
 
+# =========================
+# DEBUG: WAKTU PER TAHAP
+# =========================
+# tiap rerun dicatat per tahap (load, filter, agregasi, figure, plotly_chart) ke log JSON-lines;
+# panel di sidebar hanya tampil kalau toggle debug dinyalakan
+debug_timing = st.sidebar.toggle("Debug: waktu per tahap", value=False, key="debug_timing")
+timer = RerunTimer(
+    "insight",
+    enabled=debug_timing or TIMING_ALWAYS_ON,
+    trace_alloc=debug_timing or TIMING_TRACE_ALLOC,
+    session=st.session_state.setdefault("timing_session", uuid.uuid4().hex[:8]),
+)
+
+# fragment dijalankan pertama kali sebagai bagian dari rerun penuh; setelah skrip selesai,
+# widget di dalam fragment hanya menjalankan ulang fragment itu (dicatat sebagai rerun tersendiri)
+full_run = True
+active_fragment = None
+
+def finish_timing():
+    global full_run
+    full_run = False
+    # statistik cache dataset bersama (semua sesi di proses ini)
+    cache = cache_stats() if timer.enabled else None
+    timer.write_log(subpage=st.session_state.get("insight_subpage"), cache=cache)
+    timer.close()
+    if debug_timing:
+        with st.sidebar.expander("Waktu per tahap", expanded=True):
+            st.caption(f"Total rerun: {timer.total_seconds * 1000:,.0f} ms")
+            st.dataframe(timer.table(), hide_index=True, use_container_width=True)
+            st.caption(
+                f"Cache dataset: {cache['datasets']} dataset · {cache['resident_bytes'] / 2**20:,.0f} / "
+                f"{cache['max_bytes'] / 2**20:,.0f} MiB (mmap {cache['mapped_bytes'] / 2**20:,.0f} MiB) · "
+                f"hit {cache['hits']} · miss {cache['misses']} · evict {cache['evictions']}"
+            )
+
+# st.stop() di tengah halaman tetap harus menulis log waktu rerun ini
+def stop_page():
+    finish_timing()
+    st.stop()
+
 # =========================
 # LOAD DATA
 # =========================
-uploaded = st.file_uploader("Upload CSV (final insight)", type=["csv"])
+uploaded = st.file_uploader("Upload CSV (final insight atau data transaksi mentah) atau bundle (.zip)", type=["csv", "zip"])
 if not uploaded:
     st.info("Upload CSV dulu untuk melihat dashboard insight.")
-    st.stop()
+    stop_page()
+
+progress_slot = st.empty()
 
-df = pd.read_csv(uploaded)
+def show_progress(frac: float, text: str):
+    progress_slot.progress(frac, text=text)
+
+try:
+    with timer.stage("load_dataset") as rec:
+        ds = load_dataset(uploaded, progress=show_progress)
+        rec["rows_out"] = len(ds.df)
+except ValueError as e:
+    st.error(f"File tidak bisa dibaca: {e}")
+    stop_page()
+progress_slot.empty()
+df = ds.df
+engine = InsightEngine(ds)
 
 # =========================
 # ROUTER
@@ -72,16 +137,54 @@ def render_kpi(title: str, value: str, subtitle: str = ""):
         unsafe_allow_html=True,
     )
 
-def insight_by(df_in: pd.DataFrame, group_col: str):
-    return (
-        df_in.groupby(group_col, dropna=False)
-        .agg(
-            transaksi_count=("total_spend", "size"),
-            total_spend_sum=("total_spend", "sum"),
-            total_spend_avg=("total_spend", "mean"),
-        )
-        .reset_index()
-    )
+def bar_figure(table, x, y, hover_data, title, colors=None, tickangle=0, height=None):
+    fig = px.bar(table, x=x, y=y, hover_data=hover_data, title=title, color_discrete_sequence=colors)
+    fig.update_xaxes(tickangle=tickangle)
+    if height:
+        fig.update_layout(height=height, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+def pie_figure(table, names, values, hover_data, title, colors=None, height=None):
+    fig = px.pie(table, names=names, values=values, hover_data=hover_data, title=title, color_discrete_sequence=colors)
+    if height:
+        fig.update_layout(height=height, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+def figure(name: str, build, table, **params):
+    with timer.stage("figure", rows_in=len(table)):
+        return cached_figure(name, build, table, **params)
+
+def timed_fragment(name: str):
+    def wrap(fn):
+        @st.fragment
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            global timer, active_fragment
+            if full_run or active_fragment is not None:
+                return fn(*args, **kwargs)
+            timer = RerunTimer(
+                "insight",
+                enabled=debug_timing or TIMING_ALWAYS_ON,
+                session=st.session_state.get("timing_session"),
+                trace_alloc=debug_timing or TIMING_TRACE_ALLOC,
+            )
+            active_fragment = name
+            try:
+                fn(*args, **kwargs)
+            finally:
+                active_fragment = None
+                cache = cache_stats() if timer.enabled else None
+                timer.write_log(subpage=st.session_state.get("insight_subpage"), fragment=name, cache=cache)
+                timer.close()
+
+        return run
+
+    return wrap
+
+def chart(fig, **kwargs):
+    # serialisasi figure ke frontend dihitung terpisah dari pembuatan figure
+    with timer.stage("plotly_chart"):
+        st.plotly_chart(fig, **kwargs)
 
 def smart_xtick_rotation(values) -> int:
     vals = [str(v) for v in values]
@@ -91,16 +194,36 @@ def smart_xtick_rotation(values) -> int:
     n = len(vals)
     return 45 if (maxlen >= 12 or n >= 8) else 0
 
-def apply_filters(df_in: pd.DataFrame, filter_state: dict) -> pd.DataFrame:
-    df_f = df_in.copy()
-    for col, sel in filter_state.items():
-        if pd.api.types.is_numeric_dtype(df_f[col]):
-            lo, hi = sel
-            df_f = df_f[pd.to_numeric(df_f[col], errors="coerce").between(lo, hi)]
-        else:
-            if sel:
-                df_f = df_f[df_f[col].astype(str).isin(sel)]
-    return df_f
+def incremental_filter(name: str, index: FilterIndex) -> IncrementalFilter:
+    # disimpan di session_state: kolom yang seleksinya tidak berubah tidak dihitung ulang
+    inc = st.session_state.get(name)
+    if inc is None or inc.index is not index:
+        inc = IncrementalFilter(index)
+        st.session_state[name] = inc
+    return inc
+
+def view_size(view) -> int:
+    # jumlah baris (atau sel cube) yang lolos filter
+    if hasattr(view, "cells"):
+        return len(view.cells)
+    return len(view.df) if view.rows is None else len(view.rows)
+
+def insight_source(filter_state: dict, group_cols: list, prefix: str):
+    # filter per kolom disimpan di session_state, jadi hanya kolom yang berubah yang dihitung ulang
+    def build_view():
+        with timer.stage("filter", rows_in=len(df)) as rec:
+            view = engine.view(
+                filter_state,
+                group_cols,
+                row_filter=incremental_filter(f"{prefix}_row_filter", engine.filter_index),
+                cube_filter=incremental_filter(f"{prefix}_cube_filter", engine.cube.index),
+            )
+            rec["rows_out"] = view_size(view)
+        return view
+
+    # agregat dengan filter yang sama dipakai ulang antar rerun (mis. ganti pie/sort/top N)
+    memo = st.session_state.setdefault(f"{prefix}_agg_memo", OrderedDict())
+    return MemoView(memo, (ds.key, freeze_state(filter_state)), build_view)
 
 def year_theme(year: int):
     if year == 2021:
@@ -152,7 +275,7 @@ elif st.session_state.insight_subpage == "view_dataset":
     st.caption("Tabel data lengkap yang dapat diurutkan (sorting).")
 
     sort_cols = df.columns.tolist()
-    c1, c2, c3 = st.columns([2, 1, 2])
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 1])
 
     with c1:
         default_idx = sort_cols.index("age") if "age" in sort_cols else 0
@@ -161,10 +284,17 @@ elif st.session_state.insight_subpage == "view_dataset":
         ascending = st.radio("Order", ["Ascending", "Descending"], horizontal=True)
     with c3:
         n_rows = st.slider("Jumlah baris ditampilkan", 10, 500, 100)
-
-    df_sorted = df.sort_values(by=sort_by, ascending=(ascending == "Ascending"))
+    with c4:
+        n_pages = max(1, -(-len(df) // n_rows))
+        page_no = st.number_input("Halaman", min_value=1, max_value=n_pages, value=1, step=1)
+
+    # urutan per kolom disimpan per dataset; halaman pertama cukup top-k, tidak perlu sort penuh
+    with timer.stage("sort_page", rows_in=len(df)) as rec:
+        positions = ds.derived("sort_index", SortIndex).page(sort_by, ascending == "Ascending", int(page_no), n_rows)
+        rec["rows_out"] = len(positions)
     st.markdown("---")
-    st.dataframe(df_sorted.head(n_rows), use_container_width=True, height=560)
+    st.caption(f"Halaman {int(page_no):,} dari {n_pages:,} ({len(df):,} baris)")
+    st.dataframe(df.take(positions), use_container_width=True, height=560)
 
 # =========================
 # SUBPAGE: INSIGHT PARAM (MENU 2)
@@ -179,12 +309,63 @@ elif st.session_state.insight_subpage == "insight_param":
 
     if "total_spend" not in df.columns:
         st.error("Kolom `total_spend` tidak ditemukan.")
-        st.stop()
+        stop_page()
 
     excluded_controls = {"age", "invoice_date_time", "invoice_date_day", "invoice_date_month", "invoice_date_year"}
     controls = ["gender", "category", "quantity", "payment_method", "shopping_mall", "age_class", "price_class", "price"]
     controls = [c for c in controls if c in df.columns and c not in excluded_controls]
 
+    @timed_fragment("param_sections")
+    def param_sections(filter_state: dict, empty: bool, slots: dict):
+        # group by / sort / top N hanya menjalankan ulang bar + pie (KPI dan filter tidak);
+        # widget dan chart ditulis ke slot yang sudah dibuat di kolom kanan/kiri
+        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
+        with slots["controls"]:
+            group_by = st.selectbox("Group by", options=group_by_options, index=0)
+
+            sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True)
+            top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True)
+            top_n = st.slider("Top N", 5, 30, 10, disabled=(top_mode == "All"))
+
+        if empty:
+            with slots["charts"]:
+                st.warning("Data kosong setelah filter.")
+            param_pie(None, group_by, slots)
+            return
+
+        source = insight_source(filter_state, [group_by], "p")
+        sort_col = "transaksi_count" if sort_metric == "Jumlah Transaksi" else "total_spend_sum"
+        with timer.stage("aggregate", rows_in=len(df)) as rec:
+            insight = top_insight(source, group_by, sort_col, top_n if top_mode == "Top N" else None)
+            rec["rows_out"] = len(insight)
+
+        rot = smart_xtick_rotation(insight[group_by].tolist())
+
+        with slots["charts"]:
+            fig1 = figure("bar", bar_figure, insight, x=group_by, y="total_spend_sum",
+                          hover_data=["transaksi_count", "total_spend_avg"], title="Total Spend", tickangle=rot)
+            chart(fig1, use_container_width=True)
+
+            fig2 = figure("bar", bar_figure, insight, x=group_by, y="transaksi_count",
+                          hover_data=["total_spend_sum", "total_spend_avg"], title="Jumlah Transaksi", tickangle=rot)
+            chart(fig2, use_container_width=True)
+
+        param_pie(insight, group_by, slots)
+
+    @timed_fragment("param_pie")
+    def param_pie(insight, group_by: str, slots: dict):
+        # ganti metrik pie hanya menggambar ulang pie
+        with slots["pie_control"]:
+            pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True)
+        if insight is None:
+            return
+        pie_value_col = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
+        with slots["pie"]:
+            fig3 = figure("pie", pie_figure, insight, names=group_by, values=pie_value_col,
+                          hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
+                          title=f"Share {pie_metric}")
+            chart(fig3, use_container_width=True)
+
     left, right = st.columns([3, 1])
 
     with right:
@@ -192,28 +373,20 @@ elif st.session_state.insight_subpage == "insight_param":
         filter_state = {}
         for col in controls:
             if pd.api.types.is_numeric_dtype(df[col]):
-                col_min = float(pd.to_numeric(df[col], errors="coerce").min())
-                col_max = float(pd.to_numeric(df[col], errors="coerce").max())
+                col_min, col_max = ds.value_range(col)
                 filter_state[col] = st.slider(col, col_min, col_max, (col_min, col_max), key=f"p_{col}")
             else:
-                opts = sorted(df[col].dropna().astype(str).unique().tolist())
+                opts = ds.options(col)
                 filter_state[col] = st.multiselect(col, options=opts, default=opts, key=f"p_{col}")
 
         st.markdown("---")
-        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
-        group_by = st.selectbox("Group by", options=group_by_options, index=0)
-
-        sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True)
-        top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True)
-        top_n = st.slider("Top N", 5, 30, 10, disabled=(top_mode == "All"))
-        pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True)
-
-    df_f = apply_filters(df, filter_state)
+        slots = {"controls": st.container(), "pie_control": st.container()}
 
     with left:
-        total_trx = len(df_f)
-        total_spend = float(pd.to_numeric(df_f["total_spend"], errors="coerce").sum())
-        avg_spend = float(pd.to_numeric(df_f["total_spend"], errors="coerce").mean()) if total_trx > 0 else 0.0
+        # KPI hanya bergantung pada filter
+        with timer.stage("aggregate", rows_in=len(df)) as rec:
+            total_trx, total_spend, avg_spend = insight_source(filter_state, [], "p").totals()
+            rec["rows_out"] = 1
 
         k1, k2, k3 = st.columns(3)
         with k1:
@@ -224,31 +397,9 @@ elif st.session_state.insight_subpage == "insight_param":
             render_kpi("Rata-rata Spend", fmt_money(avg_spend))
 
         st.markdown("---")
-        if total_trx == 0:
-            st.warning("Data kosong setelah filter.")
-        else:
-            insight = insight_by(df_f, group_by)
-            insight = insight.sort_values("transaksi_count" if sort_metric == "Jumlah Transaksi" else "total_spend_sum", ascending=False)
-            if top_mode == "Top N":
-                insight = insight.head(top_n)
-
-            rot = smart_xtick_rotation(insight[group_by].tolist())
-
-            fig1 = px.bar(insight, x=group_by, y="total_spend_sum",
-                          hover_data=["transaksi_count", "total_spend_avg"], title="Total Spend")
-            fig1.update_xaxes(tickangle=rot)
-            st.plotly_chart(fig1, use_container_width=True)
-
-            fig2 = px.bar(insight, x=group_by, y="transaksi_count",
-                          hover_data=["total_spend_sum", "total_spend_avg"], title="Jumlah Transaksi")
-            fig2.update_xaxes(tickangle=rot)
-            st.plotly_chart(fig2, use_container_width=True)
-
-            pie_value_col = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
-            fig3 = px.pie(insight, names=group_by, values=pie_value_col,
-                          hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
-                          title=f"Share {pie_metric}")
-            st.plotly_chart(fig3, use_container_width=True)
+        slots.update(charts=st.container(), pie=st.container())
+
+    param_sections(filter_state, total_trx == 0, slots)
 
 # =========================
 # SUBPAGE: TREND YEARLY (MENU 3) ✅ FIXED
@@ -264,14 +415,95 @@ elif st.session_state.insight_subpage == "trend_yearly":
 
     if "invoice_date_year" not in df.columns:
         st.error("Kolom `invoice_date_year` tidak ditemukan.")
-        st.stop()
+        stop_page()
     if "total_spend" not in df.columns:
         st.error("Kolom `total_spend` tidak ditemukan.")
-        st.stop()
+        stop_page()
 
     excluded_controls = {"age", "invoice_date_time", "invoice_date_day", "invoice_date_month", "invoice_date_year"}
     controls = ["gender", "category", "quantity", "payment_method", "shopping_mall", "age_class", "price_class", "price"]
     controls = [c for c in controls if c in df.columns and c not in excluded_controls]
+    years = [2021, 2022, 2023]
+
+    @timed_fragment("yearly_sections")
+    def yearly_sections(filter_state: dict, slots: dict):
+        # group by / sort / top N hanya menjalankan ulang bar + pie (KPI per tahun dan filter tidak);
+        # widget ditulis ke slot kontrol di kolom kanan, chart ke slot tiap panel tahun
+        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
+        with slots["group"]:
+            group_by = st.selectbox("Group by", options=group_by_options, index=0, key="y_group")
+
+            sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_sort_metric")
+        with slots["top"]:
+            top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True, key="y_top_mode")
+            top_n = st.slider("Top N", 5, 25, 10, disabled=(top_mode == "All"), key="y_top_n")
+
+        source = insight_source(filter_state, [group_by], "y")
+        sort_col = "total_spend_sum" if sort_metric == "Total Spend" else "transaksi_count"
+
+        # satu agregasi [tahun, group_by], tiap panel tinggal ambil potongannya
+        with timer.stage("aggregate", rows_in=len(df)) as rec:
+            _, year_panels = period_insight(source, "invoice_date_year", group_by, sort_col, top_n if top_mode == "Top N" else None)
+            rec["rows_out"] = sum(len(t) for t in year_panels.values())
+
+        chart_key = f"{group_by}_{top_mode}_{top_n}"
+        yearly_bars(year_panels, group_by, chart_key, slots)
+        yearly_pies(year_panels, group_by, chart_key, slots)
+
+    @timed_fragment("yearly_bars")
+    def yearly_bars(year_panels: dict, group_by: str, chart_key: str, slots: dict):
+        # ganti metrik bar hanya menggambar ulang 3 bar chart
+        with slots["bar_metric"]:
+            bar_metric = st.radio("Bar berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_bar_metric")
+        y_col = "total_spend_sum" if bar_metric == "Total Spend" else "transaksi_count"
+        bar_title = "Total Spend" if bar_metric == "Total Spend" else "Jumlah Transaksi"
+
+        for year in years:
+            _, bar_colors, _ = year_theme(year)
+            insight = year_panels.get(year)
+            with slots["bar", year]:
+                if insight is None or insight.empty:
+                    st.caption("Data kosong.")
+                    continue
+                fig_bar = figure(
+                    "bar",
+                    bar_figure,
+                    insight,
+                    x=group_by,
+                    y=y_col,
+                    hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
+                    title=bar_title,
+                    colors=bar_colors,
+                    tickangle=smart_xtick_rotation(insight[group_by].tolist()),
+                    height=280,
+                )
+                chart(fig_bar, use_container_width=True, key=f"y_{year}_bar_{y_col}_{chart_key}")
+
+    @timed_fragment("yearly_pies")
+    def yearly_pies(year_panels: dict, group_by: str, chart_key: str, slots: dict):
+        # ganti metrik pie hanya menggambar ulang 3 pie chart
+        with slots["pie_metric"]:
+            pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_pie_metric")
+        pie_val = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
+
+        for year in years:
+            _, _, pie_colors = year_theme(year)
+            insight = year_panels.get(year)
+            if insight is None or insight.empty:
+                continue
+            with slots["pie", year]:
+                fig_pie = figure(
+                    "pie",
+                    pie_figure,
+                    insight,
+                    names=group_by,
+                    values=pie_val,
+                    hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
+                    title=f"Share {pie_metric}",
+                    colors=pie_colors,
+                    height=280,
+                )
+                chart(fig_pie, use_container_width=True, key=f"y_{year}_pie_{pie_val}_{chart_key}")
 
     main_left, main_right = st.columns([3, 1])
 
@@ -280,95 +512,45 @@ elif st.session_state.insight_subpage == "trend_yearly":
         filter_state = {}
         for col in controls:
             if pd.api.types.is_numeric_dtype(df[col]):
-                col_min = float(pd.to_numeric(df[col], errors="coerce").min())
-                col_max = float(pd.to_numeric(df[col], errors="coerce").max())
+                col_min, col_max = ds.value_range(col)
                 filter_state[col] = st.slider(col, col_min, col_max, (col_min, col_max), key=f"y_{col}")
             else:
-                opts = sorted(df[col].dropna().astype(str).unique().tolist())
+                opts = ds.options(col)
                 filter_state[col] = st.multiselect(col, options=opts, default=opts, key=f"y_{col}")
 
         st.markdown("---")
-        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
-        group_by = st.selectbox("Group by", options=group_by_options, index=0, key="y_group")
-
-        sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_sort_metric")
-        bar_metric = st.radio("Bar berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_bar_metric")
-
-        top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True, key="y_top_mode")
-        top_n = st.slider("Top N", 5, 25, 10, disabled=(top_mode == "All"), key="y_top_n")
-
-        pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="y_pie_metric")
-
-    df_global = apply_filters(df, filter_state)
-
-    def panel_year(container, year: int):
-        df_y = df_global[df_global["invoice_date_year"] == year].copy()
-        panel_bg, bar_colors, pie_colors = year_theme(year)
+        # urutan kontrol seperti semula: group by, sort, bar, tampilkan/top N, pie
+        slots = {name: st.container() for name in ["group", "bar_metric", "top", "pie_metric"]}
 
-        with container:
-            st.markdown(f'<div class="year-panel" style="{panel_bg}">', unsafe_allow_html=True)
-            st.markdown(f'<div class="year-title">Tahun {year}</div>', unsafe_allow_html=True)
+    # KPI per tahun hanya bergantung pada filter
+    with timer.stage("aggregate", rows_in=len(df)) as rec:
+        year_kpis = period_totals(insight_source(filter_state, ["invoice_date_year"], "y").insight("invoice_date_year"), "invoice_date_year")
+        rec["rows_out"] = len(year_kpis)
 
-            total_trx = len(df_y)
-            total_spend = float(pd.to_numeric(df_y["total_spend"], errors="coerce").sum())
-            avg_spend = float(pd.to_numeric(df_y["total_spend"], errors="coerce").mean()) if total_trx > 0 else 0.0
-
-            k1, k2, k3 = st.columns(3)
-            with k1:
-                render_kpi("Transaksi", fmt_int(total_trx))
-            with k2:
-                render_kpi("Total Spend", fmt_money(total_spend))
-            with k3:
-                render_kpi("Avg Spend", fmt_money(avg_spend))
+    with main_left:
+        for container, year in zip(st.columns(3, gap="medium"), years):
+            panel_bg, _, _ = year_theme(year)
+            with container:
+                st.markdown(f'<div class="year-panel" style="{panel_bg}">', unsafe_allow_html=True)
+                st.markdown(f'<div class="year-title">Tahun {year}</div>', unsafe_allow_html=True)
+
+                total_trx, total_spend, avg_spend = year_kpis.get(year, (0, 0.0, 0.0))
+
+                k1, k2, k3 = st.columns(3)
+                with k1:
+                    render_kpi("Transaksi", fmt_int(total_trx))
+                with k2:
+                    render_kpi("Total Spend", fmt_money(total_spend))
+                with k3:
+                    render_kpi("Avg Spend", fmt_money(avg_spend))
+
+                # bar dan pie panel ini diisi fragment
+                slots["bar", year] = st.container()
+                slots["pie", year] = st.container()
 
-            if total_trx == 0:
-                st.caption("Data kosong.")
                 st.markdown("</div>", unsafe_allow_html=True)
-                return
-
-            insight = insight_by(df_y, group_by)
-            sort_col = "total_spend_sum" if sort_metric == "Total Spend" else "transaksi_count"
-            insight = insight.sort_values(sort_col, ascending=False)
-
-            if top_mode == "Top N":
-                insight = insight.head(top_n)
-
-            rot = smart_xtick_rotation(insight[group_by].tolist())
-
-            y_col = "total_spend_sum" if bar_metric == "Total Spend" else "transaksi_count"
-            bar_title = "Total Spend" if bar_metric == "Total Spend" else "Jumlah Transaksi"
 
-            fig_bar = px.bar(
-                insight,
-                x=group_by,
-                y=y_col,
-                hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
-                title=bar_title,
-                color_discrete_sequence=bar_colors
-            )
-            fig_bar.update_xaxes(tickangle=rot)
-            fig_bar.update_layout(height=280, margin=dict(l=10, r=10, t=40, b=10))
-            st.plotly_chart(fig_bar, use_container_width=True, key=f"y_{year}_bar_{group_by}_{y_col}_{top_mode}_{top_n}")
-
-            pie_val = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
-            fig_pie = px.pie(
-                insight,
-                names=group_by,
-                values=pie_val,
-                hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
-                title=f"Share {pie_metric}",
-                color_discrete_sequence=pie_colors
-            )
-            fig_pie.update_layout(height=280, margin=dict(l=10, r=10, t=40, b=10))
-            st.plotly_chart(fig_pie, use_container_width=True, key=f"y_{year}_pie_{group_by}_{pie_val}_{top_mode}_{top_n}")
-
-            st.markdown("</div>", unsafe_allow_html=True)
-
-    with main_left:
-        c2021, c2022, c2023 = st.columns(3, gap="medium")
-        panel_year(c2021, 2021)
-        panel_year(c2022, 2022)
-        panel_year(c2023, 2023)
+    yearly_sections(filter_state, slots)
 
 # =========================
 # SUBPAGE: TREND MONTHLY (MENU 4) ✅ FIX DUPLICATE ID
@@ -386,12 +568,121 @@ elif st.session_state.insight_subpage == "trend_monthly":
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
         st.error(f"Kolom wajib tidak ditemukan: {missing}")
-        st.stop()
+        stop_page()
 
     excluded_controls = {"age", "invoice_date_time", "invoice_date_day", "invoice_date_month", "invoice_date_year"}
     controls = ["gender", "category", "quantity", "payment_method", "shopping_mall", "age_class", "price_class", "price"]
     controls = [c for c in controls if c in df.columns and c not in excluded_controls]
 
+    month_names = {1:"Jan",2:"Feb",3:"Mar",4:"Apr",5:"May",6:"Jun",7:"Jul",8:"Aug",9:"Sep",10:"Oct",11:"Nov",12:"Dec"}
+    colA = [1, 4, 7, 10]
+    colB = [2, 5, 8, 11]
+    colC = [3, 6, 9, 12]
+
+    def month_insight(panels: tuple, m: int):
+        months_with_data, month_panels = panels
+        if m not in months_with_data:
+            st.caption("Data kosong.")
+            return None
+        insight = month_panels.get(m)
+        if insight is None or insight.empty:
+            st.caption("Insight kosong setelah cleaning.")
+            return None
+        return insight
+
+    @timed_fragment("monthly_sections")
+    def monthly_sections(filter_state: dict, year_pick: str, slots: dict):
+        # group by / sort / top N hanya menjalankan ulang bar + pie kedua section (filter tidak);
+        # widget ditulis ke slot kontrol di kolom kanan, chart ke slot tiap panel bulan
+        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
+        with slots["group"]:
+            group_by = st.selectbox("Group by", options=group_by_options, index=0, key="m_group")
+
+            sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_sort")
+        with slots["top"]:
+            top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True, key="m_top")
+            top_n = st.slider("Top N", 3, 25, 10, disabled=(top_mode == "All"), key="m_topn")
+
+        source = insight_source(filter_state, [group_by], "m")
+        year_where = {} if year_pick == "All" else {"invoice_date_year": int(year_pick)}
+        sort_col = "total_spend_sum" if sort_metric == "Total Spend" else "transaksi_count"
+
+        # satu agregasi [bulan, group_by], dipakai bersama section atas (bar) dan bawah (bar + pie)
+        with timer.stage("aggregate", rows_in=len(df)) as rec:
+            panels = period_insight(
+                source,
+                "invoice_date_month",
+                group_by,
+                sort_col,
+                top_n if top_mode == "Top N" else None,
+                where=year_where,
+                dropna=True,
+            )
+            rec["rows_out"] = sum(len(t) for t in panels[1].values())
+
+        chart_key = f"{group_by}_{year_pick}_{top_mode}_{top_n}"
+        monthly_bars(panels, group_by, chart_key, slots)
+        monthly_pies(panels, group_by, chart_key, slots)
+
+    @timed_fragment("monthly_bars")
+    def monthly_bars(panels: tuple, group_by: str, chart_key: str, slots: dict):
+        # ganti metrik bar hanya menggambar ulang bar chart kedua section
+        with slots["bar_metric"]:
+            bar_metric = st.radio("Bar berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_bar")
+        y_col = "total_spend_sum" if bar_metric == "Total Spend" else "transaksi_count"
+        title_bar = "Total Spend" if bar_metric == "Total Spend" else "Jumlah Transaksi"
+
+        for section_tag in ["top", "bottom"]:
+            for m in month_names:
+                with slots["bar", section_tag, m]:
+                    insight = month_insight(panels, m)
+                    if insight is None:
+                        continue
+                    # section atas dan bawah memakai tabel yang sama, jadi figure bar-nya ikut dipakai ulang
+                    fig_bar = figure(
+                        "bar",
+                        bar_figure,
+                        insight,
+                        x=group_by,
+                        y=y_col,
+                        hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
+                        title=title_bar,
+                        tickangle=smart_xtick_rotation(insight[group_by].tolist()),
+                        height=260,
+                    )
+                    # ✅ KEY UNIK: bedakan antara section bar-only vs section pie
+                    chart(fig_bar, use_container_width=True, key=f"m_{section_tag}_bar_month{m}_{y_col}_{chart_key}")
+
+    @timed_fragment("monthly_pies")
+    def monthly_pies(panels: tuple, group_by: str, chart_key: str, slots: dict):
+        # ganti metrik pie hanya menggambar ulang 12 pie chart
+        with slots["pie_metric"]:
+            pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_pie")
+        pie_col = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
+
+        months_with_data, month_panels = panels
+        for m in month_names:
+            insight = month_panels.get(m)
+            # bulan tanpa data sudah diberi keterangan di slot bar
+            if m not in months_with_data or insight is None or insight.empty:
+                continue
+            with slots["pie", m]:
+                pie_df = insight[insight[pie_col] > 0]
+                if pie_df.empty:
+                    st.caption("Pie chart tidak bisa ditampilkan (nilai 0/NaN).")
+                    continue
+                fig_pie = figure(
+                    "pie",
+                    pie_figure,
+                    pie_df,
+                    names=group_by,
+                    values=pie_col,
+                    hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
+                    title=f"Share {pie_metric}",
+                    height=260,
+                )
+                chart(fig_pie, use_container_width=True, key=f"m_bottom_pie_month{m}_{pie_col}_{chart_key}")
+
     main_left, main_right = st.columns([3, 1])
 
     with main_right:
@@ -401,130 +692,42 @@ elif st.session_state.insight_subpage == "trend_monthly":
         filter_state = {}
         for col in controls:
             if pd.api.types.is_numeric_dtype(df[col]):
-                s = pd.to_numeric(df[col], errors="coerce")
-                col_min = float(s.min())
-                col_max = float(s.max())
+                col_min, col_max = ds.value_range(col)
                 filter_state[col] = st.slider(col, col_min, col_max, (col_min, col_max), key=f"m_{col}")
             else:
-                opts = sorted(df[col].dropna().astype(str).unique().tolist())
+                opts = ds.options(col)
                 filter_state[col] = st.multiselect(col, options=opts, default=opts, key=f"m_{col}")
 
         st.markdown("---")
-        group_by_options = [c for c in ["gender", "category", "payment_method", "shopping_mall", "age_class", "price_class", "quantity", "price"] if c in df.columns]
-        group_by = st.selectbox("Group by", options=group_by_options, index=0, key="m_group")
-
-        sort_metric = st.radio("Sort by", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_sort")
-        bar_metric = st.radio("Bar berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_bar")
-
-        top_mode = st.radio("Tampilkan", ["Top N", "All"], horizontal=True, key="m_top")
-        top_n = st.slider("Top N", 3, 25, 10, disabled=(top_mode == "All"), key="m_topn")
-
-        pie_metric = st.radio("Pie berdasarkan", ["Total Spend", "Jumlah Transaksi"], horizontal=True, key="m_pie")
-
-    df_global = apply_filters(df, filter_state).copy()
-
-    if year_pick != "All":
-        df_global = df_global[df_global["invoice_date_year"] == int(year_pick)].copy()
-
-    df_global["invoice_date_month"] = pd.to_numeric(df_global["invoice_date_month"], errors="coerce")
-
-    month_names = {1:"Jan",2:"Feb",3:"Mar",4:"Apr",5:"May",6:"Jun",7:"Jul",8:"Aug",9:"Sep",10:"Oct",11:"Nov",12:"Dec"}
-    colA = [1, 4, 7, 10]
-    colB = [2, 5, 8, 11]
-    colC = [3, 6, 9, 12]
-
-    def month_panel(container, m: int, show_pie: bool, section_tag: str):
-        df_m = df_global[df_global["invoice_date_month"] == m].copy()
-
-        with container:
-            st.markdown('<div class="month-panel">', unsafe_allow_html=True)
-            st.markdown(f'<div class="month-title">{month_names[m]} (Month {m})</div>', unsafe_allow_html=True)
-
-            if df_m.empty:
-                st.caption("Data kosong.")
-                st.markdown("</div>", unsafe_allow_html=True)
-                return
-
-            insight = insight_by(df_m, group_by)
-
-            insight["total_spend_sum"] = pd.to_numeric(insight["total_spend_sum"], errors="coerce")
-            insight["transaksi_count"] = pd.to_numeric(insight["transaksi_count"], errors="coerce")
-            insight["total_spend_avg"] = pd.to_numeric(insight["total_spend_avg"], errors="coerce")
-
-            sort_col = "total_spend_sum" if sort_metric == "Total Spend" else "transaksi_count"
-            insight = insight.dropna(subset=[group_by, sort_col]).sort_values(sort_col, ascending=False)
-
-            if top_mode == "Top N":
-                insight = insight.head(top_n)
-
-            if insight.empty:
-                st.caption("Insight kosong setelah cleaning.")
-                st.markdown("</div>", unsafe_allow_html=True)
-                return
-
-            rot = smart_xtick_rotation(insight[group_by].tolist())
-
-            # BAR
-            y_col = "total_spend_sum" if bar_metric == "Total Spend" else "transaksi_count"
-            title_bar = "Total Spend" if bar_metric == "Total Spend" else "Jumlah Transaksi"
-
-            fig_bar = px.bar(
-                insight,
-                x=group_by,
-                y=y_col,
-                hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
-                title=title_bar
-            )
-            fig_bar.update_xaxes(tickangle=rot)
-            fig_bar.update_layout(height=260, margin=dict(l=10, r=10, t=40, b=10))
-
-            # ✅ KEY UNIK: bedakan antara section bar-only vs section pie
-            bar_key = f"m_{section_tag}_bar_month{m}_{group_by}_{y_col}_{year_pick}_{top_mode}_{top_n}"
-            st.plotly_chart(fig_bar, use_container_width=True, key=bar_key)
-
-            # PIE
-            if show_pie:
-                pie_col = "total_spend_sum" if pie_metric == "Total Spend" else "transaksi_count"
-                pie_df = insight.dropna(subset=[group_by, pie_col]).copy()
-                pie_df[pie_col] = pd.to_numeric(pie_df[pie_col], errors="coerce")
-                pie_df = pie_df[pie_df[pie_col] > 0]
-
-                if pie_df.empty:
-                    st.caption("Pie chart tidak bisa ditampilkan (nilai 0/NaN).")
-                else:
-                    fig_pie = px.pie(
-                        pie_df,
-                        names=group_by,
-                        values=pie_col,
-                        hover_data=["total_spend_sum", "transaksi_count", "total_spend_avg"],
-                        title=f"Share {pie_metric}"
-                    )
-                    fig_pie.update_layout(height=260, margin=dict(l=10, r=10, t=40, b=10))
-
-                    pie_key = f"m_{section_tag}_pie_month{m}_{group_by}_{pie_col}_{year_pick}_{top_mode}_{top_n}"
-                    st.plotly_chart(fig_pie, use_container_width=True, key=pie_key)
-
-            st.markdown("</div>", unsafe_allow_html=True)
+        # urutan kontrol seperti semula: group by, sort, bar, tampilkan/top N, pie
+        slots = {name: st.container() for name in ["group", "bar_metric", "top", "pie_metric"]}
+
+    def month_panel(m: int, section_tag: str):
+        # kerangka panel bulan; bar (dan pie di section bawah) diisi fragment
+        st.markdown('<div class="month-panel">', unsafe_allow_html=True)
+        st.markdown(f'<div class="month-title">{month_names[m]} (Month {m})</div>', unsafe_allow_html=True)
+        slots["bar", section_tag, m] = st.container()
+        if section_tag == "bottom":
+            slots["pie", m] = st.container()
+        st.markdown("</div>", unsafe_allow_html=True)
 
     with main_left:
         st.markdown("### Mini Bar Chart per Bulan (tanpa scroll)")
-        a, b, c = st.columns(3, gap="medium")
-        for m in colA:
-            month_panel(a, m, show_pie=False, section_tag="top")
-        for m in colB:
-            month_panel(b, m, show_pie=False, section_tag="top")
-        for m in colC:
-            month_panel(c, m, show_pie=False, section_tag="top")
+        for container, months in zip(st.columns(3, gap="medium"), [colA, colB, colC]):
+            with container:
+                for m in months:
+                    month_panel(m, "top")
 
         st.markdown("---")
         st.markdown("### Pie Chart per Bulan (scroll)")
-        a2, b2, c2 = st.columns(3, gap="medium")
-        for m in colA:
-            month_panel(a2, m, show_pie=True, section_tag="bottom")
-        for m in colB:
-            month_panel(b2, m, show_pie=True, section_tag="bottom")
-        for m in colC:
-            month_panel(c2, m, show_pie=True, section_tag="bottom")
+        for container, months in zip(st.columns(3, gap="medium"), [colA, colB, colC]):
+            with container:
+                for m in months:
+                    month_panel(m, "bottom")
+
+    monthly_sections(filter_state, year_pick, slots)
 
 else:
     go("home")
+
+finish_timing()
@@ -1,8 +1,19 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import uuid
 from pathlib import Path
 
+from src.cluster_metrics import dataset_validity
+from src.dataset_cache import cache_stats, load_dataset
+from src.cluster_model import MODEL_PATH, ClusterModel
+from src.cluster_profile import cluster_profile, profile_totals
+from src.crosstab import ClusterCrosstab
+from src.fcm import FCM_FEATURES, feature_columns, feature_names, run_fcm
+from src.model_select import SWEEP_CS, select_model
+from src.stage_timer import ALWAYS_ON as TIMING_ALWAYS_ON, TRACE_ALLOC as TIMING_TRACE_ALLOC, RerunTimer
+
 st.set_page_config(page_title="Cluster", layout="wide")
 
 # load css khusus halaman cluster
@@ -16,6 +27,39 @@ load_css("assets/insight.css")
 st.title("Cluster Dashboard")
 st.caption("Visualisasi hasil clustering Fuzzy C-Means dan interpretasi cluster.")
 
+# debug: waktu per tahap tiap rerun (panel sidebar + log JSON-lines)
+debug_timing = st.sidebar.toggle("Debug: waktu per tahap", value=False, key="debug_timing")
+timer = RerunTimer(
+    "cluster",
+    enabled=debug_timing or TIMING_ALWAYS_ON,
+    trace_alloc=debug_timing or TIMING_TRACE_ALLOC,
+    session=st.session_state.setdefault("timing_session", uuid.uuid4().hex[:8]),
+)
+
+def finish_timing():
+    # statistik cache dataset bersama (semua sesi di proses ini)
+    cache = cache_stats() if timer.enabled else None
+    timer.write_log(cache=cache)
+    timer.close()
+    if debug_timing:
+        with st.sidebar.expander("Waktu per tahap", expanded=True):
+            st.caption(f"Total rerun: {timer.total_seconds * 1000:,.0f} ms")
+            st.dataframe(timer.table(), hide_index=True, use_container_width=True)
+            st.caption(
+                f"Cache dataset: {cache['datasets']} dataset · {cache['resident_bytes'] / 2**20:,.0f} / "
+                f"{cache['max_bytes'] / 2**20:,.0f} MiB (mmap {cache['mapped_bytes'] / 2**20:,.0f} MiB) · "
+                f"hit {cache['hits']} · miss {cache['misses']} · evict {cache['evictions']}"
+            )
+
+# st.stop() di tengah halaman tetap harus menulis log waktu rerun ini
+def stop_page():
+    finish_timing()
+    st.stop()
+
+def chart(fig, **kwargs):
+    with timer.stage("plotly_chart"):
+        st.plotly_chart(fig, **kwargs)
+
 # fungsi bantu
 def pick_col(df, candidates):
     lower_map = {c.lower(): c for c in df.columns}
@@ -24,9 +68,6 @@ def pick_col(df, candidates):
             return lower_map[cand.lower()]
     return None
 
-def ensure_numeric(s: pd.Series):
-    return pd.to_numeric(s, errors="coerce")
-
 def fmt_int(x):
     try:
         return f"{int(x):,}"
@@ -51,25 +92,28 @@ def render_kpi(title: str, value: str, subtitle: str = ""):
         unsafe_allow_html=True,
     )
 
-def safe_value_counts(s: pd.Series):
-    return s.astype(str).fillna("NaN").value_counts()
-
-def stacked_counts(df_in, x_col, cluster_col):
-    tmp = df_in.copy()
-    tmp[x_col] = tmp[x_col].astype(str)
-    tmp[cluster_col] = tmp[cluster_col].astype(str)
-    ct = tmp.groupby([x_col, cluster_col]).size().reset_index(name="count")
-    return ct
-
 # upload data cluster
 st.sidebar.header("Upload Data")
-uploaded = st.sidebar.file_uploader("Upload CSV hasil clustering (FCM)", type=["csv"])
+uploaded = st.sidebar.file_uploader("Upload CSV hasil clustering (FCM), data insight-ready, data transaksi mentah, atau bundle (.zip)", type=["csv", "zip"])
 
 if uploaded is None:
-    st.info("Silakan upload file CSV hasil clustering.")
-    st.stop()
-
-df = pd.read_csv(uploaded)
+    st.info("Silakan upload file CSV hasil clustering atau data insight-ready.")
+    stop_page()
+
+progress_slot = st.sidebar.empty()
+
+def show_progress(frac: float, text: str):
+    progress_slot.progress(frac, text=text)
+
+try:
+    with timer.stage("load_dataset") as rec:
+        ds = load_dataset(uploaded, progress=show_progress)
+        rec["rows_out"] = len(ds.df)
+except ValueError as e:
+    st.error(f"File tidak bisa dibaca: {e}")
+    stop_page()
+progress_slot.empty()
+df = ds.df
 st.sidebar.success("CSV berhasil diupload")
 
 # deteksi kolom penting
@@ -79,39 +123,144 @@ cat_col     = pick_col(df, ["category", "kategori"])
 mall_col    = pick_col(df, ["shopping_mall", "mall"])
 gender_col  = pick_col(df, ["gender"])
 pay_col     = pick_col(df, ["payment_method", "payment"])
+age_col     = pick_col(df, ["age", "umur"])
+qty_col     = pick_col(df, ["quantity", "qty"])
+memb_col    = pick_col(df, ["membership", "membership_max"])
+
+# segmentasi: label dari model tersimpan (tanpa fit ulang), atau FCM di aplikasi,
+# kalau data belum punya kolom cluster atau kalau diminta
+fcm_cols = feature_columns(df.columns)
+# (pusat, membership, m, mean, std scaler) clustering yang ditampilkan, untuk metrik validitas
+fit_state = None
+# membership terbesar per baris (vektor) atau matriks n x c, untuk profil cluster
+membership = df[memb_col] if memb_col else None
+if fcm_cols is not None:
+    st.sidebar.header("Segmentasi FCM")
+    model_file = st.sidebar.file_uploader("Model cluster (.json, opsional)", type=["json"])
+    model = None
+    try:
+        if model_file is not None:
+            model = ClusterModel.from_json(model_file.getvalue())
+        elif MODEL_PATH.exists():
+            model = ClusterModel.load(MODEL_PATH)
+    except ValueError as e:
+        st.sidebar.error(str(e))
+
+    use_model = model is not None and st.sidebar.toggle("Labeli dengan model tersimpan", value=cluster_col is None)
+    run_in_app = not use_model and (cluster_col is None or st.sidebar.toggle("Hitung ulang cluster (FCM)", value=False))
+    if use_model:
+        st.sidebar.caption(f"Model: {model.n_clusters} cluster · m = {model.m:g}")
+        with st.spinner("Memberi label cluster dengan model..."), timer.stage("cluster_labels", rows_in=len(df)) as rec:
+            labels, top = ds.derived(("model_labels", model.key), model.score)
+            rec["rows_out"] = len(labels)
+        ds = ds.with_columns(f"model_{model.key}", {"cluster": labels, "membership": top})
+        df = ds.df
+        cluster_col = "cluster"
+        fit_state = (model.centers, None, model.m, model.mean, model.std)
+        membership = top
+    elif run_in_app:
+        st.sidebar.caption(f"Fitur: {', '.join(feature_names(fcm_cols))} (distandarisasi)")
+        auto_c = st.sidebar.toggle(f"Pilih c otomatis (c = {SWEEP_CS[0]}–{SWEEP_CS[-1]})", value=False)
+        fcm_c = None if auto_c else st.sidebar.slider("Jumlah cluster (c)", 2, 10, 5)
+        fcm_mode = st.sidebar.radio("Mode", ["Full", "Mini-batch"], horizontal=True)
+        mode = "minibatch" if fcm_mode == "Mini-batch" else "full"
+        if auto_c:
+            # kandidat c dievaluasi paralel pada sampel; fit penuh dimulai dari pusat kandidat terbaik
+            with st.spinner("Mengevaluasi kandidat jumlah cluster..."), timer.stage("cluster_labels", rows_in=len(df)):
+                sweep_table, fcm_result = ds.latest("fcm", ("fcm_sweep", mode), lambda d: select_model(d, mode=mode))
+            fcm_c = len(fcm_result.centers)
+            st.sidebar.caption(f"c terpilih (Xie–Beni terkecil): {fcm_c}")
+            with st.expander("Pemilihan jumlah cluster (sampel)", expanded=False):
+                st.dataframe(sweep_table, use_container_width=True, hide_index=True)
+        else:
+            with st.spinner("Menjalankan Fuzzy C-Means..."), timer.stage("cluster_labels", rows_in=len(df)):
+                fcm_result = ds.latest("fcm", ("fcm", fcm_c, mode), lambda d: run_fcm(d, fcm_c, mode=mode))
+        st.sidebar.caption(f"FPC: {fcm_result.fpc:.4f} · iterasi: {fcm_result.n_iter}")
+        # model (scaler + pusat) bisa disimpan untuk melabeli data baru tanpa fit ulang
+        st.sidebar.download_button(
+            "Download model (.json)",
+            ClusterModel.from_result(fcm_result).to_json(),
+            file_name=MODEL_PATH.name,
+            mime="application/json",
+        )
+        # label hasil FCM ditempel sebagai kolom baru tanpa menyalin kolom lain
+        # hanya fit FCM terakhir per dataset yang disimpan (u berukuran n x c per nilai slider)
+        ds = ds.with_columns(f"fcm_{'auto' if auto_c else fcm_c}_{mode}", {"cluster": fcm_result.labels}, slot="fcm")
+        df = ds.df
+        cluster_col = "cluster"
+        fit_state = (fcm_result.centers, fcm_result.u, fcm_result.m, fcm_result.mean, fcm_result.std)
+        membership = fcm_result.u
 
 if cluster_col is None:
-    st.error("Kolom cluster tidak ditemukan.")
-    st.stop()
+    st.error(f"Kolom cluster tidak ditemukan (dan fitur FCM {FCM_FEATURES} tidak lengkap).")
+    stop_page()
 
-df[cluster_col] = df[cluster_col].astype(str)
+cluster_str = ds.derived(("cluster_str", cluster_col), lambda d: d[cluster_col].astype(str).astype("category"))
 
 # filter data (minimal: cluster)
 st.sidebar.header("Filters")
-clusters = sorted(df[cluster_col].unique().tolist())
+# statistik per cluster dihitung sekali per dataset + kolom cluster; pilihan cluster cukup menjumlahkan barisnya
+def build_profile(d):
+    measures = {
+        "total_spend": d[spend_col] if spend_col else None,
+        "age": d[age_col] if age_col else None,
+        "quantity": d[qty_col] if qty_col else None,
+    }
+    return cluster_profile(cluster_str, measures, membership)
+
+with timer.stage("cluster_profile", rows_in=len(df)) as rec:
+    profile = ds.derived(("cluster_profile", cluster_col), build_profile)
+    rec["rows_out"] = len(profile)
+clusters = profile[cluster_col].tolist()
 selected_clusters = st.sidebar.multiselect("Cluster", clusters, clusters)
 
-df_f = df.copy()
-df_f = df_f[df_f[cluster_col].isin(selected_clusters)]
+cl_f = profile[profile[cluster_col].isin(selected_clusters)]
+totals = profile_totals(profile, selected_clusters)
+n_filtered = totals["transaksi_count"]
 
-st.sidebar.caption(f"Filtered rows: {len(df_f):,} / {len(df):,}")
+st.sidebar.caption(f"Filtered rows: {n_filtered:,} / {len(df):,}")
 
-# preview data
+# preview data: baris penuh hanya diambil untuk 25 baris yang ditampilkan
 with st.expander("Preview data (head)", expanded=False):
-    st.dataframe(df_f.head(25), use_container_width=True)
+    rows = np.flatnonzero(cluster_str.isin(selected_clusters))[:25]
+    preview = df.take(rows).assign(**{cluster_col: cluster_str.take(rows).astype(str).to_numpy()})
+    st.dataframe(preview, use_container_width=True)
 
 # ringkasan KPI
 st.subheader("Ringkasan")
 
 k1, k2, k3, k4 = st.columns(4)
 with k1:
-    render_kpi("Jumlah Data", fmt_int(len(df_f)))
+    render_kpi("Jumlah Data", fmt_int(n_filtered))
 with k2:
     render_kpi("Jumlah Cluster", fmt_int(len(selected_clusters)))
 with k3:
-    render_kpi("Total Spend", fmt_money(ensure_numeric(df_f[spend_col]).sum()) if spend_col else "-")
+    render_kpi("Total Spend", fmt_money(totals["total_spend_sum"]) if spend_col else "-")
 with k4:
-    render_kpi("Rata-rata Spend", fmt_money(ensure_numeric(df_f[spend_col]).mean()) if spend_col else "-")
+    render_kpi("Rata-rata Spend", fmt_money(totals["total_spend_mean"]) if spend_col else "-")
+
+# metrik validitas untuk clustering yang sedang ditampilkan (dihitung per blok, silhouette dari sampel)
+if fcm_cols is not None:
+    with st.expander("Validitas Cluster (FPC, Xie–Beni, Silhouette)", expanded=False):
+        if st.toggle("Hitung metrik validitas", value=False, key="validity_on"):
+            def build_validity(d):
+                if fit_state is not None:
+                    return dataset_validity(d, fcm_cols, cluster_col, *fit_state)
+                return dataset_validity(d, fcm_cols, cluster_col)
+
+            with st.spinner("Menghitung metrik validitas..."), timer.stage("validity", rows_in=len(df)):
+                report = ds.derived(("validity", cluster_col), build_validity)
+            v1, v2, v3 = st.columns(3)
+            with v1:
+                render_kpi("FPC", f"{report['fpc']:.4f}", "makin besar makin tegas")
+            with v2:
+                render_kpi("Xie–Beni", f"{report['xie_beni']:.4f}", "makin kecil makin baik")
+            with v3:
+                lo, hi = report["silhouette_ci"]
+                sub = "persis" if lo == hi else f"95% CI {lo:.3f} – {hi:.3f} (sampel {report['silhouette_n']:,})"
+                render_kpi("Silhouette", f"{report['silhouette']:.4f}", sub)
+            if fit_state is None:
+                st.caption("Pusat cluster dihitung dari rata-rata anggota tiap cluster (fitur distandarisasi).")
 
 # visual overview cluster
 st.subheader("Cluster Overview")
@@ -119,29 +268,22 @@ st.subheader("Cluster Overview")
 left, right = st.columns(2)
 
 with left:
-    vc = safe_value_counts(df_f[cluster_col]).reset_index()
+    vc = cl_f[[cluster_col, "transaksi_count"]].sort_values("transaksi_count", ascending=False, kind="stable")
     vc.columns = [cluster_col, "count"]
-    fig = px.bar(vc, x=cluster_col, y="count", title="Jumlah Data per Cluster")
-    st.plotly_chart(fig, use_container_width=True)
+    with timer.stage("figure", rows_in=len(vc)):
+        fig = px.bar(vc, x=cluster_col, y="count", title="Jumlah Data per Cluster")
+    chart(fig, use_container_width=True)
 
 with right:
     if spend_col:
-        grp = df_f.groupby(cluster_col)[spend_col].sum().reset_index()
-        fig = px.bar(grp, x=cluster_col, y=spend_col, title="Total Spend per Cluster")
-        st.plotly_chart(fig, use_container_width=True)
+        grp = cl_f[[cluster_col, "total_spend_sum"]].rename(columns={"total_spend_sum": spend_col})
+        with timer.stage("figure", rows_in=len(grp)):
+            fig = px.bar(grp, x=cluster_col, y=spend_col, title="Total Spend per Cluster")
+        chart(fig, use_container_width=True)
 
 # filter fokus mall (dipakai untuk grafik komposisi)
 st.subheader("Komposisi Cluster (Stacked Bar)")
 
-df_scope = df_f.copy()
-
-if mall_col:
-    mall_options = ["Semua Mall"] + sorted(df_scope[mall_col].astype(str).unique().tolist())
-    focus_mall = st.selectbox("Fokus Mall", mall_options, index=0)
-
-    if focus_mall != "Semua Mall":
-        df_scope = df_scope[df_scope[mall_col].astype(str) == focus_mall]
-
 # pilih dimensi untuk divisualkan
 dim_options = []
 dim_map = {}
@@ -162,6 +304,21 @@ if pay_col:
     dim_options.append("Payment Method")
     dim_map["Payment Method"] = pay_col
 
+# cluster x nilai untuk semua dimensi & semua mall, dihitung sekali per dataset + kolom cluster;
+# ganti dimensi / top K / fokus mall / cluster terpilih cukup membaca tabel ini
+dims = list(dim_map.values())
+with timer.stage("crosstab", rows_in=len(df)):
+    xtab = ds.derived(
+        ("crosstab", cluster_col, mall_col) + tuple(dims),
+        lambda d: ClusterCrosstab(d, cluster_str, dims, mall_col),
+    )
+
+focus_mall = "Semua Mall"
+
+if mall_col:
+    mall_options = ["Semua Mall"] + xtab.values(mall_col, selected_clusters)
+    focus_mall = st.selectbox("Fokus Mall", mall_options, index=0)
+
 if len(dim_options) == 0:
     st.info("Tidak ada kolom kategorikal yang terdeteksi (category/mall/gender/payment).")
 else:
@@ -173,22 +330,19 @@ else:
 
     x_col = dim_map[dim_choice]
 
-    # ambil top-k nilai pada dimensi supaya bar tidak terlalu banyak
-    top_vals = df_scope[x_col].astype(str).value_counts().head(topk).index.tolist()
-    df_plot = df_scope[df_scope[x_col].astype(str).isin(top_vals)].copy()
+    # hitung count top-k nilai dimensi (supaya bar tidak terlalu banyak) dan plot stacked bar
+    ct = xtab.stacked(x_col, selected_clusters, None if focus_mall == "Semua Mall" else focus_mall, top_k=topk)
 
-    # hitung count dan plot stacked bar
-    ct = stacked_counts(df_plot, x_col, cluster_col)
-
-    fig = px.bar(
-        ct,
-        x=x_col,
-        y="count",
-        color=cluster_col,
-        title=f"Komposisi Cluster per {dim_choice} (Top {topk})" + (f" — Fokus: {focus_mall}" if mall_col else ""),
-    )
-    fig.update_layout(barmode="stack", xaxis_title=dim_choice, yaxis_title="Jumlah Transaksi")
-    st.plotly_chart(fig, use_container_width=True)
+    with timer.stage("figure", rows_in=len(ct)):
+        fig = px.bar(
+            ct,
+            x=x_col,
+            y="count",
+            color=cluster_col,
+            title=f"Komposisi Cluster per {dim_choice} (Top {topk})" + (f" — Fokus: {focus_mall}" if mall_col else ""),
+        )
+        fig.update_layout(barmode="stack", xaxis_title=dim_choice, yaxis_title="Jumlah Transaksi")
+    chart(fig, use_container_width=True)
 
 # interpretasi cluster
 st.subheader("Interpretasi Cluster")
@@ -238,10 +392,38 @@ cluster_table = pd.DataFrame(
     ]
 )
 
+# profil dari data yang diupload (statistik per cluster yang sudah dihitung), untuk cluster terpilih
+st.markdown("<div class='panel-title'>Profil Cluster dari Data</div>", unsafe_allow_html=True)
+
+profile_cols = {cluster_col: "Cluster", "transaksi_count": "Jumlah"}
+if spend_col:
+    profile_cols.update({
+        "total_spend_sum": "Total Spend",
+        "total_spend_mean": "Rata-rata Spend",
+        "total_spend_p25": "Spend Q1",
+        "total_spend_p50": "Median Spend",
+        "total_spend_p75": "Spend Q3",
+    })
+if age_col:
+    profile_cols["age_mean"] = "Rata-rata Usia"
+if qty_col:
+    profile_cols["quantity_mean"] = "Rata-rata Qty"
+if "membership_mean" in cl_f.columns:
+    profile_cols.update({"membership_mean": "Membership (rata-rata)", "membership_p25": "Membership Q1"})
+
+profile_view = cl_f[list(profile_cols)].rename(columns=profile_cols)
+profile_view.insert(2, "Porsi (%)", cl_f["transaksi_count"].to_numpy() / max(n_filtered, 1) * 100)
+if spend_col:
+    profile_view.insert(4, "Porsi Spend (%)", cl_f["total_spend_sum"].to_numpy() / (totals["total_spend_sum"] or np.nan) * 100)
+st.dataframe(profile_view.round(2), use_container_width=True, hide_index=True)
+
+# narasi per cluster (dari model referensi), hanya untuk label cluster yang ada di pilihan
+narrative = cluster_table[cluster_table["Cluster"].isin(selected_clusters)]
+
 st.markdown("<div class='panel-title'>Ringkasan Profil Cluster</div>", unsafe_allow_html=True)
 
 rows_html = ""
-for _, r in cluster_table.iterrows():
+for _, r in narrative.iterrows():
     rows_html += f"""
     <tr>
         <td class="td-cluster">{r['Cluster']}</td>
@@ -272,4 +454,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+if fit_state is not None:
+    st.caption("Narasi mengacu pada cluster model referensi; untuk hasil segmentasi di aplikasi gunakan tabel profil dari data di atas.")
 st.caption("Data sumber: CSV hasil clustering Fuzzy C-Means")
+
+finish_timing()
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+
+def insight_by(df_in: pd.DataFrame, group_col):
+    return (
+        df_in.groupby(group_col, dropna=False, observed=True)
+        .agg(
+            transaksi_count=("total_spend", "size"),
+            total_spend_sum=("total_spend", "sum"),
+            total_spend_avg=("total_spend", "mean"),
+        )
+        .reset_index()
+    )
+
+
+def group_cells(df_in: pd.DataFrame, group_cols: list, measure_col: str = "total_spend") -> pd.DataFrame:
+    # agregat aditif per kombinasi group_cols: bisa digabung antar potongan data (merge_cells)
+    grouped = df_in.groupby(group_cols, dropna=False, observed=True)
+    if measure_col is None:
+        out = grouped.size().rename("transaksi_count").reset_index()
+        out["total_spend_sum"] = 0.0
+        out["total_spend_n"] = 0
+        return out
+    return grouped[measure_col].agg(transaksi_count="size", total_spend_sum="sum", total_spend_n="count").reset_index()
+
+
+def merge_cells(parts: list, group_cols: list) -> pd.DataFrame:
+    parts = [p for p in parts if p is not None]
+    if len(parts) == 1:
+        return parts[0]
+    return (
+        pd.concat(parts, ignore_index=True)
+        .groupby(group_cols, dropna=False, observed=True)[["transaksi_count", "total_spend_sum", "total_spend_n"]]
+        .sum()
+        .reset_index()
+    )
+
+
+def regroup(cells: pd.DataFrame, group_cols: list) -> pd.DataFrame:
+    # gabungkan ulang sel setelah key-nya diubah (mis. dijadikan string)
+    return cells.groupby(group_cols)[["transaksi_count", "total_spend_sum", "total_spend_n"]].sum().reset_index()
+
+
+def cells_insight(cells: pd.DataFrame) -> pd.DataFrame:
+    # sel (count, sum, non-null) -> kolom insight_by (rata-rata dari sum / non-null)
+    out = cells.copy()
+    out["total_spend_avg"] = out["total_spend_sum"] / out["total_spend_n"].where(out["total_spend_n"] > 0)
+    return out.drop(columns="total_spend_n")
+
+
+def top_insight(source, group_col, sort_col: str, top_n: int = None, where: dict = None) -> pd.DataFrame:
+    out = source.insight(group_col, where).sort_values(sort_col, ascending=False)
+    return out if top_n is None else out.head(top_n)
+
+
+def top_n_per_period(insight: pd.DataFrame, period_col: str, sort_col: str, top_n: int = None) -> pd.DataFrame:
+    # urutkan per periode lalu ambil top-N tiap periode sekaligus (tanpa loop per panel)
+    out = insight.sort_values([period_col, sort_col], ascending=[True, False], kind="stable")
+    if top_n is not None:
+        out = out.groupby(period_col, sort=False, dropna=False).head(top_n)
+    return out
+
+
+def split_by_period(insight: pd.DataFrame, period_col: str) -> dict:
+    return {p: g.drop(columns=period_col) for p, g in insight.groupby(period_col, sort=False, observed=True)}
+
+
+def period_insight(source, period_col: str, group_col: str, sort_col: str, top_n: int = None, where: dict = None, dropna: bool = False):
+    # satu agregasi [periode, group_col] -> (periode yang punya data, {periode: tabel top-N})
+    insight = source.insight([period_col, group_col], where)
+    periods = set(insight[period_col].dropna().tolist())
+    if dropna:
+        insight = insight.dropna(subset=[group_col, sort_col])
+    return periods, split_by_period(top_n_per_period(insight, period_col, sort_col, top_n), period_col)
+
+
+def stacked_counts(cells: pd.DataFrame, x_col: str, cluster_col: str, top_k: int = None) -> pd.DataFrame:
+    # jumlah transaksi per (nilai dimensi, cluster); top_k = hanya nilai dimensi terbanyak
+    if top_k is not None:
+        top_vals = cells.groupby(x_col)["transaksi_count"].sum().sort_values(ascending=False).head(top_k).index
+        cells = cells[cells[x_col].isin(top_vals)]
+    return cells.groupby([x_col, cluster_col])["transaksi_count"].sum().reset_index(name="count")
+
+
+def period_totals(period_insight: pd.DataFrame, period_col: str) -> dict:
+    # KPI (jumlah, total, rata-rata) per periode dari hasil insight(period_col)
+    return {
+        r[period_col]: (int(r["transaksi_count"]), float(r["total_spend_sum"]), float(r["total_spend_avg"]))
+        for r in period_insight.to_dict("records")
+    }
+
+
+class RowView:
+    # fallback berbasis baris kalau filter tidak bisa dijawab cube.
+    # rows = posisi baris hasil filter (None = semua baris); kolom baru diambil saat agregasi
+    def __init__(self, df: pd.DataFrame, rows=None):
+        self.df = df
+        self.rows = rows
+
+    def _rows(self, where: dict = None):
+        rows = self.rows
+        for col, val in (where or {}).items():
+            vals = self.df[col].to_numpy()
+            rows = np.flatnonzero(vals == val) if rows is None else rows[vals[rows] == val]
+        return rows
+
+    def _take(self, cols: list, where: dict = None) -> pd.DataFrame:
+        rows = self._rows(where)
+        return self.df[cols] if rows is None else self.df[cols].take(rows)
+
+    def totals(self, where: dict = None):
+        spend_s = self._take(["total_spend"], where)["total_spend"]
+        n = len(spend_s)
+        return n, float(spend_s.sum()), (float(spend_s.mean()) if n > 0 else 0.0)
+
+    def insight(self, group_col, where: dict = None) -> pd.DataFrame:
+        group_cols = [group_col] if isinstance(group_col, str) else list(group_col)
+        return insight_by(self._take(group_cols + ["total_spend"], where), group_col)
+
+
+class MemoView:
+    # membungkus CubeView/RowView: hasil agregat disimpan per (dataset, filter, query),
+    # sehingga agregat yang filternya tidak berubah dipakai ulang antar rerun
+    def __init__(self, memo, base_key: tuple, build_view, max_items: int = 64):
+        self.memo = memo
+        self.base_key = base_key
+        self._build_view = build_view
+        self._view = None
+        self.max_items = max_items
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = self._build_view()
+        return self._view
+
+    def _get(self, query: tuple, compute):
+        key = self.base_key + query
+        if key in self.memo:
+            self.memo.move_to_end(key)
+            return self.memo[key]
+        value = compute()
+        self.memo[key] = value
+        while len(self.memo) > self.max_items:
+            self.memo.popitem(last=False)
+        return value
+
+    def totals(self, where: dict = None):
+        where_key = tuple(sorted((where or {}).items()))
+        return self._get(("totals", where_key), lambda: self.view.totals(where))
+
+    def insight(self, group_col, where: dict = None) -> pd.DataFrame:
+        group_key = (group_col,) if isinstance(group_col, str) else tuple(group_col)
+        where_key = tuple(sorted((where or {}).items()))
+        return self._get(("insight", group_key, where_key), lambda: self.view.insight(group_col, where))
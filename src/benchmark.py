@@ -0,0 +1,296 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate import RowView, insight_by, period_insight, period_totals, stacked_counts
+from src.dataset_cache import Dataset, DatasetCache, load_path
+from src.engine import InsightEngine, cluster_cells
+from src.filter_index import FilterIndex
+from src.insight_awal import build_insights
+from src.preprocess import RAW_COLUMNS, prepare_raw
+from src.streaming import stream_csv_to_bundle
+
+# ukuran data benchmark (jumlah baris)
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+# baris per potongan saat generate CSV (memori generator tetap kecil untuk 10M baris)
+GEN_CHUNK_ROWS = 1_000_000
+OUT_DIR = Path("bench_results")
+
+# kolom output notebook prep (insight-ready) dan notebook cluster
+INSIGHT_COLUMNS = [
+    "gender", "age", "category", "quantity", "price", "payment_method", "shopping_mall",
+    "invoice_date_time", "invoice_date_day", "invoice_date_month", "invoice_date_year",
+    "total_spend", "age_class", "price_class",
+]
+CLUSTER_COLUMNS = [
+    "gender", "age", "category", "quantity", "price", "payment_method", "shopping_mall",
+    "invoice_date_time", "invoice_date_day", "invoice_date_month", "invoice_date_year",
+    "total_spent", "cluster",
+]
+DATE_PART_COLUMNS = ["invoice_date_day", "invoice_date_month", "invoice_date_year"]
+
+# nilai kategori dan harga satuan per kategori seperti di customer_shopping_data.csv
+CATEGORY_PRICE = {
+    "Clothing": 300.08, "Shoes": 600.17, "Books": 15.15, "Cosmetics": 40.66,
+    "Food & Beverage": 5.23, "Toys": 35.84, "Technology": 1050.0, "Souvenir": 11.73,
+}
+MALLS = [
+    "Kanyon", "Forum Istanbul", "Metrocity", "Metropol AVM", "Istinye Park",
+    "Mall of Istanbul", "Emaar Square Mall", "Cevahir AVM", "Viaport Outlet", "Zorlu Center",
+]
+PAYMENTS = ["Cash", "Credit Card", "Debit Card"]
+FIRST_DATE = pd.Timestamp("2021-01-01")
+N_DATES = 797
+
+# filter "biasa" dari halaman insight: dimensi cube + range harga (dijawab dari baris)
+FILTER_STATE = {"gender": ["Female"], "category": ["Clothing", "Shoes", "Technology"], "price": (20.0, 3000.0)}
+# filter yang hanya menyentuh dimensi cube (dijawab dari sel cube)
+CUBE_FILTER_STATE = {"gender": ["Female"], "category": ["Clothing", "Shoes", "Technology"]}
+
+
+# =========================
+# generator data sintetis
+# =========================
+def generate_raw(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    # baris [start, start + n) data transaksi mentah; hasil sama untuk (seed, start, n) yang sama
+    rng = np.random.default_rng([seed, start])
+    categories = np.array(list(CATEGORY_PRICE))
+    cat = rng.integers(0, len(categories), n)
+    quantity = rng.integers(1, 6, n)
+    dates = FIRST_DATE + pd.to_timedelta(np.arange(N_DATES), unit="D")
+    date_str = np.array([f"{d.day}/{d.month}/{d.year}" for d in dates])
+    ids = pd.Series(np.arange(start, start + n)).astype(str)
+    return pd.DataFrame({
+        "invoice_no": "I" + ids,
+        "customer_id": "C" + ids,
+        "gender": np.array(["Female", "Male"])[rng.integers(0, 2, n)],
+        "age": rng.integers(18, 70, n),
+        "category": categories[cat],
+        "quantity": quantity,
+        "price": (np.array(list(CATEGORY_PRICE.values()))[cat] * quantity).round(2),
+        "payment_method": np.array(PAYMENTS)[rng.integers(0, len(PAYMENTS), n)],
+        "invoice_date": date_str[rng.integers(0, N_DATES, n)],
+        "shopping_mall": np.array(MALLS)[rng.integers(0, len(MALLS), n)],
+    })[RAW_COLUMNS]
+
+
+def _prepared(raw: pd.DataFrame) -> pd.DataFrame:
+    # prepare_raw memberi field tanggal float (NaN untuk tanggal kosong); data sintetis selalu punya
+    # tanggal, jadi ditulis int seperti output notebook (CSV berisi 5, bukan 5.0)
+    out = prepare_raw(raw)
+    return out.astype({c: "int64" for c in DATE_PART_COLUMNS})
+
+
+def to_insight_ready(raw: pd.DataFrame) -> pd.DataFrame:
+    return _prepared(raw)[INSIGHT_COLUMNS]
+
+
+def to_cluster(raw: pd.DataFrame, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    out = _prepared(raw).rename(columns={"total_spend": "total_spent"})
+    out["cluster"] = np.random.default_rng([seed, start, 1]).integers(0, 5, len(out))
+    return out[CLUSTER_COLUMNS]
+
+
+def write_csv(path, n: int, kind: str = "insight", seed: int = 0, chunk_rows: int = GEN_CHUNK_ROWS) -> Path:
+    # kind: raw | insight | cluster; ditulis per potongan
+    path = Path(path)
+    for start in range(0, n, chunk_rows):
+        raw = generate_raw(min(chunk_rows, n - start), seed, start)
+        if kind == "insight":
+            frame = to_insight_ready(raw)
+        elif kind == "cluster":
+            frame = to_cluster(raw, seed, start)
+        else:
+            frame = raw
+        frame.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+# =========================
+# pengukuran
+# =========================
+def measure(fn, repeat: int = 3):
+    # (detik terbaik dari repeat kali, puncak memori teralokasi saat satu run terpisah)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def _ingest(csv: Path, work: Path):
+    def run():
+        out = work / "bundle"
+        shutil.rmtree(out, ignore_errors=True)
+        with open(csv, "rb") as f:
+            stream_csv_to_bundle(f, out)
+
+    return run
+
+
+def _panels_yearly(view, group_col="category"):
+    period_totals(view.insight("invoice_date_year"), "invoice_date_year")
+    period_insight(view, "invoice_date_year", group_col, "total_spend_sum", 10)
+
+
+def _panels_monthly(view, years, group_col="category"):
+    for year in years:
+        period_insight(view, "invoice_date_month", group_col, "total_spend_sum", 10, {"invoice_date_year": year})
+
+
+def _scan_insight(df: pd.DataFrame, filter_state: dict, group_col: str = "category"):
+    # baseline tanpa index/cube: mask between/isin di seluruh baris lalu groupby (cara halaman insight awal)
+    mask = np.ones(len(df), dtype=bool)
+    for col, sel in filter_state.items():
+        if isinstance(sel, tuple):
+            mask &= df[col].between(*sel).to_numpy()
+        else:
+            mask &= df[col].isin(sel).to_numpy()
+    return insight_by(df.loc[mask, [group_col, "total_spend"]], group_col)
+
+
+def cases_for(files: dict, work: Path) -> list:
+    # (nama kasus, fungsi, berat) untuk satu ukuran data; data dibaca dari bundle (mmap) seperti di aplikasi.
+    # cache dan folder bundle sendiri: hasil tidak dipengaruhi dataset lain di cache proses, dan tidak
+    # ada eviksi/prune milik aplikasi di tengah pengukuran
+    cache = DatasetCache()
+    ds = load_path(files["insight"], cache=cache, bundle_dir=work / "bundles")
+    df = ds.df
+    cluster_df = load_path(files["cluster"], cache=cache, bundle_dir=work / "bundles").df
+    engine = InsightEngine(ds)
+    years = sorted(df["invoice_date_year"].unique().tolist())
+    # index yang sudah dibangun (rerun berikutnya di aplikasi) + posisi baris hasil filter
+    warm_index = FilterIndex(df)
+    rows = warm_index.rows(FILTER_STATE)
+    meta = {"columns": []}
+
+    def stacked():
+        fresh = Dataset("bench", cluster_df, meta)
+        cells = cluster_cells(fresh, ["shopping_mall", "category", "cluster"], "total_spent")
+        stacked_counts(cells, "category", "cluster", top_k=10)
+
+    return [
+        ("ingest_insight_csv", _ingest(files["insight"], work), True),
+        ("ingest_raw_csv", _ingest(files["raw"], work), True),
+        ("scan_insight_rows", lambda: _scan_insight(df, FILTER_STATE), False),
+        ("apply_filters_cold", lambda: FilterIndex(df).rows(FILTER_STATE), False),
+        ("apply_filters_warm", lambda: warm_index.rows({**FILTER_STATE, "price": (25.0, 2500.0)}), False),
+        ("insight_by_rows", lambda: insight_by(df[["category", "total_spend"]].take(rows), "category"), False),
+        ("insight_engine", lambda: engine.insight(FILTER_STATE, "category", top_n=10), False),
+        ("insight_cube", lambda: engine.insight(CUBE_FILTER_STATE, "category", top_n=10), False),
+        ("panels_yearly_rows", lambda: _panels_yearly(RowView(df, rows)), False),
+        ("panels_yearly_cube", lambda: _panels_yearly(engine.view(CUBE_FILTER_STATE, ["invoice_date_year", "category"])), False),
+        ("panels_monthly_rows", lambda: _panels_monthly(RowView(df, rows), years), False),
+        (
+            "panels_monthly_cube",
+            lambda: _panels_monthly(engine.view(CUBE_FILTER_STATE, ["invoice_date_year", "invoice_date_month", "category"]), years),
+            False,
+        ),
+        ("stacked_counts", stacked, False),
+        ("build_insights", lambda: build_insights(df), False),
+    ]
+
+
+def run_size(label: str, n: int, work: Path, repeat: int = 3, only=None, seed: int = 0) -> list:
+    work.mkdir(parents=True, exist_ok=True)
+    files = {kind: write_csv(work / f"{kind}.csv", n, kind, seed) for kind in ["raw", "insight", "cluster"]}
+    results = []
+    for name, fn, heavy in cases_for(files, work):
+        if only and name not in only:
+            continue
+        seconds, peak = measure(fn, 1 if heavy else repeat)
+        results.append({
+            "case": name,
+            "size": label,
+            "rows": n,
+            "seconds": seconds,
+            "rows_per_sec": n / seconds if seconds > 0 else None,
+            "peak_bytes": int(peak),
+            "repeat": 1 if heavy else repeat,
+        })
+        r = results[-1]
+        print(f"{label:>5} {name:<22} {seconds * 1000:>10.1f} ms {r['rows_per_sec'] or 0:>14,.0f} baris/s {peak / 2**20:>9.1f} MiB", flush=True)
+    return results
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": os.environ.get("MALL_INSIGHT_WORKERS", "1"),
+    }
+
+
+def compare(old_path, new_path) -> pd.DataFrame:
+    # rasio waktu baru / lama per (kasus, ukuran); < 1 berarti lebih cepat
+    def load(p):
+        return pd.DataFrame(json.loads(Path(p).read_text(encoding="utf-8"))["results"]).set_index(["case", "size"])
+
+    old, new = load(old_path), load(new_path)
+    out = pd.DataFrame({"old_s": old["seconds"], "new_s": new["seconds"]}).dropna()
+    out["ratio"] = out["new_s"] / out["old_s"]
+    out["old_peak_mib"] = old["peak_bytes"] / 2**20
+    out["new_peak_mib"] = new["peak_bytes"] / 2**20
+    return out.reset_index()
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description="Benchmark pipeline insight/cluster dengan data sintetis.")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES), help="ukuran data")
+    parser.add_argument("--repeat", type=int, default=3, help="jumlah ulangan per kasus (waktu terbaik dipakai)")
+    parser.add_argument("--cases", nargs="+", help="hanya jalankan kasus ini")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help=f"file hasil JSON (default: {OUT_DIR}/benchmark-<waktu>.json)")
+    parser.add_argument("--workdir", help="folder data sementara (default: folder temp, dihapus setelah selesai)")
+    parser.add_argument("--compare", nargs=2, metavar=("LAMA", "BARU"), help="bandingkan dua file hasil lalu keluar")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare(*args.compare).to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+        return
+
+    tmp = None if args.workdir else tempfile.TemporaryDirectory(prefix="mall-bench-")
+    work = Path(args.workdir or tmp.name)
+    try:
+        results = []
+        for label in args.sizes:
+            results += run_size(label, SIZES[label], work / label, args.repeat, args.cases, args.seed)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    out = Path(args.out) if args.out else OUT_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"environment": environment(), "results": results}, indent=1), encoding="utf-8")
+    print(f"Hasil tersimpan di: {out}")
+
+
+#   python -m src.benchmark --sizes 100k 1m
+#   python -m src.benchmark --compare bench_results/lama.json bench_results/baru.json
+if __name__ == "__main__":
+    sys.exit(main())
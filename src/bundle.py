@@ -0,0 +1,246 @@
+import json
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.schema import coerce_schema, read_dtypes
+
+# versi 2: string bebas disimpan sebagai buffer arrow (offset + byte utf-8), bukan fixed-width <U
+BUNDLE_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+META_FILE = "meta.json"
+# statistik dataset (insight_awal.StatsAccumulator) yang dihitung saat ingest, opsional
+STATS_FILE = "stats.json"
+# tipe kolom string saat dibuka (sama dengan default pandas untuk teks)
+STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+# baris per blok saat memadatkan bitmap validitas string
+VALID_BLOCK_ROWS = 1 << 23
+
+
+# =========================
+# WRITE
+# =========================
+def _column_meta(name: str, s: pd.Series, file_name: str) -> dict:
+    meta = {"name": name, "file": file_name, "dtype": str(s.dtype), "n_null": int(s.isna().sum())}
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        meta["kind"] = "category"
+        meta["categories"] = [str(c) for c in s.cat.categories]
+    elif pd.api.types.is_datetime64_any_dtype(s.dtype):
+        meta["kind"] = "datetime"
+        meta["min"] = None if s.isna().all() else s.min().isoformat()
+        meta["max"] = None if s.isna().all() else s.max().isoformat()
+    elif pd.api.types.is_numeric_dtype(s.dtype):
+        meta["kind"] = "numeric"
+        meta["min"] = None if s.isna().all() else s.min().item()
+        meta["max"] = None if s.isna().all() else s.max().item()
+    else:
+        meta["kind"] = "string"
+        meta["dtype"] = "str"
+    return meta
+
+
+def _column_array(s: pd.Series) -> np.ndarray:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return np.asarray(s.cat.codes)
+    return s.to_numpy()
+
+
+def _is_string(s: pd.Series) -> bool:
+    return not (
+        isinstance(s.dtype, pd.CategoricalDtype)
+        or pd.api.types.is_datetime64_any_dtype(s.dtype)
+        or pd.api.types.is_numeric_dtype(s.dtype)
+    )
+
+
+class StringColumnWriter:
+    # string bebas ditulis per potongan dalam format arrow large_string: offset int64 (n+1) ke
+    # buffer byte utf-8, plus bitmap validitas kalau ada nilai kosong. saat dibuka ketiganya di-mmap
+    # tanpa salinan; teks baru didekode saat barisnya dibaca
+    def __init__(self, folder: Path, file_name: str, n_rows: int):
+        stem = file_name[: -len(".npy")]
+        self.folder = Path(folder)
+        self.file = file_name
+        self.data_file = f"{stem}.data.npy"
+        self.valid_file = f"{stem}.valid.npy"
+        self.n_rows = n_rows
+        self.offsets = np.lib.format.open_memmap(self.folder / file_name, mode="w+", dtype=np.int64, shape=(n_rows + 1,))
+        self.offsets[0] = 0
+        # ukuran buffer byte baru diketahui di akhir: ditulis mentah dulu, header .npy menyusul
+        self._data_tmp = self.folder / f"{stem}.data.tmp"
+        self._data = open(self._data_tmp, "wb")
+        self._valid_tmp = self.folder / f"{stem}.valid.tmp.npy"
+        self._valid = np.lib.format.open_memmap(self._valid_tmp, mode="w+", dtype=bool, shape=(n_rows,))
+        self.start = 0
+        self.size = 0
+        self.n_null = 0
+
+    def write(self, s: pd.Series):
+        arr = pa.array(s.astype(STRING_DTYPE), type=pa.large_string(), from_pandas=True)
+        n = len(arr)
+        _, offsets, data = arr.buffers()
+        off = np.frombuffer(offsets, dtype=np.int64)[arr.offset : arr.offset + n + 1]
+        stop = self.start + n
+        self.offsets[self.start + 1 : stop + 1] = off[1:] - off[0] + self.size
+        if data is not None and off[-1] > off[0]:
+            self._data.write(memoryview(data)[off[0] : off[-1]])
+        valid = arr.is_valid().to_numpy(zero_copy_only=False)
+        self._valid[self.start : stop] = valid
+        self.n_null += int(n - valid.sum())
+        self.size += int(off[-1] - off[0])
+        self.start = stop
+
+    def close(self) -> dict:
+        self.offsets.flush()
+        del self.offsets
+        self._data.close()
+        with open(self.folder / self.data_file, "wb") as f, open(self._data_tmp, "rb") as raw:
+            np.lib.format.write_array_header_1_0(f, {"descr": "|u1", "fortran_order": False, "shape": (self.size,)})
+            shutil.copyfileobj(raw, f)
+        self._data_tmp.unlink()
+        out = {"data": self.data_file, "data_bytes": self.size, "valid": None}
+        if self.n_null:
+            # bitmap urutan bit arrow (LSB dulu), dipadatkan per blok kelipatan 8 baris
+            bits = np.lib.format.open_memmap(self.folder / self.valid_file, mode="w+", dtype=np.uint8, shape=((self.n_rows + 7) // 8,))
+            for a in range(0, self.n_rows, VALID_BLOCK_ROWS):
+                b = min(a + VALID_BLOCK_ROWS, self.n_rows)
+                bits[a // 8 : (b + 7) // 8] = np.packbits(self._valid[a:b], bitorder="little")
+            bits.flush()
+            del bits
+            out["valid"] = self.valid_file
+        del self._valid
+        self._valid_tmp.unlink()
+        return out
+
+
+def write_bundle(df: pd.DataFrame, path) -> Path:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        file_name = f"c{i:03d}.npy"
+        meta = _column_meta(col, df[col], file_name)
+        if _is_string(df[col]):
+            writer = StringColumnWriter(tmp, file_name, len(df))
+            writer.write(df[col])
+            meta.update(writer.close())
+        else:
+            np.save(tmp / file_name, _column_array(df[col]), allow_pickle=False)
+        columns.append(meta)
+
+    meta = {"version": BUNDLE_VERSION, "n_rows": int(len(df)), "columns": columns}
+    (tmp / META_FILE).write_text(json.dumps(meta, indent=1), encoding="utf-8")
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+    return path
+
+
+def csv_to_bundle(csv_path, path) -> Path:
+    df = coerce_schema(pd.read_csv(csv_path, dtype=read_dtypes()))
+    return write_bundle(df, path)
+
+
+# =========================
+# READ
+# =========================
+def is_bundle(path) -> bool:
+    return (Path(path) / META_FILE).exists()
+
+
+def read_meta(path) -> dict:
+    return json.loads((Path(path) / META_FILE).read_text(encoding="utf-8"))
+
+
+def _open_strings(path: Path, c: dict, offsets: np.ndarray) -> pd.Series:
+    # buffer arrow langsung di atas file mmap: tidak ada objek Python per baris saat dibuka
+    data = np.load(path / c["data"], mmap_mode="r", allow_pickle=False) if c["data_bytes"] else np.zeros(0, dtype=np.uint8)
+    valid = None
+    if c.get("valid"):
+        valid = pa.py_buffer(np.load(path / c["valid"], mmap_mode="r", allow_pickle=False))
+    arr = pa.LargeStringArray.from_buffers(
+        len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data), valid, c["n_null"] if valid is not None else 0
+    )
+    return pd.Series(pd.arrays.ArrowStringArray(pa.chunked_array([arr], type=pa.large_string()), dtype=STRING_DTYPE), copy=False)
+
+
+def open_bundle(path):
+    path = Path(path)
+    meta = read_meta(path)
+    if meta.get("version") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Versi bundle tidak didukung: {meta.get('version')}")
+
+    cols = {}
+    for c in meta["columns"]:
+        # mmap: hanya halaman yang benar-benar dibaca yang masuk ke RAM
+        arr = np.load(path / c["file"], mmap_mode="r", allow_pickle=False)
+        if c["kind"] == "category":
+            cats = pd.Index(c["categories"])
+            cols[c["name"]] = pd.Categorical.from_codes(arr, categories=cats, validate=False)
+        elif c["kind"] == "string" and "data" in c:
+            cols[c["name"]] = _open_strings(path, c, arr)
+        elif c["kind"] == "string":
+            # bundle versi 1: string fixed-width (<U), didekode sekaligus
+            cols[c["name"]] = pd.Series(arr.astype(object), copy=False)
+        else:
+            cols[c["name"]] = pd.Series(arr, copy=False)
+
+    df = pd.DataFrame(cols, copy=False)
+    return df, meta
+
+
+def extract_bundle_zip(data, path) -> Path:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    with zipfile.ZipFile(data) as zf:
+        for info in zf.infolist():
+            name = Path(info.filename).name
+            # bundle berisi file datar saja; folder/path lain diabaikan
+            if info.is_dir() or not (name in (META_FILE, STATS_FILE) or name.endswith(".npy")):
+                continue
+            with zf.open(info) as src, open(tmp / name, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+    if not is_bundle(tmp):
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise ValueError(f"{META_FILE} tidak ditemukan di dalam zip bundle.")
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+    return path
+
+
+def zip_bundle(path, zip_path) -> Path:
+    path, zip_path = Path(path), Path(zip_path)
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for f in sorted(path.iterdir()):
+            zf.write(f, arcname=f.name)
+    return zip_path
+
+
+# konversi hasil notebook (CSV) ke bundle:
+#   python -m src.bundle customer_shopping_data_insight_ready.csv insight_ready.zip
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Pemakaian: python -m src.bundle <input.csv> <output_dir|output.zip>")
+        sys.exit(1)
+
+    src_csv, out = Path(sys.argv[1]), Path(sys.argv[2])
+    if out.suffix == ".zip":
+        bundle_dir = csv_to_bundle(src_csv, out.with_suffix(""))
+        zip_bundle(bundle_dir, out)
+        shutil.rmtree(bundle_dir)
+    else:
+        csv_to_bundle(src_csv, out)
+    print(f"Bundle tersimpan di: {out}")
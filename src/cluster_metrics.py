@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from src.fcm import BLOCK_ROWS, _dist2, _memberships, feature_matrix, scale, standardize
+
+# jumlah titik sampel untuk estimasi silhouette (selang kepercayaan dari sampel ini)
+SILHOUETTE_SAMPLE = 2000
+# di bawah jumlah baris ini silhouette dihitung persis untuk semua titik
+SILHOUETTE_EXACT_MAX = 5000
+# ukuran blok (titik x data) saat menghitung jarak untuk silhouette: memori sementara 512 x 8192
+SILHOUETTE_ROWS = 512
+SILHOUETTE_BLOCK = 8192
+
+
+def _blocks(n: int, block_rows: int):
+    for a in range(0, n, block_rows):
+        yield a, min(a + block_rows, n)
+
+
+def fpc_xie_beni(x: np.ndarray, centers: np.ndarray, m: float = 2.0, u=None, block_rows: int = BLOCK_ROWS):
+    # (FPC, Xie-Beni) dalam satu pass per blok baris; memori = blok x c, bukan n x c x d.
+    # u opsional (membership hasil fit); kalau None dihitung ulang dari centers
+    n, c = len(x), len(centers)
+    d2 = np.empty((min(block_rows, n), c), dtype=x.dtype)
+    ub = np.empty_like(d2)
+    sq, num = 0.0, 0.0
+    for a, b in _blocks(n, block_rows):
+        xb = x[a:b]
+        _dist2(xb, centers, (xb * xb).sum(axis=1), d2[: b - a])
+        rows = u[a:b] if u is not None else _memberships(d2[: b - a], m, ub[: b - a])
+        sq += float(np.square(rows, dtype=np.float64).sum())
+        num += float((np.power(rows, m, dtype=np.float64) * d2[: b - a]).sum())
+    center_d2 = ((centers[:, None, :].astype(np.float64) - centers[None, :, :]) ** 2).sum(axis=2)
+    np.fill_diagonal(center_d2, np.inf)
+    return sq / n, num / (n * float(center_d2.min()))
+
+
+def _cluster_distance_sums(points: np.ndarray, x: np.ndarray, labels: np.ndarray, c: int, block: int) -> np.ndarray:
+    # jumlah jarak euclid tiap titik ke semua anggota tiap cluster, dihitung per blok kolom
+    out = np.zeros((len(points), c))
+    p2 = (points.astype(np.float64) ** 2).sum(axis=1)
+    for a, b in _blocks(len(x), block):
+        xb = x[a:b].astype(np.float64)
+        d2 = p2[:, None] + (xb * xb).sum(axis=1)[None, :] - 2 * points.astype(np.float64) @ xb.T
+        # jumlah per cluster lewat perkalian dengan one-hot label blok ini
+        out += np.sqrt(np.maximum(d2, 0.0)) @ np.eye(c)[labels[a:b]]
+    return out
+
+
+def silhouette_values(idx: np.ndarray, x: np.ndarray, labels: np.ndarray, block: int = SILHOUETTE_BLOCK) -> np.ndarray:
+    # silhouette titik idx terhadap seluruh data (definisi sama dengan sklearn):
+    # a = rata-rata jarak ke cluster sendiri (tanpa diri sendiri), b = rata-rata terkecil ke cluster lain
+    c = int(labels.max()) + 1
+    sizes = np.bincount(labels, minlength=c).astype(np.float64)
+    sums = np.vstack([
+        _cluster_distance_sums(x[idx[a:b]], x, labels, c, block) for a, b in _blocks(len(idx), SILHOUETTE_ROWS)
+    ])
+    own = labels[idx]
+    rows = np.arange(len(idx))
+    own_size = sizes[own]
+    a = np.where(own_size > 1, sums[rows, own] / np.maximum(own_size - 1, 1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_other = sums / sizes[None, :]
+    mean_other[rows, own] = np.inf
+    mean_other[:, sizes == 0] = np.inf
+    b = mean_other.min(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        s = (b - a) / np.maximum(a, b)
+    # cluster berisi satu titik: silhouette 0 (sama seperti sklearn)
+    return np.where((own_size > 1) & np.isfinite(s), s, 0.0)
+
+
+def silhouette(x: np.ndarray, labels: np.ndarray, sample_size: int = SILHOUETTE_SAMPLE, seed: int = 42, exact_max: int = SILHOUETTE_EXACT_MAX):
+    # (estimasi, batas bawah, batas atas, jumlah titik) silhouette rata-rata.
+    # data kecil: dihitung persis. data besar: sampel titik acak, tiap titik dihitung persis terhadap
+    # seluruh data (O(sampel x n), memori per blok), selang kepercayaan 95% dari sebaran nilainya
+    n = len(x)
+    if len(np.unique(labels)) < 2:
+        return np.nan, np.nan, np.nan, 0
+    if n <= exact_max:
+        s = silhouette_values(np.arange(n), x, labels)
+        return float(s.mean()), float(s.mean()), float(s.mean()), n
+    idx = np.random.default_rng(seed).choice(n, size=min(sample_size, n), replace=False)
+    s = silhouette_values(idx, x, labels)
+    mean = float(s.mean())
+    half = 1.96 * float(s.std(ddof=1)) / float(np.sqrt(len(s)))
+    return mean, mean - half, mean + half, len(s)
+
+
+def cluster_centers(x: np.ndarray, labels: np.ndarray, c: int = None) -> np.ndarray:
+    # pusat cluster dari label keras (rata-rata anggota), untuk clustering yang diupload tanpa centroid
+    c = int(labels.max()) + 1 if c is None else c
+    sums = np.zeros((c, x.shape[1]))
+    np.add.at(sums, labels, x.astype(np.float64))
+    counts = np.bincount(labels, minlength=c)
+    return (sums / np.maximum(counts, 1)[:, None]).astype(x.dtype)
+
+
+def validity_report(x: np.ndarray, labels: np.ndarray, centers=None, m: float = 2.0, u=None) -> dict:
+    centers = cluster_centers(x, labels) if centers is None else centers
+    fpc, xb = fpc_xie_beni(x, centers, m, u=u)
+    sil, lo, hi, n_sil = silhouette(x, labels)
+    return {"fpc": fpc, "xie_beni": xb, "silhouette": sil, "silhouette_ci": (lo, hi), "silhouette_n": n_sil}
+
+
+def dataset_validity(df: pd.DataFrame, feature_cols: list, cluster_col: str, centers=None, u=None, m: float = 2.0, mean=None, std=None) -> dict:
+    # metrik untuk clustering di df: fitur distandarisasi seperti saat fit, baris tanpa label diabaikan.
+    # mean/std: scaler model (pusat ada di ruang data latihnya); None = statistik df sendiri
+    if mean is None or std is None:
+        x, _, _ = standardize(df, feature_cols)
+    else:
+        x = scale(feature_matrix(df, feature_cols), np.asarray(mean), np.asarray(std))
+    codes, _ = pd.factorize(df[cluster_col].astype(str) if centers is None else df[cluster_col])
+    keep = codes >= 0
+    if not keep.all():
+        x, codes = x[keep], codes[keep]
+        u = None if u is None else u[keep]
+    return validity_report(x, codes.astype(np.int64), centers, m, u)
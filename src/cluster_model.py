@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.dataset_cache import content_hash, load_path
+from src.fcm import BLOCK_ROWS, FCM_FEATURES, feature_columns, feature_matrix, labels_from, run_fcm, scale
+from src.streaming import CHUNK_ROWS
+
+MODEL_VERSION = 1
+# model default yang dipakai halaman cluster kalau tidak ada model yang diupload
+MODEL_PATH = Path(os.environ.get("MALL_INSIGHT_MODEL", "data/models/fcm_model.json"))
+
+
+class ClusterModel:
+    # artefak hasil FCM: scaler (mean/std), pusat cluster (ruang terstandarisasi) dan fuzzifier m.
+    # data baru dilabeli per blok terhadap pusat tetap, tanpa fit ulang scaler/cmeans
+    def __init__(self, mean, std, centers, m: float = 2.0, features: list = None):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.centers = np.asarray(centers, dtype=np.float32)
+        self.m = float(m)
+        self.features = list(features or FCM_FEATURES)
+        if self.centers.ndim != 2 or self.centers.shape[1] != len(self.features) or len(self.mean) != len(self.features):
+            raise ValueError("Ukuran mean/std/pusat cluster tidak cocok dengan jumlah fitur.")
+
+    @classmethod
+    def from_result(cls, result) -> "ClusterModel":
+        return cls(result.mean, result.std, result.centers, result.m)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centers)
+
+    @property
+    def key(self) -> str:
+        # id isi model, dipakai sebagai kunci cache label
+        return content_hash(self.to_json())[:16]
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MODEL_VERSION,
+            "features": self.features,
+            "m": self.m,
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "centers": self.centers.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClusterModel":
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Versi model tidak didukung: {data.get('version')}")
+        return cls(data["mean"], data["std"], data["centers"], data.get("m", 2.0), data.get("features"))
+
+    def to_json(self) -> bytes:
+        return json.dumps(self.to_dict(), indent=1).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, data) -> "ClusterModel":
+        try:
+            return cls.from_dict(json.loads(data))
+        except (KeyError, TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"File model tidak valid: {e}") from e
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(self.to_json())
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "ClusterModel":
+        return cls.from_json(Path(path).read_bytes())
+
+    def columns(self, columns) -> list:
+        if self.features != FCM_FEATURES:
+            raise ValueError(f"Fitur model {self.features} berbeda dengan fitur aplikasi {FCM_FEATURES}.")
+        cols = feature_columns(columns)
+        if cols is None:
+            raise ValueError(f"Kolom fitur model tidak lengkap: {self.features}")
+        return cols
+
+    def score(self, df: pd.DataFrame, block_rows: int = BLOCK_ROWS, progress=None):
+        # (label cluster, membership tertinggi) per baris; satu pass linear atas data,
+        # memori sementara hanya satu blok fitur
+        cols = self.columns(df.columns)
+        n = len(df)
+        labels = np.empty(n, dtype=np.int16)
+        top = np.empty(n, dtype=np.float32)
+        for a in range(0, n, block_rows):
+            b = min(a + block_rows, n)
+            x = scale(feature_matrix(df.iloc[a:b], cols), self.mean, self.std)
+            labels[a:b], top[a:b] = labels_from(x, self.centers, self.m, block_rows)
+            if progress is not None:
+                progress(b / n, f"Memberi label cluster {b:,} / {n:,} baris")
+        return labels, top
+
+
+def fit_model(df: pd.DataFrame, c: int, mode: str = "full", m: float = 2.0, seed: int = 42):
+    # (model, hasil FCM) dari data yang punya fitur clustering
+    result = run_fcm(df, c, mode=mode, m=m, seed=seed)
+    return ClusterModel.from_result(result), result
+
+
+def score_csv(model: ClusterModel, data, out, chunk_rows: int = CHUNK_ROWS) -> int:
+    # label CSV transaksi per potongan dan tulis langsung ke out (kolom cluster + membership);
+    # memori terbatas pada satu potongan, jadi ukuran file tidak dibatasi RAM
+    n = 0
+    for i, chunk in enumerate(pd.read_csv(data, chunksize=chunk_rows)):
+        labels, top = model.score(chunk)
+        chunk["cluster"] = labels
+        chunk["membership"] = top
+        chunk.to_csv(out, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        n += len(chunk)
+    return n
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.cluster_model", description="Simpan model FCM dan labeli data baru.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    fit = sub.add_parser("fit", help="jalankan FCM lalu simpan model (.json)")
+    fit.add_argument("data", help="CSV, bundle .zip, atau folder bundle")
+    fit.add_argument("model", nargs="?", default=str(MODEL_PATH), help=f"file model (default: {MODEL_PATH})")
+    fit.add_argument("--c", type=int, default=5, help="jumlah cluster")
+    fit.add_argument("--mode", choices=["full", "minibatch"], default="full")
+    fit.add_argument("--m", type=float, default=2.0, help="fuzzifier")
+    score = sub.add_parser("score", help="labeli CSV transaksi dengan model tersimpan")
+    score.add_argument("data", help="CSV transaksi (mentah atau insight-ready)")
+    score.add_argument("out", help="CSV output (kolom cluster dan membership ditambahkan)")
+    score.add_argument("--model", default=str(MODEL_PATH), help=f"file model (default: {MODEL_PATH})")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "fit":
+        model, result = fit_model(load_path(args.data).df, args.c, args.mode, args.m)
+        print(f"FPC: {result.fpc:.4f} · iterasi: {result.n_iter}")
+        print(f"Model tersimpan di: {model.save(args.model)}")
+    else:
+        n = score_csv(ClusterModel.load(args.model), args.data, args.out)
+        print(f"{n:,} baris dilabeli: {args.out}")
+
+
+#   python -m src.cluster_model fit customer_shopping_data_insight_ready.csv --c 5
+#   python -m src.cluster_model score customer_shopping_data.csv labeled.csv
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# kuantil yang disimpan per cluster (untuk ukuran di QUANTILE_MEASURES)
+PROFILE_QUANTILES = (0.25, 0.5, 0.75)
+QUANTILE_MEASURES = ("total_spend", "membership")
+
+
+def _as_float(values) -> np.ndarray:
+    return pd.to_numeric(pd.Series(np.asarray(values).ravel()), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _group_quantiles(codes: np.ndarray, values: np.ndarray, n_groups: int, qs) -> np.ndarray:
+    # kuantil per grup dari satu kali lexsort (kode, nilai); NaN diabaikan
+    ok = ~np.isnan(values)
+    codes, values = codes[ok], values[ok]
+    order = np.lexsort((values, codes))
+    sorted_vals = values[order]
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    out = np.full((n_groups, len(qs)), np.nan)
+    for g in range(n_groups):
+        a, b = bounds[g], bounds[g + 1]
+        if b > a:
+            out[g] = np.quantile(sorted_vals[a:b], qs)
+    return out
+
+
+def cluster_profile(cluster: pd.Series, measures: dict, membership=None, quantiles=PROFILE_QUANTILES) -> pd.DataFrame:
+    # satu baris per cluster (label string, terurut): count, <ukuran>_sum/_n/_mean, kuantil.
+    # membership: vektor membership terbesar per baris, atau matriks n x c (diambil maksimumnya).
+    # dihitung sekali per dataset; pilihan cluster cukup menjumlahkan baris tabel ini
+    cat = cluster.astype(str).astype("category")
+    codes = np.asarray(cat.cat.codes).astype(np.int64)
+    # baris tanpa cluster (kode -1) tidak masuk profil, sama seperti groupby per cluster
+    keep = codes >= 0
+    codes = codes[keep]
+    labels = [str(c) for c in cat.cat.categories]
+    n_groups = len(labels)
+    out = {cluster.name: labels, "transaksi_count": np.bincount(codes, minlength=n_groups)}
+
+    measures = {k: v for k, v in measures.items() if v is not None}
+    if membership is not None:
+        m = np.asarray(membership)
+        measures["membership"] = m.max(axis=1) if m.ndim == 2 else m
+
+    for name, values in measures.items():
+        vals = _as_float(values)[keep]
+        ok = ~np.isnan(vals)
+        total = np.bincount(codes[ok], weights=vals[ok], minlength=n_groups)
+        n = np.bincount(codes[ok], minlength=n_groups)
+        out[f"{name}_sum"] = total
+        out[f"{name}_n"] = n
+        out[f"{name}_mean"] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+        if name in QUANTILE_MEASURES:
+            qv = _group_quantiles(codes, vals, n_groups, quantiles)
+            for i, q in enumerate(quantiles):
+                out[f"{name}_p{int(round(q * 100))}"] = qv[:, i]
+    return pd.DataFrame(out)
+
+
+def profile_totals(profile: pd.DataFrame, clusters) -> dict:
+    # gabungan beberapa cluster dari baris profil: jumlah dan rata-rata tertimbang
+    rows = profile[profile.iloc[:, 0].isin([str(c) for c in clusters])]
+    totals = {"transaksi_count": int(rows["transaksi_count"].sum())}
+    for col in profile.columns:
+        if col.endswith("_sum"):
+            name = col[: -len("_sum")]
+            total, n = float(rows[col].sum()), int(rows[f"{name}_n"].sum())
+            totals[col] = total
+            totals[f"{name}_n"] = n
+            totals[f"{name}_mean"] = total / n if n else np.nan
+    return totals
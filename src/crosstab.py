@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate import stacked_counts
+from src.schema import is_categorical
+
+# baris per blok saat menghitung kode gabungan (memori sementara = blok x int64)
+CROSSTAB_BLOCK_ROWS = 1_000_000
+
+
+def _codes(s: pd.Series):
+    # (kode int per baris, label string per kode); nilai kosong diberi kode len(label), slot terakhir
+    # tanpa label yang dibuang setelah dihitung. sama seperti jalur cluster_cells + groupby: baris dengan
+    # mall, nilai dimensi atau cluster kosong tidak ikut dihitung
+    if is_categorical(s):
+        codes = np.asarray(s.cat.codes).astype(np.int64)
+        labels = [str(c) for c in s.cat.categories]
+    else:
+        codes, uniques = pd.factorize(s)
+        labels = [str(v) for v in uniques]
+    return np.where(codes < 0, len(labels), codes), labels
+
+
+class ClusterCrosstab:
+    # jumlah transaksi per (mall, nilai dimensi, cluster) untuk semua dimensi sekaligus,
+    # dihitung dari kode kategori (bincount), tanpa salin frame atau cast ke string.
+    # ganti dimensi / top K / fokus mall cukup memotong array kecil ini
+    def __init__(self, df: pd.DataFrame, cluster: pd.Series, dims: list, mall_col: str = None, block_rows: int = CROSSTAB_BLOCK_ROWS, max_items: int = 64):
+        self.cluster_col = cluster.name
+        cl_codes, self.clusters = _codes(cluster)
+        # +1: slot nilai kosong; tanpa kolom mall semua baris ada di satu slot mall
+        if mall_col:
+            mall_codes, self.malls = _codes(df[mall_col])
+            n_mall, malls = len(self.malls) + 1, slice(None, -1)
+        else:
+            mall_codes, self.malls = np.zeros(len(df), dtype=np.int64), []
+            n_mall, malls = 1, slice(None)
+        n_cl = len(self.clusters) + 1
+        self.tables = {}
+        for dim in dict.fromkeys(dims):
+            codes, labels = _codes(df[dim])
+            n_val = len(labels) + 1
+            size = n_mall * n_val * n_cl
+            counts = np.zeros(size, dtype=np.int64)
+            for a in range(0, len(df), block_rows):
+                b = a + block_rows
+                flat = (mall_codes[a:b] * n_val + codes[a:b]) * n_cl + cl_codes[a:b]
+                counts += np.bincount(flat, minlength=size)
+            counts = np.ascontiguousarray(counts.reshape(n_mall, n_val, n_cl)[malls, :-1, :-1])
+            self.tables[dim] = (np.array(labels, dtype=object), counts)
+        # memo dipakai bersama semua sesi (objek ini tersimpan di dataset cache)
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.max_items = max_items
+
+    def _selected(self, clusters) -> np.ndarray:
+        wanted = {str(c) for c in clusters}
+        return np.array([i for i, c in enumerate(self.clusters) if c in wanted], dtype=np.int64)
+
+    def _slice(self, dim: str, clusters, focus_mall=None) -> np.ndarray:
+        # (nilai dimensi x cluster terpilih) untuk satu mall atau semua mall
+        _, counts = self.tables[dim]
+        if focus_mall is None:
+            table = counts.sum(axis=0)
+        elif str(focus_mall) in self.malls:
+            table = counts[self.malls.index(str(focus_mall))]
+        else:
+            table = np.zeros(counts.shape[1:], dtype=np.int64)
+        return table[:, self._selected(clusters)]
+
+    def values(self, dim: str, clusters) -> list:
+        # nilai dimensi yang punya transaksi di cluster terpilih (terurut)
+        labels, _ = self.tables[dim]
+        return sorted(labels[self._slice(dim, clusters).sum(axis=1) > 0].tolist())
+
+    def cells(self, dim: str, clusters, focus_mall=None) -> pd.DataFrame:
+        # format sama dengan cluster_cells: satu baris per kombinasi (nilai, cluster) yang ada
+        labels, _ = self.tables[dim]
+        table = self._slice(dim, clusters, focus_mall)
+        cl_labels = np.array(self.clusters, dtype=object)[self._selected(clusters)]
+        v, c = np.nonzero(table)
+        return pd.DataFrame({dim: labels[v], self.cluster_col: cl_labels[c], "transaksi_count": table[v, c]})
+
+    def stacked(self, dim: str, clusters, focus_mall=None, top_k: int = None) -> pd.DataFrame:
+        # hasil stacked_counts; disimpan per (dimensi, cluster terpilih, mall, top K)
+        key = (dim, tuple(sorted(str(c) for c in clusters)), focus_mall, top_k)
+        with self._memo_lock:
+            out = self._memo.get(key)
+            if out is not None:
+                self._memo.move_to_end(key)
+                return out
+        out = stacked_counts(self.cells(dim, clusters, focus_mall), dim, self.cluster_col, top_k)
+        with self._memo_lock:
+            self._memo[key] = out
+            while len(self._memo) > self.max_items:
+                self._memo.popitem(last=False)
+        return out
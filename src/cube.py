@@ -0,0 +1,104 @@
+import pandas as pd
+
+from src.aggregate import cells_insight
+from src.filter_index import FilterIndex
+from src.parallel import parallel_group_cells
+
+CUBE_DIMS = [
+    "invoice_date_year",
+    "invoice_date_month",
+    "gender",
+    "category",
+    "payment_method",
+    "shopping_mall",
+    "age_class",
+    "price_class",
+]
+MEASURE_COL = "total_spend"
+
+
+def cube_dims(columns) -> list:
+    return [c for c in CUBE_DIMS if c in columns]
+
+
+class Cube:
+    # cube agregat: satu baris per kombinasi dimensi, measure aditif (count, sum)
+    def __init__(self, cells: pd.DataFrame, meta: dict):
+        self.dims = cube_dims(cells.columns)
+        self.cells = cells
+        # index filter atas sel cube (bitmap per nilai dimensi)
+        self.index = FilterIndex(self.cells)
+        # ringkasan kolom non-dimensi (dari metadata dataset), untuk tahu kapan filternya tidak berpengaruh
+        self._others = {}
+        for c in meta.get("columns", []):
+            if c["name"] in self.dims:
+                continue
+            has_null = c.get("n_null", 0) > 0
+            if c["kind"] == "numeric" and c.get("min") is not None:
+                self._others[c["name"]] = ("range", float(c["min"]), float(c["max"]), has_null)
+            elif c["kind"] == "category":
+                self._others[c["name"]] = ("set", set(c["categories"]), None, has_null)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, meta: dict, measure_col: str = MEASURE_COL) -> "Cube":
+        if measure_col not in df.columns:
+            measure_col = None
+        return cls(parallel_group_cells(df, cube_dims(df.columns), measure_col), meta)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.cells.memory_usage(index=True, deep=True).sum()) + self.index.nbytes
+
+    def _is_noop(self, col: str, sel) -> bool:
+        info = self._others.get(col)
+        if info is None:
+            return False
+        kind, a, b, has_null = info
+        if kind == "range":
+            lo, hi = sel
+            return not has_null and lo <= a and hi >= b
+        return not sel or (not has_null and a.issubset({str(v) for v in sel}))
+
+    def supports(self, filter_state: dict, group_cols: list) -> bool:
+        if any(c not in self.dims for c in group_cols):
+            return False
+        return all(col in self.dims or self._is_noop(col, sel) for col, sel in filter_state.items())
+
+    def dim_state(self, filter_state: dict) -> dict:
+        return {col: sel for col, sel in filter_state.items() if col in self.dims}
+
+    def view(self, filter_state: dict) -> "CubeView":
+        return self.view_rows(self.index.rows(self.dim_state(filter_state)))
+
+    def view_rows(self, rows) -> "CubeView":
+        return CubeView(self.cells if rows is None else self.cells.take(rows))
+
+
+class CubeView:
+    # potongan cube setelah filter; interface sama dengan aggregate.RowView
+    def __init__(self, cells: pd.DataFrame):
+        self.cells = cells
+
+    def _where(self, where: dict = None) -> pd.DataFrame:
+        cells = self.cells
+        for col, val in (where or {}).items():
+            cells = cells[cells[col] == val]
+        return cells
+
+    def totals(self, where: dict = None):
+        cells = self._where(where)
+        n = int(cells["transaksi_count"].sum())
+        spend = float(cells["total_spend_sum"].sum())
+        n_valid = int(cells["total_spend_n"].sum())
+        if n == 0:
+            return 0, spend, 0.0
+        return n, spend, (spend / n_valid if n_valid > 0 else float("nan"))
+
+    def insight(self, group_col, where: dict = None) -> pd.DataFrame:
+        cells = (
+            self._where(where)
+            .groupby(group_col, dropna=False, observed=True)[["transaksi_count", "total_spend_sum", "total_spend_n"]]
+            .sum()
+            .reset_index()
+        )
+        return cells_insight(cells)
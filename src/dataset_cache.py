@@ -0,0 +1,471 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.bundle import META_FILE, STATS_FILE, extract_bundle_zip, is_bundle, open_bundle
+from src.cube import Cube
+from src.insight_awal import StatsAccumulator
+from src.schema import column_options
+from src.streaming import CUBE_DIR, stream_csv_to_bundle
+
+# batas total memori dataset (frame + struktur turunan) yang disimpan di cache, untuk semua sesi (bytes)
+MAX_CACHE_BYTES = int(os.environ.get("MALL_INSIGHT_CACHE_BYTES", 1_500_000_000))
+# kedalaman maksimum saat menaksir ukuran objek turunan (atribut / isi tuple, dict)
+NBYTES_DEPTH = 3
+
+# upload CSV dikonversi sekali ke bundle di folder ini (per hash isi file)
+BUNDLE_DIR = Path(os.environ.get("MALL_INSIGHT_BUNDLE_DIR", "data/bundles"))
+# batas total ukuran bundle di BUNDLE_DIR (bytes); bundle lama yang tidak dipakai dihapus
+MAX_BUNDLE_BYTES = int(os.environ.get("MALL_INSIGHT_BUNDLE_BYTES", 20_000_000_000))
+# jumlah maksimum file_id upload yang diingat hash-nya
+MAX_UPLOAD_KEYS = 1024
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path) -> str:
+    # sama dengan content_hash(isi file), tapi dibaca per blok
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _is_mapped(arr) -> bool:
+    # array yang datanya berasal dari file mmap (bisa dibuang OS dari RAM, dipakai bersama semua sesi)
+    while arr is not None:
+        if isinstance(arr, (np.memmap, mmap.mmap)):
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def _arrow_mapped_nbytes(values) -> int:
+    # string bundle: buffer arrow di atas file mmap read-only (buffer hasil alokasi arrow selalu mutable)
+    chunks = values._pa_array.chunks
+    if all(b is None or not b.is_mutable for chunk in chunks for b in chunk.buffers()):
+        return int(values.nbytes)
+    return 0
+
+
+def mapped_nbytes(df: pd.DataFrame) -> int:
+    total = 0
+    for _, s in df.items():
+        if isinstance(s.array, pd.arrays.ArrowStringArray):
+            # to_numpy akan mendekode semua baris; cukup periksa buffernya
+            total += _arrow_mapped_nbytes(s.array)
+            continue
+        values = s.array.codes if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+        if _is_mapped(values):
+            total += int(values.nbytes)
+    return total
+
+
+def _buffer_id(values) -> int:
+    # id buffer dasar array kolom (mengikuti .base), supaya view dari kolom yang sama dikenali
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    elif isinstance(values, pd.api.extensions.ExtensionArray):
+        nd = getattr(values, "_ndarray", None)
+        if nd is None:
+            return id(values)
+        values = nd
+    while getattr(values, "base", None) is not None:
+        values = values.base
+    return id(values)
+
+
+def frame_buffers(df: pd.DataFrame) -> frozenset:
+    return frozenset(_buffer_id(s.array) for _, s in df.items())
+
+
+def _index_nbytes(idx: pd.Index) -> int:
+    # tanpa hash table engine pandas (dibangun malas saat lookup dan bisa dilepas lagi, jadi ukurannya
+    # berubah-ubah): engine ikut di deep dan shallow, selisihnya = isi objek (string)
+    return int(idx.nbytes) + int(idx.memory_usage(deep=True)) - int(idx.memory_usage(deep=False))
+
+
+def _series_nbytes(s: pd.Series) -> int:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return int(s.cat.codes.nbytes) + _index_nbytes(s.cat.categories)
+    return int(s.memory_usage(index=False, deep=True))
+
+
+def object_nbytes(obj, shared: frozenset = frozenset(), depth: int = NBYTES_DEPTH, seen: dict = None) -> int:
+    # taksiran memori struktur turunan (cube, index, agregat, ...): array, frame, dan isinya.
+    # buffer di shared (kolom frame dataset) tidak dihitung lagi walaupun dirujuk objek turunan
+    # seen: id -> objek; objek ikut disimpan supaya id objek sementara (Series dari df.items())
+    # tidak dipakai ulang objek lain selama penelusuran
+    seen = {} if seen is None else seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, Dataset):
+        return obj.measure()
+    if isinstance(obj, np.ndarray):
+        return 0 if _buffer_id(obj) in shared else int(obj.nbytes)
+    if isinstance(obj, pd.DataFrame):
+        return _index_nbytes(obj.index) + sum(object_nbytes(s, shared, depth, seen) for _, s in obj.items())
+    if isinstance(obj, pd.Series):
+        return 0 if _buffer_id(obj.array) in shared else _series_nbytes(obj)
+    if isinstance(obj, pd.Index):
+        return _index_nbytes(obj)
+    if depth <= 0:
+        return 0
+    if isinstance(obj, dict):
+        items = list(obj.values())
+    elif isinstance(obj, (list, tuple, set)):
+        items = list(obj)
+    elif hasattr(obj, "__dict__"):
+        items = list(vars(obj).values())
+    else:
+        return 0
+    return sum(object_nbytes(v, shared, depth - 1, seen) for v in items)
+
+
+def _freeze(value):
+    # array turunan dipakai bersama semua sesi -> read-only
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class Dataset:
+    # satu salinan per isi file, dipakai bersama semua sesi: jangan diubah di tempat
+    def __init__(self, key: str, df: pd.DataFrame, meta: dict, own_bytes: int = None):
+        self.key = key
+        self.df = df
+        self.meta = meta
+        self._col_meta = {c["name"]: c for c in meta.get("columns", [])}
+        self._derived = {}
+        # memori milik dataset ini sendiri (tanpa kolom yang dipakai bersama dataset induk)
+        self.own_bytes = frame_nbytes(df) if own_bytes is None else own_bytes
+        self.derived_bytes = 0
+        # buffer kolom frame: objek turunan yang merujuk kolom ini tidak dihitung ulang
+        self._shared = frame_buffers(df)
+        # dipanggil dengan tambahan byte saat struktur turunan baru dibangun (cache / dataset induk)
+        self.on_grow = None
+        self._lock = threading.RLock()
+        self._bytes_lock = threading.Lock()
+
+    def derived(self, name: str, build):
+        # struktur turunan (cube, index, dll) dibangun sekali per dataset; sesi lain menunggu, tidak membangun ulang
+        if name in self._derived:
+            return self._derived[name]
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = _freeze(build(self.df))
+                self.refresh_bytes()
+        return self._derived[name]
+
+    def latest(self, slot: str, name, build):
+        # satu hasil per slot (mis. fit FCM untuk slider c / mode): parameter baru menggantikan
+        # hasil lama, jadi matriks besar per nilai slider tidak menumpuk di cache
+        entry = self._derived.get(slot)
+        if entry is not None and entry[0] == name:
+            return entry[1]
+        with self._lock:
+            entry = self._derived.get(slot)
+            if entry is None or entry[0] != name:
+                entry = (name, _freeze(build(self.df)))
+                self._derived[slot] = entry
+                # selisih (bisa negatif) dilaporkan ke cache
+                self.refresh_bytes()
+        return entry[1]
+
+    def _grow(self, nbytes: int):
+        # dataset turunan (with_columns) bertambah: ukur ulang, bukan ditambah, supaya tidak dobel
+        self.refresh_bytes()
+
+    def measure(self) -> int:
+        # memori dataset + semua turunan saat ini (memo yang terisi setelah dibangun ikut terhitung)
+        return self.own_bytes + sum(object_nbytes(v, self._shared) for v in list(self._derived.values()))
+
+    def refresh_bytes(self):
+        # satu-satunya jalur pencatatan: selisih terhadap catatan terakhir dilaporkan ke cache.
+        # diserialkan, jadi build turunan yang bersamaan tidak saling menimpa atau dihitung dua kali
+        with self._bytes_lock:
+            total = self.measure() - self.own_bytes
+            delta = total - self.derived_bytes
+            self.derived_bytes = total
+        if delta and self.on_grow is not None:
+            self.on_grow(delta)
+
+    def with_columns(self, name: str, columns: dict, slot: str = None) -> "Dataset":
+        # dataset turunan dengan kolom tambahan (mis. label cluster); kolom lama dipakai bersama tanpa salinan.
+        # slot: hanya dataset turunan terakhir di slot ini yang disimpan (lihat latest)
+        def build(df):
+            columns_ro = {k: _freeze(v) for k, v in columns.items()}
+            out = pd.DataFrame({**dict(df.items()), **columns_ro}, copy=False)
+            child = Dataset(f"{self.key}:{name}", out, self.meta, own_bytes=frame_nbytes(out[list(columns)]))
+            child.on_grow = self._grow
+            return child
+
+        if slot is not None:
+            return self.latest(("with_columns", slot), name, build)
+        return self.derived(("with_columns", name), build)
+
+    def value_range(self, col: str):
+        c = self._col_meta.get(col, {})
+        if c.get("min") is not None and c.get("max") is not None:
+            return float(c["min"]), float(c["max"])
+        return float(self.df[col].min()), float(self.df[col].max())
+
+    def options(self, col: str) -> list:
+        c = self._col_meta.get(col, {})
+        if "categories" in c:
+            return sorted(c["categories"])
+        return column_options(self.df[col])
+
+
+class DatasetCache:
+    # registry dataset per proses (semua sesi), per hash isi file, LRU dengan batas memori total
+    # (frame + struktur turunan yang dibangun belakangan)
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES, on_evict=None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        # dipanggil dengan key dataset yang dikeluarkan (di luar lock)
+        self.on_evict = on_evict
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str):
+        with self._lock:
+            ds = self._items.get(key)
+            if ds is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+        # memo di struktur turunan yang tumbuh sejak rerun sebelumnya ikut dihitung
+        ds.refresh_bytes()
+        return ds
+
+    def put(self, key: str, ds: Dataset):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                old.on_grow = None
+                self.total_bytes -= old.own_bytes + old.derived_bytes
+            self._items[key] = ds
+            self.total_bytes += ds.own_bytes + ds.derived_bytes
+            ds.on_grow = lambda nbytes: self._grow(key, nbytes)
+            evicted = self._evict()
+        self._notify(evicted)
+
+    def _grow(self, key: str, nbytes: int):
+        with self._lock:
+            if key not in self._items:
+                return
+            self.total_bytes += nbytes
+            self._items.move_to_end(key)
+            evicted = self._evict()
+        self._notify(evicted)
+
+    def _evict(self) -> list:
+        # entry terbaru selalu disimpan walaupun melebihi batas; sesi yang masih memegang
+        # dataset yang dikeluarkan tetap bisa memakainya sampai rerun berikutnya
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            key, ds = self._items.popitem(last=False)
+            ds.on_grow = None
+            self.total_bytes -= ds.own_bytes + ds.derived_bytes
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def _notify(self, evicted: list):
+        if self.on_evict is not None:
+            for key in evicted:
+                self.on_evict(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._items.values())
+            return {
+                "datasets": len(items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "resident_bytes": self.total_bytes,
+                "mapped_bytes": sum(mapped_nbytes(ds.df) for ds in items),
+                "derived_bytes": sum(ds.derived_bytes for ds in items),
+                "max_bytes": self.max_bytes,
+            }
+
+
+# file_id upload streamlit -> hash isi file, supaya rerun tidak perlu hash ulang (LRU, dibatasi)
+_upload_keys = OrderedDict()
+# satu lock per hash: dua sesi yang mengupload file sama hanya meng-ingest sekali.
+# hash -> [lock, jumlah pemakai]; dibuang saat pemakai terakhir selesai
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def _forget(key: str):
+    # dataset keluar dari cache: lepas file_id-nya, lalu rapikan bundle di disk
+    with _key_locks_guard:
+        for file_id in [f for f, k in _upload_keys.items() if k == key]:
+            del _upload_keys[file_id]
+    prune_bundles()
+
+
+_cache = DatasetCache(on_evict=_forget)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+@contextmanager
+def _key_lock(key: str):
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        # juga saat ingest gagal; pemakai lain yang masih menunggu tetap memegang lock yang sama
+        with _key_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _key_locks[key]
+
+
+def upload_key(uploaded) -> str:
+    file_id = getattr(uploaded, "file_id", None)
+    with _key_locks_guard:
+        if file_id is not None and file_id in _upload_keys:
+            _upload_keys.move_to_end(file_id)
+            return _upload_keys[file_id]
+    key = content_hash(uploaded.getvalue())
+    if file_id is not None:
+        with _key_locks_guard:
+            _upload_keys[file_id] = key
+            while len(_upload_keys) > MAX_UPLOAD_KEYS:
+                _upload_keys.popitem(last=False)
+    return key
+
+
+def _dir_nbytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def prune_bundles(max_bytes: int = None, keep: str = None):
+    # bundle di BUNDLE_DIR adalah cache disk (upload ulang file sama tidak perlu ingest lagi).
+    # kalau total melebihi batas, bundle yang paling lama tidak dibuka dan tidak ada di cache memori dihapus;
+    # sesi yang masih memegang dataset lama tetap bisa membaca mmap-nya (file terbuka tetap ada sampai ditutup)
+    max_bytes = MAX_BUNDLE_BYTES if max_bytes is None else max_bytes
+    if not BUNDLE_DIR.is_dir():
+        return
+    bundles = [p for p in BUNDLE_DIR.iterdir() if p.is_dir() and not p.name.endswith(".tmp")]
+    sizes = {p: _dir_nbytes(p) for p in bundles}
+    total = sum(sizes.values())
+    for p in sorted(bundles, key=lambda p: p.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        if p.name in _cache or p.name == keep:
+            continue
+        shutil.rmtree(p, ignore_errors=True)
+        total -= sizes[p]
+
+
+def _open_dataset(key: str, path: Path, cache: DatasetCache = None, bundle_dir: Path = None) -> Dataset:
+    if path.parent == (BUNDLE_DIR if bundle_dir is None else bundle_dir):
+        # mtime = terakhir dibuka, untuk urutan prune_bundles
+        os.utime(path)
+    df, meta = open_bundle(path)
+    ds = Dataset(key, df, meta)
+    if is_bundle(path / CUBE_DIR):
+        # sel cube sudah dihitung saat ingest; kolom baris penuh tidak perlu dibaca
+        cells, _ = open_bundle(path / CUBE_DIR)
+        ds.derived("cube", lambda _: Cube(cells, meta))
+    if (path / STATS_FILE).exists():
+        stats = StatsAccumulator.from_dict(json.loads((path / STATS_FILE).read_text(encoding="utf-8")))
+        ds.derived("stats", lambda _: stats)
+    (_cache if cache is None else cache).put(key, ds)
+    return ds
+
+
+def load_dataset(uploaded, progress=None) -> Dataset:
+    key = upload_key(uploaded)
+    ds = _cache.get(key)
+    if ds is not None:
+        return ds
+    with _key_lock(key):
+        ds = _cache.get(key) if key in _cache else None
+        if ds is None:
+            path = BUNDLE_DIR / key
+            if not is_bundle(path):
+                if uploaded.name.lower().endswith(".zip"):
+                    extract_bundle_zip(io.BytesIO(uploaded.getvalue()), path)
+                else:
+                    # tipe data dirapikan sekali saat ingest (per potongan, tanpa memuat seluruh CSV)
+                    stream_csv_to_bundle(io.BytesIO(uploaded.getvalue()), path, progress=progress)
+                prune_bundles(keep=key)
+            ds = _open_dataset(key, path)
+    return ds
+
+
+def load_path(path, progress=None, cache: DatasetCache = None, bundle_dir=None) -> Dataset:
+    # versi tanpa UI dari load_dataset: path CSV, zip bundle, atau folder bundle.
+    # cache/bundle_dir sendiri (mis. benchmark) tidak berbagi dataset dan bundle dengan sesi aplikasi
+    path = Path(path)
+    shared = cache is None and bundle_dir is None
+    cache = _cache if cache is None else cache
+    bundle_dir = BUNDLE_DIR if bundle_dir is None else Path(bundle_dir)
+    if is_bundle(path):
+        # folder bundle dikenali dari isi meta.json (jumlah baris, kolom, kategori, null), bukan lokasinya:
+        # salinan di folder lain memakai dataset yang sama, bundle yang ditulis ulang dapat key baru.
+        # bundle di BUNDLE_DIR sudah bernama hash-nya sendiri (prune_bundles mencocokkan nama folder)
+        key = path.name if path.resolve().parent == bundle_dir.resolve() else content_hash((path / META_FILE).read_bytes())
+        bundle = path
+    else:
+        key = file_hash(path)
+        bundle = bundle_dir / key
+    ds = cache.get(key)
+    if ds is not None:
+        return ds
+    with _key_lock(key):
+        ds = cache.get(key) if key in cache else None
+        if ds is None:
+            if not is_bundle(bundle):
+                if path.suffix.lower() == ".zip":
+                    extract_bundle_zip(path, bundle)
+                else:
+                    with open(path, "rb") as f:
+                        stream_csv_to_bundle(f, bundle, progress=progress)
+                if shared:
+                    prune_bundles(keep=key)
+            ds = _open_dataset(key, bundle, cache, bundle_dir)
+    return ds
@@ -0,0 +1,132 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from src.aggregate import period_insight, period_totals, regroup, top_insight
+from src.cube import Cube
+from src.dataset_cache import Dataset, load_path
+from src.filter_index import FilterIndex
+from src.parallel import ParallelRowView, SharedColumns, parallel_group_cells, use_parallel
+
+SORT_COLS = ["total_spend_sum", "transaksi_count"]
+
+
+class InsightEngine:
+    # API tanpa UI untuk query filter -> agregat -> top-N atas satu dataset.
+    # filter_state: {kolom: (min, max)} untuk numerik, {kolom: [nilai, ...]} untuk kategorikal
+    def __init__(self, ds: Dataset):
+        self.ds = ds
+
+    @property
+    def cube(self) -> Cube:
+        return self.ds.derived("cube", lambda d: Cube.from_frame(d, self.ds.meta))
+
+    @property
+    def filter_index(self) -> FilterIndex:
+        return self.ds.derived("filter_index", FilterIndex)
+
+    def rows(self, filter_state: dict, row_filter=None):
+        # posisi baris yang lolos filter (None = semua);
+        # row_filter opsional (IncrementalFilter) supaya kolom yang tidak berubah tidak dihitung ulang
+        return (row_filter or self.filter_index).rows(filter_state)
+
+    def view(self, filter_state: dict, group_cols: list, row_filter=None, cube_filter=None):
+        # jawab dari cube kalau bisa; kalau filter/group menyentuh kolom di luar cube, scan baris
+        cube = self.cube
+        if cube.supports(filter_state, group_cols):
+            return cube.view_rows((cube_filter or cube.index).rows(cube.dim_state(filter_state)))
+        rows = self.rows(filter_state, row_filter)
+        n = len(self.ds.df) if rows is None else len(rows)
+        # kolom di shared memory diekspor sekali per dataset, bukan per query
+        shared = self.ds.derived("shared_columns", SharedColumns) if use_parallel(n) else None
+        return ParallelRowView(self.ds.df, rows, shared=shared)
+
+    def totals(self, filter_state: dict, where: dict = None):
+        return self.view(filter_state, list(where or {})).totals(where)
+
+    def insight(self, filter_state: dict, group_col: str, sort_col: str = "total_spend_sum", top_n: int = None, where: dict = None):
+        group_cols = [group_col] + list(where or {})
+        return top_insight(self.view(filter_state, group_cols), group_col, sort_col, top_n, where)
+
+    def period_insight(self, filter_state: dict, period_col: str, group_col: str, sort_col: str = "total_spend_sum", top_n: int = None, where: dict = None):
+        # (KPI per periode, {periode: tabel top-N})
+        source = self.view(filter_state, [period_col, group_col] + list(where or {}))
+        _, panels = period_insight(source, period_col, group_col, sort_col, top_n, where)
+        return period_totals(source.insight(period_col, where), period_col), panels
+
+
+def cluster_cells(ds: Dataset, cols: list, spend_col: str = None) -> pd.DataFrame:
+    # agregat count/sum spend per kombinasi kolom (nilai sebagai string), dihitung sekali per dataset
+    # dan hanya membaca kolom yang dipakai; komposisi cluster cukup dari tabel kecil ini
+    cols = list(dict.fromkeys(cols))
+
+    def build(df):
+        tmp = pd.DataFrame({c: df[c] for c in cols})
+        if spend_col:
+            tmp["_spend"] = pd.to_numeric(df[spend_col], errors="coerce")
+        cells = parallel_group_cells(tmp, cols, "_spend" if spend_col else None)
+        return regroup(cells.astype({c: str for c in cols}), cols)
+
+    return ds.derived(("cluster_cells", spend_col) + tuple(cols), build)
+
+
+# =========================
+# CLI
+# =========================
+# spec JSON, contoh:
+#   {"filters": {"gender": ["Female"], "price": [20, 1500]},
+#    "group_by": "category", "sort": "total_spend_sum", "top_n": 10,
+#    "period": "invoice_date_year", "where": {"invoice_date_year": 2022}}
+def run_spec(engine: InsightEngine, spec: dict) -> dict:
+    filters = spec.get("filters", {})
+    group_by = spec["group_by"]
+    sort_col = spec.get("sort", "total_spend_sum")
+    if sort_col not in SORT_COLS:
+        raise ValueError(f"sort harus salah satu dari {SORT_COLS}")
+    top_n = spec.get("top_n")
+    where = spec.get("where") or None
+
+    n, spend, avg = engine.totals(filters, where)
+    tables = {"totals": pd.DataFrame([{"transaksi_count": n, "total_spend_sum": spend, "total_spend_avg": avg}])}
+    period = spec.get("period")
+    if period:
+        kpis, panels = engine.period_insight(filters, period, group_by, sort_col, top_n, where)
+        tables["period_totals"] = pd.DataFrame(
+            [{period: p, "transaksi_count": k[0], "total_spend_sum": k[1], "total_spend_avg": k[2]} for p, k in kpis.items()]
+        )
+        parts = [t.assign(**{period: p})[[period] + list(t.columns)] for p, t in panels.items()]
+        tables["insight"] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    else:
+        tables["insight"] = engine.insight(filters, group_by, sort_col, top_n, where)
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.engine", description="Hitung tabel insight tanpa UI.")
+    parser.add_argument("data", help="CSV, bundle .zip, atau folder bundle")
+    parser.add_argument("spec", help="file JSON berisi filter dan query")
+    parser.add_argument("--out", help="folder output CSV (default: cetak ke layar)")
+    args = parser.parse_args(argv)
+
+    spec = json.loads(Path(args.spec).read_text(encoding="utf-8"))
+    tables = run_spec(InsightEngine(load_path(args.data)), spec)
+
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, table in tables.items():
+            table.to_csv(out / f"{name}.csv", index=False)
+        print(f"Tabel tersimpan di: {out}")
+    else:
+        for name, table in tables.items():
+            print(f"# {name}")
+            print(table.to_string(index=False))
+            print()
+
+
+#   python -m src.engine customer_shopping_data_insight_ready.csv spec.json --out reports/
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+
+# fitur clustering sama seperti notebook data/ClusterV1/cluster_page2.ipynb
+FCM_FEATURES = ["age", "quantity", "total_spent"]
+# nama lain kolom fitur di data insight-ready
+FEATURE_ALIASES = {"total_spent": ["total_spent", "total_spend"]}
+# fitur yang bisa diturunkan dari data transaksi mentah (notebook: total_spent = quantity * price)
+FEATURE_DERIVED = {"total_spent": ("quantity", "price")}
+
+# ukuran blok baris saat menghitung jarak/membership (memori sementara = blok x c)
+BLOCK_ROWS = 65_536
+
+
+class FCMResult:
+    def __init__(self, centers, u, n_iter, fpc, jm, mean=None, std=None, m=2.0):
+        self.centers = centers
+        # membership n x c (None untuk mini-batch; label dihitung per blok)
+        self.u = u
+        self.n_iter = n_iter
+        self.fpc = fpc
+        self.jm = jm
+        self.mean = mean
+        self.std = std
+        self.m = m
+        self.labels = None
+
+
+def feature_columns(columns) -> list:
+    # kolom fitur yang ada di data (None kalau salah satu fitur tidak ditemukan);
+    # fitur turunan ditulis sebagai tuple kolom yang dikalikan
+    lower = {str(c).lower(): c for c in columns}
+    out = []
+    for feat in FCM_FEATURES:
+        found = next((lower[a] for a in FEATURE_ALIASES.get(feat, [feat]) if a in lower), None)
+        if found is None and all(p in lower for p in FEATURE_DERIVED.get(feat, [None])):
+            found = tuple(lower[p] for p in FEATURE_DERIVED[feat])
+        if found is None:
+            return None
+        out.append(found)
+    return out
+
+
+def feature_names(cols: list) -> list:
+    return ["*".join(c) if isinstance(c, tuple) else str(c) for c in cols]
+
+
+def feature_matrix(df: pd.DataFrame, cols: list) -> np.ndarray:
+    # nilai fitur mentah (float64, n x d) dari hasil feature_columns
+    def values(col):
+        if isinstance(col, tuple):
+            return np.prod([df[c].to_numpy(dtype="float64", na_value=np.nan) for c in col], axis=0)
+        return df[col].to_numpy(dtype="float64", na_value=np.nan)
+
+    return np.column_stack([values(c) for c in cols])
+
+
+def scale(x: np.ndarray, mean: np.ndarray, std: np.ndarray, dtype=np.float32) -> np.ndarray:
+    # standardisasi dengan mean/std tetap; nilai kosong jadi 0 (= rata-rata)
+    x = (x - mean) / std
+    x[np.isnan(x)] = 0.0
+    return x.astype(dtype, copy=False)
+
+
+def standardize(df: pd.DataFrame, cols: list, dtype=np.float32):
+    # seperti StandardScaler (ddof=0); nilai kosong diisi rata-rata (0 setelah scaling)
+    x = feature_matrix(df, cols)
+    mean = np.nanmean(x, axis=0)
+    std = np.nanstd(x, axis=0)
+    std[std == 0] = 1.0
+    return scale(x, mean, std, dtype), mean, std
+
+
+def _dist2(x: np.ndarray, centers: np.ndarray, x2: np.ndarray, out: np.ndarray) -> np.ndarray:
+    # jarak kuadrat euclid blok x ke tiap pusat: |x|^2 + |c|^2 - 2 x.c, ditulis ke out
+    np.matmul(x, centers.T, out=out)
+    out *= -2
+    out += x2[:, None]
+    out += (centers * centers).sum(axis=1)[None, :]
+    np.maximum(out, np.finfo(out.dtype).eps ** 2, out=out)
+    return out
+
+
+def _memberships(d2: np.ndarray, m: float, out: np.ndarray) -> np.ndarray:
+    # u_ij = 1 / sum_k (d_ij / d_ik)^(2/(m-1)), dihitung in-place di out
+    if m == 2.0:
+        np.reciprocal(d2, out=out)
+    else:
+        np.power(d2, -1.0 / (m - 1.0), out=out)
+    out /= out.sum(axis=1, keepdims=True)
+    return out
+
+
+def memberships(x: np.ndarray, centers: np.ndarray, m: float = 2.0, block_rows: int = BLOCK_ROWS, out=None) -> np.ndarray:
+    n, c = len(x), len(centers)
+    out = np.empty((n, c), dtype=x.dtype) if out is None else out
+    d2 = np.empty((min(block_rows, n), c), dtype=x.dtype)
+    for a in range(0, n, block_rows):
+        b = min(a + block_rows, n)
+        xb = x[a:b]
+        _dist2(xb, centers, (xb * xb).sum(axis=1), d2[: b - a])
+        _memberships(d2[: b - a], m, out[a:b])
+    return out
+
+
+def labels_from(x: np.ndarray, centers: np.ndarray, m: float = 2.0, block_rows: int = BLOCK_ROWS):
+    # (label cluster, membership tertinggi) per baris tanpa menyimpan matriks n x c
+    n, c = len(x), len(centers)
+    labels = np.empty(n, dtype=np.int16)
+    top = np.empty(n, dtype=x.dtype)
+    d2 = np.empty((min(block_rows, n), c), dtype=x.dtype)
+    u = np.empty_like(d2)
+    for a in range(0, n, block_rows):
+        b = min(a + block_rows, n)
+        xb = x[a:b]
+        _dist2(xb, centers, (xb * xb).sum(axis=1), d2[: b - a])
+        ub = _memberships(d2[: b - a], m, u[: b - a])
+        labels[a:b] = ub.argmax(axis=1)
+        top[a:b] = ub.max(axis=1)
+    return labels, top
+
+
+def fcm(x: np.ndarray, c: int, m: float = 2.0, error: float = 0.005, maxiter: int = 1000, seed: int = 42, block_rows: int = BLOCK_ROWS, init_centers=None) -> FCMResult:
+    # Fuzzy C-Means penuh, urutan update sama dengan skfuzzy.cluster.cmeans:
+    # pusat dari u lama -> jarak -> u baru; berhenti kalau ||u baru - u lama|| < error.
+    # matriks u (n x c) dialokasikan sekali dan ditimpa per blok; pusat iterasi berikutnya
+    # diakumulasi di pass yang sama, jadi satu iterasi = satu pass atas data
+    n = len(x)
+    dtype = x.dtype
+    if init_centers is None:
+        # inisialisasi acak sama seperti skfuzzy (np.random.seed + rand(c, n))
+        u = np.random.RandomState(seed).rand(c, n).T.astype(dtype)
+        u /= u.sum(axis=1, keepdims=True)
+    else:
+        # warm start: membership awal dari pusat yang sudah diketahui (mis. hasil fit pada sampel)
+        u = memberships(x, np.asarray(init_centers, dtype=dtype), m, block_rows)
+
+    x2 = (x * x).sum(axis=1)
+    d2 = np.empty((min(block_rows, n), c), dtype=dtype)
+    ub = np.empty_like(d2)
+
+    def accumulate(u_rows, xb, num, den):
+        um = np.power(u_rows, m)
+        num += um.T.astype(np.float64) @ xb.astype(np.float64)
+        den += um.sum(axis=0, dtype=np.float64)
+
+    num = np.zeros((c, x.shape[1]))
+    den = np.zeros(c)
+    for a in range(0, n, block_rows):
+        accumulate(u[a : a + block_rows], x[a : a + block_rows], num, den)
+
+    jm, n_iter = [], 0
+    for n_iter in range(1, maxiter + 1):
+        centers = (num / den[:, None]).astype(dtype)
+        num[:] = 0.0
+        den[:] = 0.0
+        diff2, j = 0.0, 0.0
+        for a in range(0, n, block_rows):
+            b = min(a + block_rows, n)
+            rows = b - a
+            _dist2(x[a:b], centers, x2[a:b], d2[:rows])
+            j += float((np.power(u[a:b], m) * d2[:rows]).sum(dtype=np.float64))
+            _memberships(d2[:rows], m, ub[:rows])
+            diff2 += float(np.square(ub[:rows] - u[a:b], dtype=np.float64).sum())
+            u[a:b] = ub[:rows]
+            accumulate(ub[:rows], x[a:b], num, den)
+        jm.append(j)
+        if np.sqrt(diff2) < error:
+            break
+
+    fpc = float(np.square(u, dtype=np.float64).sum() / n)
+    return FCMResult(centers, u, n_iter, fpc, np.asarray(jm), m=m)
+
+
+def fcm_minibatch(x: np.ndarray, c: int, m: float = 2.0, batch_size: int = 4096, maxiter: int = 300, tol: float = 1e-4, seed: int = 42, block_rows: int = BLOCK_ROWS, init_centers=None) -> FCMResult:
+    # mini-batch FCM: tiap langkah memakai batch acak, pusat di-update sebagai rata-rata
+    # berbobot berjalan (bobot = jumlah u^m yang pernah dilihat tiap cluster).
+    # memori hanya batch x c; membership penuh tidak disimpan (pakai labels_from)
+    rng = np.random.default_rng(seed)
+    n = len(x)
+    dtype = x.dtype
+    batch_size = min(batch_size, n)
+    # pusat awal dari FCM penuh atas satu sampel (atau init_centers), lalu diperhalus dengan batch berikutnya
+    if init_centers is None:
+        sample = x[rng.choice(n, size=min(n, max(batch_size, 10 * c)), replace=False)]
+        init_centers = fcm(sample, c, m=m, seed=seed, block_rows=block_rows).centers
+    centers = np.asarray(init_centers, dtype=np.float64)
+    weight = np.zeros(c)
+    d2 = np.empty((batch_size, c), dtype=dtype)
+    ub = np.empty_like(d2)
+
+    jm, n_iter = [], 0
+    for n_iter in range(1, maxiter + 1):
+        xb = x[rng.integers(0, n, size=batch_size)]
+        _dist2(xb, centers.astype(dtype), (xb * xb).sum(axis=1), d2)
+        _memberships(d2, m, ub)
+        um = np.power(ub, m, dtype=np.float64)
+        jm.append(float((um * d2).sum()))
+        w = um.sum(axis=0)
+        batch_centers = (um.T @ xb.astype(np.float64)) / np.maximum(w, 1e-12)[:, None]
+        weight += w
+        new_centers = centers + (batch_centers - centers) * (w / np.maximum(weight, 1e-12))[:, None]
+        shift = float(np.abs(new_centers - centers).max())
+        centers = new_centers
+        if shift < tol:
+            break
+
+    centers = centers.astype(dtype)
+    # FPC dari seluruh data dihitung per blok
+    sq = 0.0
+    u = np.empty((min(block_rows, n), c), dtype=dtype)
+    for a in range(0, n, block_rows):
+        b = min(a + block_rows, n)
+        xb = x[a:b]
+        ub = _memberships(_dist2(xb, centers, (xb * xb).sum(axis=1), u[: b - a]), m, u[: b - a])
+        sq += float(np.square(ub, dtype=np.float64).sum())
+    return FCMResult(centers, None, n_iter, sq / n, np.asarray(jm), m=m)
+
+
+def run_fcm(df: pd.DataFrame, c: int, mode: str = "full", m: float = 2.0, seed: int = 42, dtype=np.float32, **kwargs) -> FCMResult:
+    # segmentasi data insight-ready: fitur -> standardisasi -> FCM -> label per baris
+    cols = feature_columns(df.columns)
+    if cols is None:
+        raise ValueError(f"Kolom fitur FCM tidak lengkap: {FCM_FEATURES}")
+    x, mean, std = standardize(df, cols, dtype=dtype)
+    return fit_scaled(x, c, mode, m, seed, mean, std, **kwargs)
+
+
+def fit_scaled(x: np.ndarray, c: int, mode: str = "full", m: float = 2.0, seed: int = 42, mean=None, std=None, **kwargs) -> FCMResult:
+    # FCM atas fitur yang sudah distandarisasi, lengkap dengan label per baris
+    if mode == "minibatch":
+        result = fcm_minibatch(x, c, m=m, seed=seed, **kwargs)
+        result.labels, _ = labels_from(x, result.centers, m)
+    else:
+        result = fcm(x, c, m=m, seed=seed, **kwargs)
+        result.labels = result.u.argmax(axis=1).astype(np.int16)
+    result.mean, result.std = mean, std
+    return result
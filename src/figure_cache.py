@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# jumlah figure maksimum yang disimpan (dipakai bersama semua sesi)
+MAX_FIGURES = 256
+
+
+def table_fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr([(c, str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class FigureCache:
+    # LRU bersama semua sesi (thread script berbeda): lookup, simpan dan evict di bawah lock;
+    # figure dibangun di luar lock supaya sesi lain tidak menunggu
+    def __init__(self, max_items: int = MAX_FIGURES):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_or_build(self, name: str, build, table: pd.DataFrame, **params):
+        key = (name, table_fingerprint(table), _freeze(params))
+        with self._lock:
+            fig = self._items.get(key)
+            if fig is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+        fig = build(table, **params)
+        with self._lock:
+            self._items[key] = fig
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return fig
+
+
+_cache = FigureCache()
+
+
+def cached_figure(name: str, build, table: pd.DataFrame, **params):
+    # build(table, **params) hanya dipanggil kalau tabel + parameter chart belum pernah dibuat
+    return _cache.get_or_build(name, build, table, **params)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from src.schema import is_categorical
+
+
+class FilterIndex:
+    # index filter per dataset:
+    # - kolom kategorikal: bitmap (packbits) per nilai
+    # - kolom numerik: urutan baris tersortir, range dijawab dengan searchsorted
+    # index per kolom dibangun lazy saat kolom itu pertama kali difilter
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self._bitmaps = {}
+        self._sorted = {}
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(b.nbytes for bits in self._bitmaps.values() for b in bits[0].values())
+        total += sum(order.nbytes + vals.nbytes for order, vals in self._sorted.values())
+        return int(total)
+
+    def _category_bitmaps(self, col: str):
+        if col not in self._bitmaps:
+            s = self.df[col]
+            if is_categorical(s):
+                codes = np.asarray(s.cat.codes)
+                values = s.cat.categories
+            else:
+                codes, values = pd.factorize(s)
+            bits = {str(v): np.packbits(codes == i) for i, v in enumerate(values)}
+            self._bitmaps[col] = (bits, bool((codes < 0).any()))
+        return self._bitmaps[col]
+
+    def _sorted_column(self, col: str):
+        if col not in self._sorted:
+            vals = self.df[col].to_numpy(dtype="float64", na_value=np.nan)
+            # NaN otomatis berada di akhir urutan argsort
+            order = np.argsort(vals, kind="stable")
+            n_valid = int((~np.isnan(vals)).sum())
+            order = order.astype(np.int32 if self.n < 2**31 else np.int64)
+            self._sorted[col] = (order, vals[order[:n_valid]])
+        return self._sorted[col]
+
+    def column_bits(self, col: str, sel):
+        # None = filter kolom ini tidak membatasi baris apa pun
+        if pd.api.types.is_numeric_dtype(self.df[col].dtype):
+            lo, hi = sel
+            dtype = self.df[col].dtype
+            if np.issubdtype(dtype, np.floating):
+                # batas dibulatkan ke presisi kolom, sama seperti Series.between
+                lo, hi = float(dtype.type(lo)), float(dtype.type(hi))
+            order, sorted_vals = self._sorted_column(col)
+            if len(sorted_vals) == self.n and (self.n == 0 or (lo <= sorted_vals[0] and hi >= sorted_vals[-1])):
+                return None
+            left = np.searchsorted(sorted_vals, lo, side="left")
+            right = np.searchsorted(sorted_vals, hi, side="right")
+            mask = np.zeros(self.n, dtype=bool)
+            mask[order[left:right]] = True
+            return np.packbits(mask)
+
+        if not sel:
+            return None
+        bits, has_null = self._category_bitmaps(col)
+        sel = {str(v) for v in sel}
+        if not has_null and sel.issuperset(bits):
+            return None
+        out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for v in sel:
+            if v in bits:
+                out |= bits[v]
+        return out
+
+    def mask(self, filter_state: dict):
+        # None = semua baris lolos
+        out = None
+        for col, sel in filter_state.items():
+            bits = self.column_bits(col, sel)
+            if bits is None:
+                continue
+            out = bits.copy() if out is None else np.bitwise_and(out, bits, out=out)
+        if out is None:
+            return None
+        return np.unpackbits(out, count=self.n).view(bool)
+
+    def rows(self, filter_state: dict):
+        mask = self.mask(filter_state)
+        return None if mask is None else np.flatnonzero(mask)
+
+
+def freeze_state(filter_state: dict) -> tuple:
+    # bentuk hashable dari filter_state, untuk key cache
+    return tuple((col, tuple(sel) if isinstance(sel, (list, tuple)) else sel) for col, sel in sorted(filter_state.items()))
+
+
+class IncrementalFilter:
+    # menyimpan bitmap per kolom dari rerun sebelumnya;
+    # hanya kolom yang seleksinya berubah yang dihitung ulang lalu di-AND lagi
+    def __init__(self, index: FilterIndex):
+        self.index = index
+        self._sel = {}
+        self._bits = {}
+        self._last = None
+
+    def rows(self, filter_state: dict):
+        frozen = dict(freeze_state(filter_state))
+        if self._last is not None and self._last[0] == frozen:
+            return self._last[1]
+
+        for col in list(self._sel):
+            if col not in frozen:
+                del self._sel[col], self._bits[col]
+        for col, sel in frozen.items():
+            if col not in self._sel or self._sel[col] != sel:
+                self._bits[col] = self.index.column_bits(col, filter_state[col])
+                self._sel[col] = sel
+
+        out = None
+        for bits in self._bits.values():
+            if bits is None:
+                continue
+            out = bits.copy() if out is None else np.bitwise_and(out, bits, out=out)
+        rows = None if out is None else np.flatnonzero(np.unpackbits(out, count=self.index.n))
+        self._last = (frozen, rows)
+        return rows
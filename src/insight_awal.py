@@ -1,15 +1,130 @@
+import numpy as np
 import pandas as pd
 
+# ukuran blok saat menghitung statistik dari frame yang sudah ada
+STATS_BLOCK_ROWS = 250_000
+
+
+class StatsAccumulator:
+    # statistik dataset yang bisa di-update per potongan dan digabung antar partisi:
+    # - semua kolom: jumlah null
+    # - kolom numerik: count, min, max
+    # - tiap pasangan kolom numerik (pairwise complete, sama seperti DataFrame.corr):
+    #   n, mean, M2 (jumlah kuadrat deviasi) dan co-moment C, digabung dengan rumus Chan/Welford
+    def __init__(self, columns, num_cols):
+        self.columns = list(columns)
+        self.num_cols = list(num_cols)
+        k = len(self.num_cols)
+        self.n_rows = 0
+        self.nulls = np.zeros(len(self.columns), dtype=np.int64)
+        self.min = np.full(k, np.nan)
+        self.max = np.full(k, np.nan)
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, block_rows: int = STATS_BLOCK_ROWS) -> "StatsAccumulator":
+        acc = cls(df.columns, df.select_dtypes(include="number").columns)
+        for start in range(0, len(df), block_rows):
+            acc.update(df.iloc[start : start + block_rows])
+        return acc
+
+    def _empty_like(self) -> "StatsAccumulator":
+        return StatsAccumulator(self.columns, self.num_cols)
+
+    def update(self, chunk: pd.DataFrame) -> "StatsAccumulator":
+        part = self._empty_like()
+        part.n_rows = len(chunk)
+        part.nulls = np.array([int(chunk[c].isna().sum()) for c in self.columns], dtype=np.int64)
+        if self.num_cols and len(chunk):
+            x = np.column_stack([chunk[c].to_numpy(dtype="float64", na_value=np.nan) for c in self.num_cols])
+            valid = ~np.isnan(x)
+            count = valid.sum(axis=0)
+            part.min = np.where(count > 0, np.where(valid, x, np.inf).min(axis=0), np.nan)
+            part.max = np.where(count > 0, np.where(valid, x, -np.inf).max(axis=0), np.nan)
+            # digeser ke rata-rata kolom potongan ini supaya jumlah kuadrat tidak kehilangan presisi
+            shift = np.where(valid, x, 0.0).sum(axis=0) / np.maximum(count, 1)
+            with np.errstate(invalid="ignore"):
+                y = np.where(valid, x - shift, 0.0)
+                v = valid.astype("float64")
+                n = v.T @ v
+                s = y.T @ v
+                q = (y * y).T @ v
+                p = y.T @ y
+                safe_n = np.where(n > 0, n, 1.0)
+                part.n = n
+                part.mean = np.where(n > 0, s / safe_n + shift[:, None], 0.0)
+                part.m2 = np.where(n > 0, q - s * s / safe_n, 0.0)
+                part.c = np.where(n > 0, p - s * s.T / safe_n, 0.0)
+        return self.merge(part)
+
+    def merge(self, other: "StatsAccumulator") -> "StatsAccumulator":
+        if list(other.columns) != self.columns or list(other.num_cols) != self.num_cols:
+            raise ValueError("Kolom statistik tidak sama, tidak bisa digabung.")
+        n = self.n + other.n
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = other.mean - self.mean
+        w = self.n * other.n / safe_n
+        self.mean = np.where(n > 0, self.mean + delta * other.n / safe_n, 0.0)
+        self.m2 = self.m2 + other.m2 + delta * delta * w
+        self.c = self.c + other.c + delta * delta.T * w
+        self.n = n
+        self.n_rows += other.n_rows
+        self.nulls = self.nulls + other.nulls
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        return self
+
+    def corr(self) -> pd.DataFrame:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = self.c / np.sqrt(self.m2 * self.m2.T)
+        out[(self.n < 1) | ~np.isfinite(out)] = np.nan
+        return pd.DataFrame(np.clip(out, -1.0, 1.0), index=self.num_cols, columns=self.num_cols)
+
+    def profile(self) -> pd.DataFrame:
+        nulls = dict(zip(self.columns, self.nulls.tolist()))
+        count = np.diag(self.n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.diag(self.m2) / (count - 1))
+        out = pd.DataFrame({"n_null": pd.Series(nulls)})
+        out["count"] = out["n_null"].rsub(self.n_rows)
+        num = pd.DataFrame(
+            {"mean": np.where(count > 0, np.diag(self.mean), np.nan), "std": std, "min": self.min, "max": self.max},
+            index=self.num_cols,
+        )
+        return out.join(num)
+
+    def insights(self) -> dict:
+        return {
+            "n_rows": int(self.n_rows),
+            "n_cols": len(self.columns),
+            "missing_cells": int(self.nulls.sum()),
+            "corr": self.corr() if self.num_cols else None,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": [str(c) for c in self.columns],
+            "num_cols": [str(c) for c in self.num_cols],
+            "n_rows": int(self.n_rows),
+            **{k: getattr(self, k).tolist() for k in ["nulls", "min", "max", "n", "mean", "m2", "c"]},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StatsAccumulator":
+        acc = cls(data["columns"], data["num_cols"])
+        acc.n_rows = data["n_rows"]
+        for k in ["nulls", "min", "max", "n", "mean", "m2", "c"]:
+            setattr(acc, k, np.asarray(data[k], dtype=getattr(acc, k).dtype).reshape(getattr(acc, k).shape))
+        return acc
+
+
 def build_insights(df: pd.DataFrame) -> dict:
-    num = df.select_dtypes(include="number")
-
-    corr = None
-    if not num.empty:
-        corr = num.corr(numeric_only=True)
-
-    return {
-        "n_rows": int(df.shape[0]),
-        "n_cols": int(df.shape[1]),
-        "missing_cells": int(df.isna().sum().sum()),
-        "corr": corr,
-    }
+    return StatsAccumulator.from_frame(df).insights()
+
+
+def dataset_insights(ds) -> dict:
+    # statistik dari ingest disimpan bersama dataset; kalau belum ada dihitung sekali per blok
+    return ds.derived("stats", StatsAccumulator.from_frame).insights()
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.cluster_metrics import fpc_xie_beni, silhouette
+from src.fcm import FCM_FEATURES, fcm, feature_columns, fit_scaled, standardize
+from src.parallel import get_pool
+
+# kandidat jumlah cluster dan ukuran sampel evaluasi sama seperti notebook (c = 3..6, sampel 30.000)
+SWEEP_CS = (3, 4, 5, 6)
+SWEEP_SAMPLE = 30_000
+# proses untuk sweep; tiap kandidat (c, seed) saling bebas jadi default memakai semua core
+SWEEP_WORKERS = int(os.environ.get("MALL_INSIGHT_SWEEP_WORKERS", str(os.cpu_count() or 1)))
+# kriteria pemilihan: metrik -> True kalau makin besar makin baik
+CRITERIA = {"xie_beni": False, "fpc": True, "silhouette": True}
+
+
+def evaluate_candidate(sample: np.ndarray, c: int, seed: int, m: float = 2.0, error: float = 0.005, maxiter: int = 500) -> dict:
+    # dijalankan di proses worker: FCM pada sampel + metrik validitas kandidat ini
+    result = fcm(sample, c, m=m, error=error, maxiter=maxiter, seed=seed)
+    fpc, xb = fpc_xie_beni(sample, result.centers, m, u=result.u)
+    sil, _, _, _ = silhouette(sample, result.u.argmax(axis=1), seed=seed)
+    return {"c": c, "seed": seed, "fpc": fpc, "xie_beni": xb, "silhouette": sil, "n_iter": result.n_iter, "centers": result.centers}
+
+
+def sweep(sample: np.ndarray, cs=SWEEP_CS, seeds=(42,), m: float = 2.0, workers: int = None) -> list:
+    # evaluasi semua kombinasi (c, seed) bersamaan di process pool; urutan hasil = urutan kandidat
+    workers = SWEEP_WORKERS if workers is None else workers
+    candidates = [(int(c), int(s)) for c in cs for s in seeds]
+    if workers <= 1 or len(candidates) == 1:
+        return [evaluate_candidate(sample, c, s, m) for c, s in candidates]
+    pool = get_pool(min(workers, len(candidates)))
+    futures = [pool.submit(evaluate_candidate, sample, c, s, m) for c, s in candidates]
+    return [f.result() for f in futures]
+
+
+def best_candidate(rows: list, criterion: str = "xie_beni") -> dict:
+    if criterion not in CRITERIA:
+        raise ValueError(f"Kriteria harus salah satu dari {list(CRITERIA)}")
+    valid = [r for r in rows if np.isfinite(r[criterion])]
+    pick = max if CRITERIA[criterion] else min
+    return pick(valid or rows, key=lambda r: r[criterion])
+
+
+def select_model(
+    df: pd.DataFrame,
+    cs=SWEEP_CS,
+    seeds=(42,),
+    sample_size: int = SWEEP_SAMPLE,
+    m: float = 2.0,
+    criterion: str = "xie_beni",
+    mode: str = "full",
+    workers: int = None,
+    dtype=np.float32,
+):
+    # (tabel metrik per kandidat, FCMResult data penuh).
+    # kandidat dievaluasi pada sampel, lalu fit data penuh dimulai dari pusat kandidat terbaik
+    # sehingga hanya perlu sedikit iterasi dibanding mulai dari inisialisasi acak
+    cols = feature_columns(df.columns)
+    if cols is None:
+        raise ValueError(f"Kolom fitur FCM tidak lengkap: {FCM_FEATURES}")
+    x, mean, std = standardize(df, cols, dtype=dtype)
+    # sampel sama seperti notebook: np.random.seed(42) + choice tanpa pengembalian
+    idx = np.random.RandomState(42).choice(len(x), size=min(sample_size, len(x)), replace=False)
+    rows = sweep(x[idx], cs, seeds, m, workers)
+    best = best_candidate(rows, criterion)
+    result = fit_scaled(x, best["c"], mode, m, best["seed"], mean, std, init_centers=best["centers"])
+    table = pd.DataFrame([{k: v for k, v in r.items() if k != "centers"} for r in rows])
+    table["terpilih"] = [r is best for r in rows]
+    return table, result
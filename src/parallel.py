@@ -0,0 +1,215 @@
+import atexit
+import multiprocessing as mp
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate import RowView, cells_insight, group_cells, merge_cells
+from src.schema import is_categorical
+
+# jumlah proses untuk agregasi; 1 = serial (perilaku lama, hasil identik)
+WORKERS = int(os.environ.get("MALL_INSIGHT_WORKERS", "1"))
+# di bawah jumlah baris ini overhead proses lebih mahal daripada groupby serial
+PARALLEL_MIN_ROWS = int(os.environ.get("MALL_INSIGHT_PARALLEL_MIN_ROWS", "500000"))
+# kolom partisi default (mis. invoice_date_year / shopping_mall); kosong = blok baris
+PARTITION_COL = os.environ.get("MALL_INSIGHT_PARTITION") or None
+
+_pool = None
+_pool_workers = 0
+# beberapa sesi bisa minta pool bersamaan: cek-lalu-buat harus atomik
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    # process pool bersama (agregasi paralel, sweep FCM); dibuat ulang kalau jumlah worker berubah
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: aman dipakai dari proses streamlit yang punya banyak thread
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def use_parallel(n_rows: int, workers: int = None) -> bool:
+    workers = WORKERS if workers is None else workers
+    return workers > 1 and n_rows >= PARALLEL_MIN_ROWS
+
+
+def _close_blocks(blocks: list, arrays: dict):
+    # view numpy harus dilepas dulu, baru segmen bisa ditutup
+    arrays.clear()
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+    blocks.clear()
+
+
+class SharedColumns:
+    # kolom dataset di shared memory, diekspor sekali per kolom lalu dipakai ulang semua query;
+    # simpan sebagai turunan dataset (ds.derived) supaya segmen dilepas saat dataset dibuang
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._blocks = []
+        # view numpy tiap segmen (ikut terhitung di memori turunan dataset)
+        self._arrays = {}
+        self._specs = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_blocks, self._blocks, self._arrays)
+
+    def _export(self, col: str):
+        s = self.df[col]
+        categories = None
+        if is_categorical(s):
+            arr = np.asarray(s.cat.codes)
+            categories = s.cat.categories
+        elif s.dtype.kind in "biufmM":
+            arr = s.to_numpy()
+        else:
+            return None
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        view[:] = arr
+        self._blocks.append(shm)
+        self._arrays[col] = view
+        return (col, shm.name, arr.dtype.str, len(arr), categories)
+
+    def specs(self, cols: list):
+        # spec segmen per kolom; None kalau ada kolom yang tidak bisa dibagi (object/string bebas)
+        with self._lock:
+            for col in cols:
+                if col not in self._specs:
+                    self._specs[col] = self._export(col)
+            out = [self._specs[col] for col in cols]
+        return None if any(spec is None for spec in out) else out
+
+    def close(self):
+        self._finalizer()
+
+
+def _export_positions(positions: np.ndarray):
+    # posisi baris (urutan partisi / filter) untuk satu query; satu-satunya salinan per panggilan
+    positions = np.asarray(positions, dtype=np.int64)
+    shm = shared_memory.SharedMemory(create=True, size=max(positions.nbytes, 1))
+    np.ndarray(positions.shape, dtype=np.int64, buffer=shm.buf)[:] = positions
+    return shm, (shm.name, len(positions))
+
+
+def _aggregate_block(specs: list, start: int, stop: int, group_cols: list, measure_col, positions=None):
+    # dijalankan di proses worker: baca potongan [start, stop) dari shared memory lalu groupby.
+    # positions: (segmen, n) posisi baris; potongan diambil dari posisi, bukan dari urutan kolom
+    attached, data = [], {}
+    try:
+        idx = None
+        if positions is not None:
+            shm = shared_memory.SharedMemory(name=positions[0])
+            attached.append(shm)
+            idx = np.ndarray((positions[1],), dtype=np.int64, buffer=shm.buf)[start:stop].copy()
+        for col, name, dtype, n, categories in specs:
+            shm = shared_memory.SharedMemory(name=name)
+            attached.append(shm)
+            arr = np.ndarray((n,), dtype=np.dtype(dtype), buffer=shm.buf)
+            # disalin (slice / fancy index) supaya buffer shared memory bisa langsung ditutup
+            arr = arr[start:stop].copy() if idx is None else arr[idx]
+            if categories is not None:
+                data[col] = pd.Categorical.from_codes(arr, categories=categories, validate=False)
+            else:
+                data[col] = arr
+    finally:
+        for shm in attached:
+            shm.close()
+    return group_cells(pd.DataFrame(data), group_cols, measure_col)
+
+
+def _partition_bounds(df: pd.DataFrame, rows, n: int, partition_col: str, workers: int):
+    # (urutan baris, batas potongan). partition_col=None -> blok baris sama besar
+    if partition_col is None or partition_col not in df.columns:
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        return rows, bounds
+    s = df[partition_col]
+    keys = np.asarray(s.cat.codes) if is_categorical(s) else pd.factorize(s)[0]
+    if rows is not None:
+        keys = keys[rows]
+    order = np.argsort(keys, kind="stable")
+    edges = np.flatnonzero(np.diff(keys[order])) + 1
+    bounds = np.concatenate([[0], edges, [n]])
+    return (order if rows is None else rows[order]), bounds
+
+
+def parallel_group_cells(
+    df: pd.DataFrame,
+    group_cols: list,
+    measure_col: str = "total_spend",
+    rows=None,
+    partition_col: str = PARTITION_COL,
+    workers: int = None,
+    shared: SharedColumns = None,
+) -> pd.DataFrame:
+    # group_cells atas df (atau posisi baris rows), dipecah per partisi ke process pool lalu digabung.
+    # partisi: blok baris (default) atau per nilai partition_col (mis. invoice_date_year, shopping_mall).
+    # shared: kolom df yang sudah ada di shared memory (dipakai ulang); None = ekspor sementara
+    workers = WORKERS if workers is None else workers
+    n = len(df) if rows is None else len(rows)
+    cols = list(dict.fromkeys(group_cols + ([measure_col] if measure_col else [])))
+    if not use_parallel(n, workers):
+        frame = df[cols] if rows is None else df[cols].take(rows)
+        return group_cells(frame, group_cols, measure_col)
+
+    order, bounds = _partition_bounds(df, rows, n, partition_col, workers)
+    temporary = shared is None
+    if temporary:
+        shared = SharedColumns(df)
+    pos_shm = None
+    try:
+        specs = shared.specs(cols)
+        if specs is None:
+            frame = df[cols] if rows is None else df[cols].take(rows)
+            return group_cells(frame, group_cols, measure_col)
+        positions = None
+        if order is not None:
+            pos_shm, positions = _export_positions(order)
+        pool = get_pool(workers)
+        futures = [
+            pool.submit(_aggregate_block, specs, int(a), int(b), group_cols, measure_col, positions)
+            for a, b in zip(bounds[:-1], bounds[1:])
+            if b > a
+        ]
+        parts = [f.result() for f in futures]
+    finally:
+        if pos_shm is not None:
+            pos_shm.close()
+            pos_shm.unlink()
+        if temporary:
+            shared.close()
+    return merge_cells(parts, group_cols)
+
+
+class ParallelRowView(RowView):
+    # RowView yang agregasinya dipecah ke process pool kalau barisnya cukup banyak;
+    # selain itu (atau workers=1) sama persis dengan RowView
+    def __init__(self, df: pd.DataFrame, rows=None, workers: int = None, partition_col: str = PARTITION_COL, shared: SharedColumns = None):
+        super().__init__(df, rows)
+        self.workers = WORKERS if workers is None else workers
+        self.partition_col = partition_col
+        self.shared = shared
+
+    def insight(self, group_col, where: dict = None) -> pd.DataFrame:
+        rows = self._rows(where)
+        if not use_parallel(len(self.df) if rows is None else len(rows), self.workers):
+            return super().insight(group_col, where)
+        group_cols = [group_col] if isinstance(group_col, str) else list(group_col)
+        cells = parallel_group_cells(self.df, group_cols, "total_spend", rows, self.partition_col, self.workers, self.shared)
+        return cells_insight(cells)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# kolom file transaksi mentah (customer_shopping_data.csv)
+RAW_COLUMNS = [
+    "invoice_no", "customer_id", "gender", "age", "category",
+    "quantity", "price", "payment_method", "invoice_date", "shopping_mall",
+]
+# kolom id tidak dipakai untuk insight (sama seperti notebook prep)
+DROP_COLS = ["invoice_no", "customer_id"]
+# format tanggal data mentah, mis. 5/8/2022 = 5 Agustus 2022
+DATE_FORMAT = "%d/%m/%Y"
+# tanggal berawalan tahun (ISO) tidak pernah dibaca dayfirst
+ISO_PREFIX = r"^\d{4}-"
+
+# batas atas kelas umur 1..6 (<=20, 21-30, ..., 61-70); di luar itu kelas 0
+AGE_CLASS_EDGES = [20, 30, 40, 50, 60, 70]
+# batas atas kelas harga 0..5; di atas 2000 kelas 6
+PRICE_CLASS_EDGES = [20, 50, 100, 500, 1000, 2000]
+
+
+def is_raw(columns) -> bool:
+    # data mentah: masih ada invoice_date string dan belum ada kolom turunannya
+    cols = set(columns)
+    return "invoice_date" in cols and "invoice_date_time" not in cols
+
+
+def _parse_unique(uniques: pd.Index, date_format: str) -> pd.DatetimeIndex:
+    # format eksplisit (tanpa tebak format per baris); sisa yang gagal: ISO (2022-03-04 = 4 Maret)
+    # diparse sebagai ISO, hanya format lain yang dicoba dengan dayfirst
+    parsed = pd.to_datetime(uniques, format=date_format, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    failed = np.isnat(parsed)
+    if failed.any():
+        iso = failed & np.asarray(pd.Index(uniques).astype(str).str.match(ISO_PREFIX), dtype=bool)
+        for mask, kwargs in ((iso, {"format": "ISO8601"}), (failed & ~iso, {"format": "mixed", "dayfirst": True})):
+            if mask.any():
+                parsed[mask] = pd.to_datetime(uniques[mask], errors="coerce", **kwargs).to_numpy(dtype="datetime64[ns]")
+    # slot terakhir untuk kode -1 (nilai kosong) -> NaT
+    return pd.DatetimeIndex(np.append(parsed, np.datetime64("NaT", "ns")))
+
+
+def date_parts(s: pd.Series, date_format: str = DATE_FORMAT) -> dict:
+    # tiap string tanggal unik diparse sekali, semua field kalender dihitung pada nilai unik itu
+    # lalu dipetakan balik ke baris lewat kode factorize: biaya ikut jumlah tanggal unik, bukan baris
+    codes, uniques = pd.factorize(s)
+    dates = _parse_unique(uniques, date_format)
+
+    def to_rows(values) -> pd.Series:
+        return pd.Series(np.asarray(values)[codes], index=s.index)
+
+    out = {"time": to_rows(dates.to_numpy())}
+    calendar = {"day": dates.day, "month": dates.month, "year": dates.year, "weekday": dates.weekday, "week": dates.isocalendar()["week"]}
+    for name, values in calendar.items():
+        # NaT -> NaN (float); schema tetap memilih int kecil kalau tidak ada nilai kosong
+        out[name] = to_rows(pd.array(values, dtype="Float64").to_numpy(dtype="float64", na_value=np.nan))
+    return out
+
+
+def parse_dates(s: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
+    # hanya kolom datetime, juga dengan parse per nilai unik
+    codes, uniques = pd.factorize(s)
+    return pd.Series(_parse_unique(uniques, date_format).to_numpy()[codes], index=s.index, name=s.name)
+
+
+def age_class(age) -> np.ndarray:
+    # sama dengan map_age di notebook, tanpa apply per baris
+    a = np.asarray(age, dtype="float64")
+    cls = np.searchsorted(AGE_CLASS_EDGES, a, side="left") + 1
+    return np.where(cls > len(AGE_CLASS_EDGES), 0, cls).astype("int8")
+
+
+def price_class(price) -> np.ndarray:
+    # sama dengan map_price_class di notebook
+    return np.searchsorted(PRICE_CLASS_EDGES, np.asarray(price, dtype="float64"), side="left").astype("int8")
+
+
+def prepare_raw(df: pd.DataFrame) -> pd.DataFrame:
+    # data mentah -> data insight-ready (kolom dan urutan sama dengan output notebook prep)
+    dates = date_parts(df["invoice_date"])
+    quantity = pd.to_numeric(df["quantity"], errors="coerce")
+    price = pd.to_numeric(df["price"], errors="coerce")
+    out = df.drop(columns=DROP_COLS + ["invoice_date"], errors="ignore")
+    out = out.assign(
+        invoice_date_time=dates["time"],
+        invoice_date_day=dates["day"],
+        invoice_date_month=dates["month"],
+        invoice_date_year=dates["year"],
+        total_spend=price.astype("float64") * quantity,
+        age_class=age_class(pd.to_numeric(df["age"], errors="coerce")),
+        price_class=price_class(price),
+        # field tambahan untuk tampilan per hari/minggu (0 = Senin, minggu ISO 1..53)
+        invoice_date_weekday=dates["weekday"],
+        invoice_date_week=dates["week"],
+    )
+    return out
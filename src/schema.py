@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from src.preprocess import parse_dates
+
+# kolom kategorikal dengan kardinalitas kecil -> category
+CATEGORY_COLS = ["gender", "category", "payment_method", "shopping_mall"]
+
+# kolom numerik -> tipe paling ringkas yang masih aman
+INT_COLS = {
+    "age": "int8",
+    "quantity": "int8",
+    "invoice_date_day": "int8",
+    "invoice_date_month": "int8",
+    "invoice_date_year": "int16",
+    "age_class": "int8",
+    "price_class": "int8",
+    "invoice_date_weekday": "int8",
+    "invoice_date_week": "int8",
+}
+# nilai uang tetap float64: float32 menampilkan 2400.68 sebagai 2400.679932 dan totalnya bergeser
+FLOAT64_COLS = ["price", "total_spend", "total_spent"]
+DATETIME_COLS = ["invoice_date_time"]
+
+# kolom object lain dijadikan category kalau rasio nilai uniknya di bawah ini
+CATEGORY_MAX_RATIO = 0.5
+
+
+def read_dtypes() -> dict:
+    return {c: "category" for c in CATEGORY_COLS}
+
+
+def _to_numeric(s: pd.Series):
+    # None kalau konversi akan menghilangkan nilai (kolom bukan angka)
+    num = pd.to_numeric(s, errors="coerce")
+    if num.isna().sum() > s.isna().sum():
+        return None
+    return num
+
+
+def _downcast_int(s: pd.Series, dtype: str) -> pd.Series:
+    num = _to_numeric(s)
+    if num is None:
+        return s
+    if num.isna().any():
+        return num.astype("float32")
+    info = np.iinfo(dtype)
+    if (num % 1 != 0).any() or num.min() < info.min or num.max() > info.max:
+        return num
+    return num.astype(dtype)
+
+
+def coerce_schema(df: pd.DataFrame) -> pd.DataFrame:
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORY_COLS:
+            out[col] = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+        elif col in INT_COLS:
+            out[col] = _downcast_int(s, INT_COLS[col])
+        elif col in FLOAT64_COLS:
+            num = _to_numeric(s)
+            out[col] = s if num is None else num.astype("float64")
+        elif col in DATETIME_COLS:
+            out[col] = parse_dates(s, "ISO8601")
+        elif s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+            n_unique = s.nunique(dropna=True)
+            out[col] = s.astype("category") if n_unique <= CATEGORY_MAX_RATIO * max(len(s), 1) else s
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def is_categorical(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.CategoricalDtype)
+
+
+def column_options(s: pd.Series) -> list:
+    # opsi multiselect: nilai unik terurut sebagai string
+    if is_categorical(s):
+        return sorted(str(c) for c in s.cat.remove_unused_categories().cat.categories)
+    return sorted(s.dropna().astype(str).unique().tolist())
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.schema import is_categorical
+
+
+class SortIndex:
+    # urutan baris per kolom untuk View Dataset.
+    # argsort penuh dihitung lazy per (kolom, arah) dan disimpan;
+    # halaman pertama bisa dijawab lewat top-k (argpartition) tanpa sort penuh.
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.n = len(df)
+        self._keys = {}
+        self._orders = {}
+
+    @property
+    def nbytes(self) -> int:
+        total = sum(k.nbytes + v.nbytes for k, v in self._keys.values())
+        return int(total + sum(o.nbytes for o in self._orders.values()))
+
+    def _sort_key(self, col: str):
+        # (key numerik, mask baris valid); NaN/NaT selalu di akhir seperti sort_values
+        if col not in self._keys:
+            s = self.df[col]
+            if is_categorical(s):
+                key = np.asarray(s.cat.codes, dtype=np.int64)
+                valid = key >= 0
+            elif pd.api.types.is_datetime64_any_dtype(s.dtype):
+                valid = np.asarray(s.notna())
+                key = s.to_numpy().view(np.int64)
+            elif pd.api.types.is_numeric_dtype(s.dtype):
+                key = s.to_numpy(dtype="float64", na_value=np.nan)
+                valid = ~np.isnan(key)
+            else:
+                codes, _ = pd.factorize(s, sort=True)
+                key = codes.astype(np.int64)
+                valid = key >= 0
+            self._keys[col] = (key, valid)
+        return self._keys[col]
+
+    def order(self, col: str, ascending: bool = True) -> np.ndarray:
+        if (col, ascending) not in self._orders:
+            key, valid = self._sort_key(col)
+            pos = np.flatnonzero(valid)
+            k = key[pos] if ascending else -key[pos]
+            ordered = pos[np.argsort(k, kind="stable")]
+            self._orders[(col, ascending)] = np.concatenate([ordered, np.flatnonzero(~valid)])
+        return self._orders[(col, ascending)]
+
+    def top_k(self, col: str, k: int, ascending: bool = True) -> np.ndarray:
+        # k baris pertama dengan urutan yang sama seperti order(), biaya O(n + k log k)
+        if (col, ascending) in self._orders or k >= self.n:
+            return self.order(col, ascending)[:k]
+        key, valid = self._sort_key(col)
+        pos = np.flatnonzero(valid)
+        if k >= len(pos):
+            return np.concatenate([self.order(col, ascending)[: len(pos)], np.flatnonzero(~valid)[: k - len(pos)]])
+        vals = key[pos] if ascending else -key[pos]
+        kth = np.partition(vals, k - 1)[k - 1]
+        less = pos[vals < kth]
+        tied = pos[vals == kth][: k - len(less)]
+        cand = np.concatenate([less, tied])
+        cand_vals = key[cand] if ascending else -key[cand]
+        return cand[np.lexsort((cand, cand_vals))]
+
+    def page(self, col: str, ascending: bool, page_no: int, page_size: int) -> np.ndarray:
+        start = (page_no - 1) * page_size
+        if start == 0:
+            return self.top_k(col, page_size, ascending)
+        return self.order(col, ascending)[start : start + page_size]
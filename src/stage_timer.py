@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# log JSON-lines (satu baris per rerun); kosong = tidak ditulis
+LOG_PATH = os.environ.get("MALL_INSIGHT_TIMING_LOG", "logs/timing.jsonl")
+# 1 = selalu catat waktu ke log walaupun panel debug tidak dibuka (mis. untuk trafik pengguna)
+ALWAYS_ON = os.environ.get("MALL_INSIGHT_TIMING", "0") == "1"
+# 1 = lacak alokasi memori juga saat panel debug tertutup; default mati karena tracemalloc berlaku
+# untuk seluruh proses dan memperlambat semua sesi. toggle debug di halaman selalu menyalakannya
+TRACE_ALLOC = os.environ.get("MALL_INSIGHT_TIMING_ALLOC", "0") == "1"
+
+# tracemalloc berlaku untuk seluruh proses (semua sesi): dinyalakan selama masih ada timer yang
+# melacak alokasi, dan hanya dimatikan lagi kalau dinyalakan dari sini
+_trace_lock = threading.Lock()
+_trace_users = 0
+_started_tracing = False
+# puncak memori (reset_peak) hanya boleh dipakai satu tahap terluar pada satu waktu;
+# tahap lain (sesi lain yang bersamaan) mencatat selisih memori terpakai saja. puncak tetap bisa
+# ikut memuat alokasi thread lain yang berjalan pada saat yang sama
+_peak_lock = threading.Lock()
+# satu baris log per rerun, tidak bercampur antar sesi
+_log_lock = threading.Lock()
+
+
+def _acquire_tracing():
+    global _trace_users, _started_tracing
+    with _trace_lock:
+        _trace_users += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+
+
+def _release_tracing():
+    global _trace_users, _started_tracing
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class _Frame:
+    def __init__(self, start: int, exact: bool):
+        self.start = start
+        self.peak = start
+        # True = puncak dari reset_peak (tahap ini pemegang _peak_lock), False = selisih memori terpakai
+        self.exact = exact
+
+
+class RerunTimer:
+    # waktu, baris masuk/keluar dan alokasi memori per tahap dalam satu rerun halaman.
+    # tahap dengan nama sama (mis. plotly_chart di loop panel) dijumlahkan; tahap boleh bersarang
+    def __init__(self, page: str, enabled: bool = True, session: str = None, trace_alloc: bool = TRACE_ALLOC):
+        self.page = page
+        self.enabled = enabled
+        self.session = session
+        self.trace_alloc = enabled and trace_alloc
+        self.stages = {}
+        self._frames = []
+        self._owns_peak = False
+        self._t0 = time.perf_counter()
+        self._release = weakref.finalize(self, _release_tracing) if self.trace_alloc else None
+        if self.trace_alloc:
+            _acquire_tracing()
+
+    def close(self):
+        # lepas tracemalloc (juga otomatis saat timer dibuang)
+        if self._release is not None:
+            self._release()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        # rec["rows_out"] bisa diisi di dalam blok with
+        rec = {"rows_in": rows_in, "rows_out": None}
+        if not self.enabled:
+            yield rec
+            return
+        frame = self._enter_alloc()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            seconds = time.perf_counter() - t0
+            alloc = self._exit_alloc(frame)
+            self._add(name, seconds, rec["rows_in"], rec["rows_out"], alloc)
+
+    def _enter_alloc(self):
+        if not self.trace_alloc or not tracemalloc.is_tracing():
+            return None
+        if not self._frames:
+            self._owns_peak = _peak_lock.acquire(blocking=False)
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_peak:
+            for f in self._frames:
+                f.peak = max(f.peak, peak)
+            tracemalloc.reset_peak()
+        frame = _Frame(current, self._owns_peak)
+        self._frames.append(frame)
+        return frame
+
+    def _exit_alloc(self, frame):
+        # puncak memori di atas posisi awal tahap (byte); tanpa _peak_lock: selisih memori terpakai
+        if frame is None:
+            return None
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (frame.start, frame.start)
+        self._frames.pop()
+        if frame.exact:
+            frame.peak = max(frame.peak, peak)
+            for f in self._frames:
+                f.peak = max(f.peak, frame.peak)
+        else:
+            frame.peak = max(frame.start, current)
+        if not self._frames and self._owns_peak:
+            self._owns_peak = False
+            _peak_lock.release()
+        return frame.peak - frame.start
+
+    def _add(self, name, seconds, rows_in, rows_out, alloc):
+        s = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows_in": None, "rows_out": None, "alloc_bytes": None})
+        s["seconds"] += seconds
+        s["calls"] += 1
+        for key, value in [("rows_in", rows_in), ("rows_out", rows_out)]:
+            if value is not None:
+                s[key] = (s[key] or 0) + int(value)
+        if alloc is not None:
+            s["alloc_bytes"] = max(s["alloc_bytes"] or 0, int(alloc))
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def table(self) -> pd.DataFrame:
+        out = pd.DataFrame(
+            [{"stage": k, **v} for k, v in self.stages.items()],
+            columns=["stage", "seconds", "calls", "rows_in", "rows_out", "alloc_bytes"],
+        )
+        out["ms"] = out["seconds"] * 1000
+        out["alloc_mib"] = out["alloc_bytes"].astype("float64") / 2**20
+        return out[["stage", "ms", "calls", "rows_in", "rows_out", "alloc_mib"]]
+
+    def record(self, **extra) -> dict:
+        return {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "session": self.session,
+            "total_seconds": self.total_seconds,
+            # False = alloc_bytes kosong karena tracemalloc tidak dinyalakan untuk rerun ini
+            "trace_alloc": self.trace_alloc,
+            **extra,
+            "stages": [{"stage": k, **v} for k, v in self.stages.items()],
+        }
+
+    def write_log(self, path=LOG_PATH, **extra):
+        if not self.enabled or not path:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(self.record(**extra)) + "\n"
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)
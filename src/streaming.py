@@ -0,0 +1,212 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate import group_cells, merge_cells
+from src.bundle import BUNDLE_VERSION, META_FILE, STATS_FILE, StringColumnWriter, write_bundle
+from src.cube import MEASURE_COL, cube_dims
+from src.insight_awal import StatsAccumulator
+from src.preprocess import is_raw, prepare_raw
+from src.schema import CATEGORY_MAX_RATIO, coerce_schema, read_dtypes
+
+# jumlah baris per potongan saat membaca CSV besar
+CHUNK_ROWS = 250_000
+# batas nilai unik yang dilacak per kolom teks
+MAX_TRACKED_VALUES = 100_000
+# sub-folder bundle berisi sel cube yang dihitung saat ingest
+CUBE_DIR = "cube"
+
+
+def _chunk_kind(s: pd.Series) -> str:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return "numeric"
+    return "string"
+
+
+class ColumnStats:
+    # ringkasan satu kolom yang bisa digabung antar potongan (merge),
+    # dipakai untuk memilih tipe akhir kolom dan isi meta.json
+    def __init__(self, name: str):
+        self.name = name
+        self.kinds = set()
+        self.dtype = None
+        self.n_null = 0
+        self.min = None
+        self.max = None
+        self.categories = set()
+
+    def update(self, s: pd.Series):
+        kind = _chunk_kind(s)
+        self.kinds.add(kind)
+        self.n_null += int(s.isna().sum())
+        if kind in ("category", "string"):
+            if kind == "category":
+                values = [str(c) for c in s.cat.remove_unused_categories().cat.categories]
+            else:
+                values = s.dropna().astype(str).unique().tolist()
+            # nilai unik dibatasi; kolom dengan nilai unik sebanyak ini disimpan sebagai string
+            if self.categories is not None:
+                self.categories.update(values)
+                if len(self.categories) > MAX_TRACKED_VALUES:
+                    self.categories = None
+            return
+
+        if self.dtype is None:
+            self.dtype = s.dtype
+        elif kind == "numeric" and pd.api.types.is_numeric_dtype(self.dtype):
+            self.dtype = np.result_type(self.dtype, s.dtype)
+        elif s.dtype != self.dtype:
+            self.kinds.add("string")
+        if len(self.kinds) == 1 and s.notna().any():
+            lo, hi = s.min(), s.max()
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+
+    def final_kind(self, n_rows: int) -> str:
+        if len(self.kinds) == 1 and "string" not in self.kinds:
+            return next(iter(self.kinds))
+        if self.kinds <= {"category", "string"} and self.categories is not None:
+            # sama seperti coerce_schema: object -> category kalau rasio nilai uniknya kecil
+            if "string" not in self.kinds or len(self.categories) <= CATEGORY_MAX_RATIO * max(n_rows, 1):
+                return "category"
+        return "string"
+
+
+class _Column:
+    # tipe akhir satu kolom + file .npy tujuan (di-mmap untuk ditulis per potongan);
+    # string bebas ditulis lewat StringColumnWriter (offset + buffer byte)
+    def __init__(self, stats: ColumnStats, kind: str, file_name: str):
+        self.stats = stats
+        self.kind = kind
+        self.file = file_name
+        self.np_dtype = None
+        # meta tambahan dari writer string (file data / validitas)
+        self.extra = {}
+        if kind == "category":
+            self.categories = pd.Index(sorted(stats.categories))
+            self.np_dtype = pd.Categorical([], categories=self.categories).codes.dtype
+        elif kind != "string":
+            self.np_dtype = np.dtype(stats.dtype)
+
+    def open(self, folder: Path, n_rows: int):
+        if self.kind == "string":
+            return StringColumnWriter(folder, self.file, n_rows)
+        return np.lib.format.open_memmap(folder / self.file, mode="w+", dtype=self.np_dtype, shape=(n_rows,))
+
+    def cast(self, s: pd.Series):
+        if self.kind == "category":
+            return pd.Categorical(s, categories=self.categories)
+        return s.to_numpy(dtype=self.np_dtype)
+
+    def meta(self) -> dict:
+        st = self.stats
+        out = {"name": st.name, "file": self.file, "n_null": st.n_null, "kind": self.kind}
+        if self.kind == "category":
+            out["dtype"] = "category"
+            out["categories"] = [str(c) for c in self.categories]
+        elif self.kind == "string":
+            out["dtype"] = "str"
+            out.update(self.extra)
+        elif self.kind == "datetime":
+            out["dtype"] = str(self.np_dtype)
+            out["min"] = None if st.min is None else pd.Timestamp(st.min).isoformat()
+            out["max"] = None if st.max is None else pd.Timestamp(st.max).isoformat()
+        else:
+            out["dtype"] = str(self.np_dtype)
+            out["min"] = None if st.min is None else st.min.item()
+            out["max"] = None if st.max is None else st.max.item()
+        return out
+
+
+def _read_chunks(data, chunk_rows: int):
+    data.seek(0)
+    for chunk in pd.read_csv(data, dtype=read_dtypes(), chunksize=chunk_rows):
+        # data transaksi mentah diproses jadi insight-ready per potongan; hasilnya tersimpan di bundle
+        yield coerce_schema(prepare_raw(chunk) if is_raw(chunk.columns) else chunk)
+
+
+def _report(progress, data, size: int, lo: float, hi: float, step: str):
+    # progress(fraksi 0..1, keterangan); posisi baca buffer dipakai sebagai perkiraan
+    if progress is not None and size:
+        progress(lo + (hi - lo) * min(data.tell() / size, 1.0), step)
+
+
+def stream_csv_to_bundle(data, path, progress=None, chunk_rows: int = CHUNK_ROWS) -> Path:
+    # CSV dibaca per potongan dua kali:
+    #   1) ringkasan kolom (tipe akhir, null, min/max, kategori) digabung antar potongan
+    #   2) tiap potongan ditulis ke file .npy (mmap), sel cube dan statistik (korelasi, profil) digabung
+    # memori puncak = satu potongan + agregat, bukan seluruh CSV
+    path = Path(path)
+    data.seek(0, 2)
+    size = data.tell()
+
+    stats = {}
+    n_rows = 0
+    for chunk in _read_chunks(data, chunk_rows):
+        for col in chunk.columns:
+            stats.setdefault(col, ColumnStats(col)).update(chunk[col])
+        n_rows += len(chunk)
+        _report(progress, data, size, 0.0, 0.5, "Membaca ringkasan kolom")
+
+    if n_rows == 0:
+        # CSV kosong (hanya header): tidak ada yang perlu dipotong
+        data.seek(0)
+        df = pd.read_csv(data, dtype=read_dtypes())
+        return write_bundle(coerce_schema(prepare_raw(df) if is_raw(df.columns) else df), path)
+
+    columns = [_Column(st, st.final_kind(n_rows), f"c{i:03d}.npy") for i, st in enumerate(stats.values())]
+
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    outs = [c.open(tmp, n_rows) for c in columns]
+    dims = cube_dims(stats)
+    kinds = {c.stats.name: c.kind for c in columns}
+    measure = MEASURE_COL if kinds.get(MEASURE_COL) == "numeric" else None
+    num_cols = [c.stats.name for c in columns if c.kind == "numeric" and c.np_dtype.kind != "b"]
+    stats_acc = StatsAccumulator(list(stats), num_cols)
+    cells = None
+    start = 0
+    for chunk in _read_chunks(data, chunk_rows):
+        stop = start + len(chunk)
+        typed = {}
+        for c, out in zip(columns, outs):
+            if c.kind == "string":
+                out.write(chunk[c.stats.name])
+                typed[c.stats.name] = chunk[c.stats.name]
+                continue
+            values = c.cast(chunk[c.stats.name])
+            out[start:stop] = values.codes if c.kind == "category" else values
+            typed[c.stats.name] = values
+        frame = pd.DataFrame(typed, index=chunk.index)
+        stats_acc.update(frame)
+        if dims:
+            part = group_cells(frame, dims, measure)
+            cells = part if cells is None else merge_cells([cells, part], dims)
+        start = stop
+        _report(progress, data, size, 0.5, 1.0, "Menulis bundle")
+
+    for c, out in zip(columns, outs):
+        if c.kind == "string":
+            c.extra = out.close()
+        else:
+            out.flush()
+    del outs
+
+    meta = {"version": BUNDLE_VERSION, "n_rows": n_rows, "columns": [c.meta() for c in columns]}
+    (tmp / META_FILE).write_text(json.dumps(meta, indent=1), encoding="utf-8")
+    (tmp / STATS_FILE).write_text(json.dumps(stats_acc.to_dict()), encoding="utf-8")
+    if cells is not None:
+        write_bundle(cells, tmp / CUBE_DIR)
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.rename(path)
+    return path
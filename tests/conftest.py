@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.benchmark import generate_raw, to_insight_ready
+from src.schema import coerce_schema
+
+
+@pytest.fixture(scope="session")
+def insight_frame() -> pd.DataFrame:
+    # data sintetis insight-ready (generator benchmark), sebagian total_spend dikosongkan; jangan diubah di test
+    df = coerce_schema(to_insight_ready(generate_raw(6000, seed=1)))
+    df.loc[::97, "total_spend"] = np.nan
+    return df
@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+
+
+def scan_rows(df: pd.DataFrame, filter_state: dict) -> np.ndarray:
+    # filter per baris (cara lama): range untuk numerik, isin untuk kategorikal
+    mask = np.ones(len(df), dtype=bool)
+    for col, sel in filter_state.items():
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s.dtype):
+            mask &= s.between(*sel).to_numpy()
+        elif sel:
+            mask &= s.astype(str).isin([str(v) for v in sel]).to_numpy()
+    return np.flatnonzero(mask)
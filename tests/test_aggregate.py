@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregate import MemoView, RowView, insight_by, period_insight, period_totals
+from src.dataset_cache import Dataset
+from src.engine import InsightEngine
+
+COLS = ["transaksi_count", "total_spend_sum", "total_spend_avg"]
+
+
+def _per_panel(df, period_col, group_col, sort_col, top_n, where, dropna):
+    # jalur lama: satu insight_by + sort + head per panel periode
+    scope = df
+    for col, val in (where or {}).items():
+        scope = scope[scope[col] == val]
+    out = {}
+    for p in sorted(scope[period_col].dropna().unique()):
+        table = insight_by(scope[scope[period_col] == p], group_col)
+        if dropna:
+            table = table.dropna(subset=[group_col, sort_col])
+        table = table.sort_values(sort_col, ascending=False, kind="stable")
+        out[p] = table if top_n is None else table.head(top_n)
+    return out
+
+
+def _norm(table, group_col):
+    return table.astype({group_col: str}).reset_index(drop=True)[[group_col] + COLS]
+
+
+@pytest.fixture(scope="module")
+def engine(insight_frame):
+    return InsightEngine(Dataset("periods", insight_frame, {"columns": []}))
+
+
+@pytest.mark.parametrize("group_col", ["category", "price_class", "price"])
+@pytest.mark.parametrize("sort_col", ["total_spend_sum", "transaksi_count"])
+@pytest.mark.parametrize(
+    "period_col, where, dropna",
+    [("invoice_date_year", None, False), ("invoice_date_month", {"invoice_date_year": 2022}, True), ("invoice_date_month", None, True)],
+)
+def test_single_pass_matches_per_panel(insight_frame, engine, group_col, sort_col, period_col, where, dropna):
+    sources = [RowView(insight_frame), engine.view({}, [period_col, group_col] + list(where or {}))]
+    for top_n in (None, 3):
+        expected = _per_panel(insight_frame, period_col, group_col, sort_col, top_n, where, dropna)
+        for source in sources:
+            periods, panels = period_insight(source, period_col, group_col, sort_col, top_n, where, dropna=dropna)
+            assert periods == set(expected)
+            assert sorted(panels) == sorted(expected)
+            for p, table in expected.items():
+                pd.testing.assert_frame_equal(
+                    _norm(panels[p], group_col), _norm(table, group_col), check_dtype=False, check_categorical=False
+                )
+
+
+def test_period_totals_match_groupby(insight_frame):
+    totals = period_totals(RowView(insight_frame).insight("invoice_date_year"), "invoice_date_year")
+    grouped = insight_frame.groupby("invoice_date_year")["total_spend"]
+    assert set(totals) == set(grouped.groups)
+    for year, (n, spend, avg) in totals.items():
+        assert n == grouped.size()[year]
+        assert spend == pytest.approx(grouped.sum()[year], rel=1e-12)
+        assert avg == pytest.approx(grouped.mean()[year], rel=1e-12)
+    assert np.isnan(insight_frame["total_spend"]).any()
+
+
+def test_memo_view_reuses_aggregates_with_unchanged_filter(insight_frame):
+    memo = OrderedDict()
+    builds = []
+
+    def source(filter_key):
+        def build():
+            builds.append(filter_key)
+            return RowView(insight_frame)
+
+        return MemoView(memo, ("ds", filter_key), build, max_items=4)
+
+    first = source("a").insight("category")
+    # rerun dengan filter sama (mis. hanya ganti metrik pie): view tidak dibangun ulang
+    again = source("a")
+    assert again.insight("category") is first
+    assert again.totals() == source("a").totals()
+    assert builds == ["a", "a"]
+    pd.testing.assert_frame_equal(first, RowView(insight_frame).insight("category"))
+    # filter lain punya entri sendiri; entri terlama dibuang setelah max_items
+    for key in "bcde":
+        source(key).insight("category")
+    assert ("ds", "a", "insight", ("category",), ()) not in memo
+    assert len(memo) == 4
@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+
+from src.benchmark import DATE_PART_COLUMNS, generate_raw, to_cluster, to_insight_ready
+
+
+def test_generated_date_parts_are_written_as_int():
+    raw = generate_raw(200, seed=3)
+    for frame in (to_insight_ready(raw), to_cluster(raw)):
+        assert all(frame[c].dtype == "int64" for c in DATE_PART_COLUMNS)
+        back = pd.read_csv(io.StringIO(frame.to_csv(index=False)))
+        assert all(back[c].dtype == "int64" for c in DATE_PART_COLUMNS)
+
+
+def test_cases_use_their_own_cache_and_scan_matches_engine(tmp_path):
+    from src import dataset_cache as dc
+    from src.benchmark import FILTER_STATE, _scan_insight, cases_for, write_csv
+    from src.engine import InsightEngine
+
+    before = len(dc._cache)
+    files = {kind: write_csv(tmp_path / f"{kind}.csv", 3000, kind, chunk_rows=1000) for kind in ["raw", "insight", "cluster"]}
+    cases = dict((name, fn) for name, fn, _ in cases_for(files, tmp_path))
+    assert len(dc._cache) == before
+    assert (tmp_path / "bundles").is_dir()
+    for fn in cases.values():
+        fn()
+
+    ds = dc.load_path(files["insight"], cache=dc.DatasetCache(), bundle_dir=tmp_path / "bundles")
+    scan = _scan_insight(ds.df, FILTER_STATE).astype({"category": str}).sort_values("category", ignore_index=True)
+    engine = InsightEngine(ds).insight(FILTER_STATE, "category").astype({"category": str}).sort_values("category", ignore_index=True)
+    pd.testing.assert_frame_equal(scan, engine[scan.columns], check_dtype=False, check_exact=False)
@@ -0,0 +1,58 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.bundle import META_FILE, open_bundle, write_bundle
+from src.dataset_cache import mapped_nbytes
+from src.streaming import stream_csv_to_bundle
+
+
+def _notes(n: int) -> pd.DataFrame:
+    # teks bebas (nilai hampir unik) dengan nilai kosong, string kosong dan unicode
+    notes = [None if i % 11 == 0 else ("" if i % 13 == 0 else f"catatan-{i}-é") for i in range(n)]
+    return pd.DataFrame({"note": notes, "x": np.arange(n)})
+
+
+def test_strings_open_without_copy(tmp_path):
+    df = _notes(5003)
+    path = write_bundle(df, tmp_path / "b")
+    before = pa.total_allocated_bytes()
+    out, meta = open_bundle(path)
+    # hanya struktur array kecil, bukan salinan buffer teks
+    assert pa.total_allocated_bytes() - before < 1024
+    assert isinstance(out["note"].array, pd.arrays.ArrowStringArray)
+    assert out["note"].equals(df["note"].astype("str"))
+    assert mapped_nbytes(out) >= out["note"].array.nbytes
+    col = meta["columns"][0]
+    assert col["kind"] == "string" and col["n_null"] == 455 and col["valid"]
+
+
+def test_string_files_are_not_fixed_width(tmp_path):
+    df = pd.DataFrame({"note": ["x" * 200] + ["y"] * 9999})
+    path = write_bundle(df, tmp_path / "b")
+    size = sum(f.stat().st_size for f in path.iterdir() if f.name != META_FILE)
+    # <U200 akan butuh 8 MB; offset + byte cukup ~90 KB
+    assert size < 200_000
+
+
+def test_streamed_strings_match_read_csv(tmp_path):
+    data = _notes(5003).to_csv(index=False).encode()
+    # potongan bukan kelipatan 8 baris: bitmap validitas harus tersambung benar
+    stream_csv_to_bundle(io.BytesIO(data), tmp_path / "b", chunk_rows=333)
+    out, _ = open_bundle(tmp_path / "b")
+    expected = pd.read_csv(io.BytesIO(data))["note"]
+    assert out["note"].equals(expected)
+
+
+def test_version_1_bundle_still_opens(tmp_path):
+    path = write_bundle(pd.DataFrame({"x": [1, 2]}), tmp_path / "b")
+    np.save(path / "c001.npy", np.array(["a", "bc"]))
+    meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+    meta["version"] = 1
+    meta["columns"].append({"name": "note", "file": "c001.npy", "dtype": "object", "n_null": 0, "kind": "string"})
+    (path / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    out, _ = open_bundle(path)
+    assert out["note"].tolist() == ["a", "bc"]
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from src.cluster_metrics import dataset_validity, fpc_xie_beni, silhouette, silhouette_values
+from src.cluster_model import ClusterModel, fit_model
+from src.fcm import feature_matrix, memberships, scale
+
+
+def _customers(n, seed, shift=0.0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 70, n) + shift,
+        "quantity": rng.integers(1, 6, n),
+        "total_spent": rng.gamma(2.0, 400.0, n) * (1 + shift / 50),
+    })
+
+
+def test_model_validity_uses_model_scaler():
+    # model dilatih di data lain: metrik harus dihitung di ruang scaler model, sama seperti score
+    model, _ = fit_model(_customers(3000, 0), 4)
+    df = _customers(2000, 1, shift=8.0)
+    labels, top = model.score(df)
+    df["cluster"] = labels
+    cols = model.columns(df.columns)
+
+    report = dataset_validity(df, cols, "cluster", model.centers, None, model.m, model.mean, model.std)
+
+    x = scale(feature_matrix(df, cols), model.mean, model.std)
+    u = memberships(x, model.centers, model.m)
+    np.testing.assert_array_equal(u.argmax(axis=1), labels)
+    np.testing.assert_allclose(u.max(axis=1), top, rtol=1e-5)
+    fpc, xb = fpc_xie_beni(x, model.centers, model.m)
+    assert np.isclose(report["fpc"], fpc)
+    assert np.isclose(report["xie_beni"], xb)
+    assert np.isclose(report["fpc"], np.mean((u.astype(np.float64) ** 2).sum(axis=1)), rtol=1e-5)
+
+    # standardisasi ulang dengan statistik df sendiri memberi angka lain (bug sebelumnya)
+    restd = dataset_validity(df, cols, "cluster", model.centers, None, model.m)
+    assert not np.isclose(restd["fpc"], report["fpc"])
+
+
+def test_model_roundtrip_keeps_scaler():
+    model, _ = fit_model(_customers(1500, 2), 3)
+    again = ClusterModel.from_json(model.to_json())
+    np.testing.assert_array_equal(again.mean, model.mean)
+    np.testing.assert_array_equal(again.std, model.std)
+
+
+def _reference_fpc_xie_beni(x, centers, u, m):
+    # rumus notebook dengan tensor penuh n x c x d
+    d2 = ((x[None, :, :] - centers[:, None, :]) ** 2).sum(axis=2).T
+    center_d2 = ((centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    np.fill_diagonal(center_d2, np.inf)
+    return (u ** 2).sum() / len(x), ((u ** m) * d2).sum() / (len(x) * center_d2.min())
+
+
+def _reference_silhouette(x, labels):
+    # definisi sklearn dengan matriks jarak penuh O(n^2)
+    d = np.sqrt(((x[:, None, :] - x[None, :, :]) ** 2).sum(axis=2))
+    out = np.zeros(len(x))
+    for i in range(len(x)):
+        own = labels == labels[i]
+        if own.sum() == 1:
+            continue
+        a = d[i, own].sum() / (own.sum() - 1)
+        b = min(d[i, labels == k].mean() for k in np.unique(labels) if k != labels[i])
+        out[i] = (b - a) / max(a, b)
+    return out
+
+
+def test_fpc_xie_beni_blocks_match_full_tensor():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=(1500, 3))
+    centers = rng.normal(size=(4, 3))
+    for m in (1.5, 2.0):
+        u = memberships(x, centers, m)
+        expected = _reference_fpc_xie_beni(x, centers, u, m)
+        np.testing.assert_allclose(fpc_xie_beni(x, centers, m, block_rows=97), expected, rtol=1e-9)
+        np.testing.assert_allclose(fpc_xie_beni(x, centers, m, u=u, block_rows=1000), expected, rtol=1e-9)
+
+
+def test_silhouette_matches_pairwise_definition():
+    rng = np.random.default_rng(4)
+    x = np.vstack([rng.normal(loc, 0.7, size=(150, 2)) for loc in (0.0, 2.0, 4.0)])
+    labels = np.repeat(np.arange(3), 150)
+    # satu cluster berisi satu titik: silhouette titik itu 0
+    labels[0] = 3
+    s = silhouette_values(np.arange(len(x)), x, labels, block=64)
+    np.testing.assert_allclose(s, _reference_silhouette(x, labels), atol=1e-10)
+    assert s[0] == 0.0
+    mean, lo, hi, n = silhouette(x, labels)
+    assert n == len(x) and lo == mean == hi
+    assert np.isclose(mean, s.mean())
+
+
+def test_sampled_silhouette_interval_covers_exact_value():
+    rng = np.random.default_rng(5)
+    x = np.vstack([rng.normal(loc, 1.0, size=(2000, 3)) for loc in (0.0, 1.5, 3.0)])
+    labels = np.repeat(np.arange(3), 2000)
+    exact = silhouette_values(np.arange(len(x)), x, labels).mean()
+    mean, lo, hi, n = silhouette(x, labels, sample_size=800, exact_max=1000)
+    assert n == 800
+    assert lo < exact < hi
+    assert hi - lo < 0.1
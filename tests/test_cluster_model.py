@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.benchmark import generate_raw, to_insight_ready
+from src.cluster_model import ClusterModel, fit_model, score_csv
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df = to_insight_ready(generate_raw(3000, seed=5))
+    model, result = fit_model(df, 4)
+    return df, model, result
+
+
+def test_save_load_round_trip(fitted, tmp_path):
+    _, model, _ = fitted
+    loaded = ClusterModel.load(model.save(tmp_path / "models" / "fcm.json"))
+    assert loaded.key == model.key
+    assert loaded.m == model.m and loaded.features == model.features
+    np.testing.assert_array_equal(loaded.mean, model.mean)
+    np.testing.assert_array_equal(loaded.std, model.std)
+    np.testing.assert_array_equal(loaded.centers, model.centers)
+    assert not (tmp_path / "models" / "fcm.json.tmp").exists()
+
+
+def test_load_rejects_other_version(fitted, tmp_path):
+    _, model, _ = fitted
+    path = tmp_path / "fcm.json"
+    path.write_text(model.to_json().decode().replace('"version": 1', '"version": 99'), encoding="utf-8")
+    with pytest.raises(ValueError):
+        ClusterModel.load(path)
+
+
+def test_score_matches_fit_labels(fitted):
+    df, model, result = fitted
+    labels, top = model.score(df, block_rows=700)
+    np.testing.assert_array_equal(labels, result.labels)
+    np.testing.assert_allclose(top, result.u.max(axis=1), rtol=1e-4)
+
+
+def test_score_csv_chunked_equals_whole(fitted, tmp_path):
+    df, model, _ = fitted
+    # data mentah: total_spent diturunkan dari quantity * price
+    raw = generate_raw(2500, seed=6)
+    src = tmp_path / "raw.csv"
+    raw.to_csv(src, index=False)
+    assert score_csv(model, src, tmp_path / "whole.csv", chunk_rows=10_000) == 2500
+    assert score_csv(model, src, tmp_path / "chunked.csv", chunk_rows=333) == 2500
+    whole = pd.read_csv(tmp_path / "whole.csv")
+    chunked = pd.read_csv(tmp_path / "chunked.csv")
+    pd.testing.assert_frame_equal(chunked, whole)
+    labels, _ = model.score(raw)
+    np.testing.assert_array_equal(chunked["cluster"].to_numpy(), labels)
+    pd.testing.assert_frame_equal(chunked[raw.columns], pd.read_csv(src))
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cluster_profile import PROFILE_QUANTILES, cluster_profile, profile_totals
+from src.dataset_cache import Dataset
+from src.engine import cluster_cells
+
+
+@pytest.fixture(scope="module")
+def clustered(insight_frame):
+    rng = np.random.default_rng(11)
+    df = insight_frame.copy()
+    df["cluster"] = rng.integers(0, 5, len(df)).astype("float64")
+    # cluster kosong tidak masuk profil (jalur groupby lama juga membuangnya)
+    df.loc[::89, "cluster"] = np.nan
+    df["membership"] = rng.uniform(0.2, 1.0, len(df))
+    df.loc[::61, "membership"] = np.nan
+    return df
+
+
+def _profile(df):
+    measures = {"total_spend": df["total_spend"], "age": df["age"], "quantity": df["quantity"]}
+    return cluster_profile(df["cluster"], measures, df["membership"].to_numpy())
+
+
+def test_profile_equals_per_cluster_groupby(clustered):
+    profile = _profile(clustered).set_index("cluster")
+    grouped = clustered.assign(cluster=clustered["cluster"].astype(str)).groupby("cluster")
+    pd.testing.assert_series_equal(profile["transaksi_count"], grouped.size(), check_names=False, check_dtype=False)
+    for name in ["total_spend", "age", "quantity", "membership"]:
+        col = grouped[name]
+        np.testing.assert_allclose(profile[f"{name}_sum"], col.sum().astype("float64"), rtol=1e-12)
+        np.testing.assert_array_equal(profile[f"{name}_n"], col.count())
+        np.testing.assert_allclose(profile[f"{name}_mean"], col.mean().astype("float64"), rtol=1e-12)
+    for name in ["total_spend", "membership"]:
+        expected = grouped[name].quantile(list(PROFILE_QUANTILES)).unstack()
+        for q in PROFILE_QUANTILES:
+            np.testing.assert_allclose(profile[f"{name}_p{int(round(q * 100))}"], expected[q], rtol=1e-12)
+
+
+def test_profile_matches_cluster_cells_and_totals(clustered):
+    profile = _profile(clustered)
+    # jalur lama halaman cluster: agregat per cluster dari cluster_cells
+    cells = cluster_cells(Dataset("profile", clustered, {"columns": []}), ["cluster"], "total_spend").set_index("cluster")
+    cells = cells.loc[profile["cluster"]]
+    np.testing.assert_array_equal(profile["transaksi_count"], cells["transaksi_count"])
+    np.testing.assert_allclose(profile["total_spend_sum"], cells["total_spend_sum"], rtol=1e-12)
+    np.testing.assert_array_equal(profile["total_spend_n"], cells["total_spend_n"])
+
+    selected = ["1.0", "3.0", "4.0"]
+    rows = clustered[clustered["cluster"].astype(str).isin(selected)]
+    totals = profile_totals(profile, selected)
+    assert totals["transaksi_count"] == len(rows)
+    assert totals["total_spend_n"] == rows["total_spend"].count()
+    assert totals["total_spend_mean"] == pytest.approx(rows["total_spend"].mean(), rel=1e-12)
+    assert totals["membership_mean"] == pytest.approx(rows["membership"].mean(), rel=1e-12)
+
+
+def test_membership_matrix_uses_row_maximum(clustered):
+    rng = np.random.default_rng(12)
+    u = rng.dirichlet(np.ones(5), len(clustered))
+    from_matrix = cluster_profile(clustered["cluster"], {}, u)
+    from_vector = cluster_profile(clustered["cluster"], {}, u.max(axis=1))
+    pd.testing.assert_frame_equal(from_matrix, from_vector)
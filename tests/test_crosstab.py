@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregate import stacked_counts
+from src.crosstab import ClusterCrosstab
+from src.dataset_cache import Dataset
+from src.engine import cluster_cells
+
+DIMS = ["category", "gender", "payment_method", "shopping_mall"]
+
+
+@pytest.fixture(scope="module")
+def clustered(insight_frame):
+    df = insight_frame.copy()
+    rng = np.random.default_rng(4)
+    df["cluster"] = rng.integers(0, 5, len(df))
+    # nilai kosong di dimensi dan mall ikut dihitung sebagai "nan"
+    df.loc[::53, "category"] = np.nan
+    df.loc[::71, "shopping_mall"] = np.nan
+    return df
+
+
+def _old_stacked(ds, mall_col, dim, selected, focus_mall, top_k):
+    # jalur lama halaman cluster: cluster_cells (nilai string) -> filter cluster/mall -> stacked_counts
+    scope = cluster_cells(ds, ([mall_col] if mall_col else []) + [dim, "cluster"])
+    scope = scope[scope["cluster"].isin(selected)]
+    if focus_mall is not None:
+        scope = scope[scope[mall_col] == focus_mall]
+    return stacked_counts(scope, dim, "cluster", top_k=top_k)
+
+
+def _norm(ct: pd.DataFrame, dim: str) -> pd.DataFrame:
+    return ct.astype({dim: str, "cluster": str}).sort_values([dim, "cluster"], ignore_index=True)
+
+
+@pytest.mark.parametrize("mall_col", ["shopping_mall", None])
+def test_crosstab_equals_cluster_cells_path(clustered, mall_col):
+    ds = Dataset("crosstab", clustered, {"columns": []})
+    cluster_str = clustered["cluster"].astype(str).astype("category")
+    crosstab = ClusterCrosstab(clustered, cluster_str, DIMS, mall_col, block_rows=1000)
+    focus_options = [None] + (["Kanyon", "nan", "Tidak Ada"] if mall_col else [])
+    for dim in DIMS:
+        for selected in (["0", "1", "2", "3", "4"], ["1", "3"], []):
+            for focus_mall in focus_options:
+                for top_k in (None, 2, 10):
+                    old = _old_stacked(ds, mall_col, dim, selected, focus_mall, top_k)
+                    new = crosstab.stacked(dim, selected, focus_mall, top_k)
+                    pd.testing.assert_frame_equal(_norm(new, dim), _norm(old, dim), check_dtype=False)
+                    assert new["count"].dtype.kind == "i"
+        assert crosstab.values(dim, ["1", "3"]) == sorted(
+            cluster_cells(ds, [dim, "cluster"]).query("cluster in ['1', '3']")[dim].unique().tolist()
+        )
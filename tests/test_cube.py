@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregate import insight_by
+from src.bundle import read_meta, write_bundle
+from src.cube import Cube
+from tests.helpers import scan_rows
+
+STATES = [
+    {},
+    {"gender": ["Female"]},
+    {"category": ["Shoes", "Toys"], "shopping_mall": ["Kanyon", "Zorlu Center"]},
+    {"invoice_date_year": (2022, 2022), "payment_method": ["Cash"]},
+    {"gender": ["Male"], "age_class": (2, 4), "price_class": (0, 3)},
+]
+GROUPS = ["category", "shopping_mall", ["invoice_date_year", "invoice_date_month"]]
+
+
+@pytest.fixture(scope="module")
+def cube(insight_frame, tmp_path_factory):
+    meta = read_meta(write_bundle(insight_frame, tmp_path_factory.mktemp("bundle") / "b"))
+    return Cube.from_frame(insight_frame, meta)
+
+
+def _sorted(table: pd.DataFrame, group_col) -> pd.DataFrame:
+    cols = [group_col] if isinstance(group_col, str) else list(group_col)
+    out = table.astype({c: str for c in cols})
+    return out.sort_values(cols).reset_index(drop=True)[cols + ["transaksi_count", "total_spend_sum", "total_spend_avg"]]
+
+
+@pytest.mark.parametrize("state", STATES)
+@pytest.mark.parametrize("group_col", GROUPS)
+def test_cube_matches_row_scan(cube, insight_frame, state, group_col):
+    assert cube.supports(state, [group_col] if isinstance(group_col, str) else group_col)
+    rows = insight_frame.take(scan_rows(insight_frame, state))
+    expected = _sorted(insight_by(rows, group_col), group_col)
+    got = _sorted(cube.view(state).insight(group_col), group_col)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_cube_totals_match_row_scan(cube, insight_frame, state):
+    spend = insight_frame["total_spend"].take(scan_rows(insight_frame, state))
+    n, total, avg = cube.view(state).totals()
+    assert n == len(spend)
+    assert total == pytest.approx(float(spend.sum()), rel=1e-12)
+    assert avg == pytest.approx(float(spend.mean()), rel=1e-12)
+
+
+def test_cube_only_supports_noop_filters_outside_dims(cube, insight_frame):
+    lo, hi = float(insight_frame["age"].min()), float(insight_frame["age"].max())
+    assert cube.supports({"age": (lo, hi)}, ["category"])
+    assert not cube.supports({"age": (lo + 5, hi)}, ["category"])
+    assert not cube.supports({}, ["age"])
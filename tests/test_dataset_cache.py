@@ -0,0 +1,188 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.dataset_cache as dc
+from src.filter_index import FilterIndex
+
+
+class Upload(io.BytesIO):
+    # pengganti UploadedFile streamlit
+    def __init__(self, data: bytes, name: str, file_id: str):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+def _csv(n: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "gender": rng.choice(["Female", "Male"], n),
+        "category": rng.choice(["Books", "Shoes", "Toys"], n),
+        "quantity": rng.integers(1, 6, n),
+        "price": rng.integers(500, 500000, n) / 100,
+        "total_spend": rng.integers(500, 500000, n) / 100,
+    })
+    return df.to_csv(index=False).encode()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(dc, "BUNDLE_DIR", tmp_path / "bundles")
+    cache = dc.DatasetCache(on_evict=dc._forget)
+    monkeypatch.setattr(dc, "_cache", cache)
+    monkeypatch.setattr(dc, "_upload_keys", dc.OrderedDict())
+    monkeypatch.setattr(dc, "_key_locks", {})
+    return cache
+
+
+def test_same_content_shares_one_dataset(cache):
+    data = _csv(500, 0)
+    a = dc.load_dataset(Upload(data, "a.csv", "id-a"))
+    b = dc.load_dataset(Upload(data, "b.csv", "id-b"))
+    assert a is b
+    assert cache.stats()["datasets"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_derived_index_not_charged_for_shared_frame(cache):
+    ds = dc.load_dataset(Upload(_csv(2000, 1), "a.csv", "id-a"))
+    before = ds.derived_bytes
+    ds.derived("filter_index", FilterIndex)
+    assert ds.derived_bytes - before < 10_000 < ds.own_bytes
+
+
+def test_memo_growth_is_charged_on_get(cache):
+    ds = dc.load_dataset(Upload(_csv(500, 2), "a.csv", "id-a"))
+    memo = ds.derived("memo", lambda df: {})
+    total = cache.total_bytes
+    memo["big"] = np.zeros(100_000)
+    dc.load_dataset(Upload(b"", "a.csv", "id-a"))
+    assert cache.total_bytes - total == 800_000
+
+
+def test_derived_arrays_are_read_only(cache):
+    ds = dc.load_dataset(Upload(_csv(100, 3), "a.csv", "id-a"))
+    arr = ds.derived("arr", lambda df: np.arange(5))
+    with pytest.raises(ValueError):
+        arr[0] = 1
+
+
+def test_eviction_forgets_keys_and_prunes_bundles(cache, monkeypatch):
+    a = dc.load_dataset(Upload(_csv(500, 4), "a.csv", "id-a"))
+    cache.max_bytes = cache.total_bytes
+    monkeypatch.setattr(dc, "MAX_BUNDLE_BYTES", 0)
+    dc.load_dataset(Upload(_csv(500, 5), "b.csv", "id-b"))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["datasets"] == 1
+    assert a.key not in cache
+    assert "id-a" not in dc._upload_keys and a.key not in dc._key_locks
+    assert not (dc.BUNDLE_DIR / a.key).exists()
+
+
+def test_latest_keeps_only_last_fit(cache):
+    ds = dc.load_dataset(Upload(_csv(500, 6), "a.csv", "id-a"))
+    total = cache.total_bytes
+    first = ds.latest("fcm", ("fcm", 3), lambda df: np.zeros((len(df), 3)))
+    assert ds.latest("fcm", ("fcm", 3), lambda df: None) is first
+    assert cache.total_bytes - total == first.nbytes
+    ds.latest("fcm", ("fcm", 5), lambda df: np.zeros((len(df), 5)))
+    assert cache.total_bytes - total == 500 * 5 * 8
+    child = ds.with_columns("fcm_5", {"cluster": np.zeros(500, dtype=np.int64)}, slot="fcm")
+    assert ds.with_columns("fcm_4", {"cluster": np.ones(500, dtype=np.int64)}, slot="fcm") is not child
+    assert sum(1 for k in ds._derived if k[0] == "with_columns") == 1
+
+
+def test_key_lock_survives_forget_and_is_released_on_failure(cache, monkeypatch):
+    data = _csv(100, 7)
+    key = dc.content_hash(data)
+    started, release, calls, errors = threading.Event(), threading.Event(), [], []
+
+    def broken_ingest(src, path, progress=None):
+        calls.append(path)
+        started.set()
+        release.wait(5)
+        raise ValueError("rusak")
+
+    def load(file_id):
+        try:
+            dc.load_dataset(Upload(data, "a.csv", file_id))
+        except ValueError as e:
+            errors.append(e)
+
+    monkeypatch.setattr(dc, "stream_csv_to_bundle", broken_ingest)
+    first = threading.Thread(target=load, args=("id-a",))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=load, args=("id-b",))
+    second.start()
+    deadline = time.monotonic() + 5
+    while dc._key_locks[key][1] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    lock = dc._key_locks[key][0]
+    # eviksi di tengah ingest tidak boleh membuang lock yang sedang ditunggu
+    dc._forget(key)
+    assert dc._key_locks[key][0] is lock
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert len(errors) == 2 and len(calls) == 2
+    assert dc._key_locks == {}
+
+
+def test_bundle_folder_keyed_by_meta_not_location(cache, tmp_path):
+    from src.bundle import write_bundle
+
+    df = pd.read_csv(io.BytesIO(_csv(300, 8)))
+    write_bundle(df, tmp_path / "a")
+    dc.shutil.copytree(tmp_path / "a", tmp_path / "b")
+    a = dc.load_path(tmp_path / "a")
+    assert dc.load_path(tmp_path / "b") is a
+    # bundle ditulis ulang di lokasi yang sama -> dataset baru
+    dc.shutil.rmtree(tmp_path / "a")
+    write_bundle(df.head(200), tmp_path / "a")
+    assert len(dc.load_path(tmp_path / "a").df) == 200
+
+
+def test_lru_evicts_least_recently_used_within_byte_budget():
+    evicted = []
+    cache = dc.DatasetCache(max_bytes=300, on_evict=evicted.append)
+    frame = pd.DataFrame({"x": [1]})
+    for key in "abc":
+        cache.put(key, dc.Dataset(key, frame, {}, own_bytes=100))
+    assert cache.get("a") is not None
+    assert cache.get("zzz") is None
+    cache.put("d", dc.Dataset("d", frame, {}, own_bytes=100))
+    # "b" paling lama tidak dipakai setelah "a" diakses ulang
+    assert evicted == ["b"]
+    assert list(cache._items) == ["c", "a", "d"]
+    cache.put("e", dc.Dataset("e", frame, {}, own_bytes=250))
+    assert evicted == ["b", "c", "a", "d"] and len(cache) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 4)
+    assert stats["resident_bytes"] == 250
+
+
+def test_upload_key_hashes_each_file_id_once(cache, monkeypatch):
+    hashed = []
+    content_hash = dc.content_hash
+
+    def spy(data):
+        hashed.append(len(data))
+        return content_hash(data)
+
+    monkeypatch.setattr(dc, "content_hash", spy)
+    data = _csv(200, 9)
+    key = dc.upload_key(Upload(data, "a.csv", "id-a"))
+    assert dc.upload_key(Upload(data, "a.csv", "id-a")) == key
+    assert len(hashed) == 1
+    # file_id lain dengan isi sama tetap di-hash, tapi menghasilkan key yang sama
+    assert dc.upload_key(Upload(data, "b.csv", "id-b")) == key
+    assert len(hashed) == 2
+    monkeypatch.setattr(dc, "MAX_UPLOAD_KEYS", 2)
+    dc.upload_key(Upload(_csv(50, 10), "c.csv", "id-c"))
+    assert list(dc._upload_keys) == ["id-b", "id-c"]
@@ -0,0 +1,69 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.dataset_cache as dc
+from src.aggregate import insight_by
+from src.engine import InsightEngine, main, run_spec
+from tests.helpers import scan_rows
+
+SPEC = {
+    "filters": {"gender": ["Female"], "price": [20, 1500], "age": [25, 60]},
+    "group_by": "category",
+    "sort": "total_spend_sum",
+    "top_n": 3,
+}
+
+
+@pytest.fixture
+def csv_path(insight_frame, tmp_path, monkeypatch):
+    monkeypatch.setattr(dc, "BUNDLE_DIR", tmp_path / "bundles")
+    monkeypatch.setattr(dc, "_cache", dc.DatasetCache(on_evict=dc._forget))
+    monkeypatch.setattr(dc, "_key_locks", {})
+    path = tmp_path / "insight.csv"
+    insight_frame.to_csv(path, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+def _expected(df: pd.DataFrame, spec: dict, where: dict = None) -> pd.DataFrame:
+    rows = df.take(scan_rows(df, spec["filters"]))
+    for col, val in (where or {}).items():
+        rows = rows[rows[col] == val]
+    out = insight_by(rows, spec["group_by"]).sort_values(spec["sort"], ascending=False).head(spec["top_n"])
+    return out.astype({spec["group_by"]: str}).reset_index(drop=True)
+
+
+def test_cli_writes_top_n_tables(csv_path, insight_frame, tmp_path, capsys):
+    spec_path = tmp_path / "spec.json"
+    spec_path.write_text(json.dumps(SPEC), encoding="utf-8")
+    main([str(csv_path), str(spec_path), "--out", str(tmp_path / "out")])
+    assert "Tabel tersimpan" in capsys.readouterr().out
+
+    insight = pd.read_csv(tmp_path / "out" / "insight.csv")
+    expected = _expected(insight_frame, SPEC)
+    assert insight["category"].tolist() == expected["category"].tolist()
+    np.testing.assert_allclose(insight["total_spend_sum"], expected["total_spend_sum"], rtol=1e-9)
+    assert insight["transaksi_count"].tolist() == expected["transaksi_count"].tolist()
+
+    totals = pd.read_csv(tmp_path / "out" / "totals.csv").iloc[0]
+    spend = insight_frame["total_spend"].take(scan_rows(insight_frame, SPEC["filters"]))
+    assert totals["transaksi_count"] == len(spend)
+    assert totals["total_spend_sum"] == pytest.approx(float(spend.sum()), rel=1e-9)
+
+
+def test_period_spec_splits_per_period(csv_path, insight_frame):
+    spec = {**SPEC, "filters": {"gender": ["Male"]}, "period": "invoice_date_year"}
+    tables = run_spec(InsightEngine(dc.load_path(csv_path)), spec)
+    years = sorted(insight_frame["invoice_date_year"].unique())
+    assert tables["period_totals"]["invoice_date_year"].tolist() == years
+    for year in years:
+        got = tables["insight"][tables["insight"]["invoice_date_year"] == year]
+        expected = _expected(insight_frame, spec, {"invoice_date_year": year})
+        assert got[spec["group_by"]].astype(str).tolist() == expected[spec["group_by"]].tolist()
+
+
+def test_invalid_sort_is_rejected(csv_path):
+    with pytest.raises(ValueError):
+        run_spec(InsightEngine(dc.load_path(csv_path)), {**SPEC, "sort": "age"})
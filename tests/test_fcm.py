@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from src.fcm import FCM_FEATURES, fcm, feature_columns, fit_scaled, labels_from, memberships, run_fcm
+
+
+def _blobs(n: int = 1500, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0.0, 0.0, 0.0], [3.0, 3.0, 0.0], [0.0, 3.0, 3.0]])
+    return centers[rng.integers(0, 3, n)] + rng.normal(scale=0.6, size=(n, 3))
+
+
+def _reference_fcm(x, c, m=2.0, error=0.005, maxiter=1000, seed=42):
+    # FCM per iterasi tanpa blok, urutan update seperti skfuzzy.cluster.cmeans
+    u = np.random.RandomState(seed).rand(c, len(x))
+    u /= u.sum(axis=0)
+    for it in range(1, maxiter + 1):
+        um = u ** m
+        centers = um @ x / um.sum(axis=1, keepdims=True)
+        d = np.sqrt(((x[None, :, :] - centers[:, None, :]) ** 2).sum(axis=2))
+        d = np.fmax(d, np.finfo(np.float64).eps)
+        u_new = d ** (-2.0 / (m - 1))
+        u_new /= u_new.sum(axis=0)
+        done = np.linalg.norm(u_new - u) < error
+        u = u_new
+        if done:
+            break
+    return centers, u.T, it
+
+
+def test_fcm_matches_reference():
+    x = _blobs()
+    centers, u, n_iter = _reference_fcm(x, 3)
+    result = fcm(x, 3, block_rows=37)
+    assert result.n_iter == n_iter
+    np.testing.assert_allclose(result.centers, centers, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(result.u, u, rtol=0, atol=1e-9)
+    assert result.fpc == pytest.approx(float((u ** 2).sum() / len(x)), rel=1e-12)
+
+
+def test_block_size_does_not_change_result():
+    x = _blobs(seed=1)
+    a = fcm(x, 3, m=1.7, block_rows=64)
+    b = fcm(x, 3, m=1.7)
+    assert a.n_iter == b.n_iter
+    np.testing.assert_allclose(a.centers, b.centers, rtol=0, atol=1e-12)
+
+
+def test_labels_from_matches_full_memberships():
+    x = _blobs(seed=2).astype(np.float32)
+    centers = fcm(x, 3).centers
+    u = memberships(x, centers, block_rows=100)
+    np.testing.assert_allclose(u.sum(axis=1), 1.0, rtol=1e-5)
+    labels, top = labels_from(x, centers, block_rows=77)
+    assert np.array_equal(labels, u.argmax(axis=1))
+    np.testing.assert_allclose(top, u.max(axis=1), rtol=1e-6)
+
+
+@pytest.mark.parametrize("mode", ["full", "minibatch"])
+def test_run_fcm_on_insight_frame(insight_frame, mode):
+    result = run_fcm(insight_frame, 4, mode=mode)
+    assert len(result.labels) == len(insight_frame)
+    assert set(np.unique(result.labels)) <= set(range(4))
+    assert 1 / 4 < result.fpc <= 1
+    assert result.centers.shape == (4, len(FCM_FEATURES))
+    assert result.mean is not None and np.all(result.std > 0)
+
+
+def test_minibatch_finds_the_same_clusters():
+    x = _blobs(4000, seed=3).astype(np.float32)
+    full = fcm(x, 3).u.argmax(axis=1)
+    mini = fit_scaled(x, 3, mode="minibatch", batch_size=512).labels
+    # label cluster bisa tertukar: cocokkan lewat tabel silang
+    table = np.zeros((3, 3), dtype=int)
+    np.add.at(table, (full, mini), 1)
+    assert table.max(axis=1).sum() / len(x) > 0.98
+
+
+def test_feature_columns_aliases_and_derived():
+    assert feature_columns(["Age", "quantity", "total_spend"]) == ["Age", "quantity", "total_spend"]
+    assert feature_columns(["age", "quantity", "price"]) == ["age", "quantity", ("quantity", "price")]
+    assert feature_columns(["age", "quantity"]) is None
@@ -0,0 +1,34 @@
+import threading
+
+import pandas as pd
+
+from src.figure_cache import FigureCache
+
+
+def test_concurrent_get_or_build_with_eviction():
+    cache = FigureCache(max_items=4)
+    tables = [pd.DataFrame({"x": ["a", "b"], "y": [i, i + 1]}) for i in range(16)]
+    errors = []
+
+    def worker(offset):
+        try:
+            for k in range(300):
+                t = tables[(k + offset) % len(tables)]
+                assert cache.get_or_build("bar", lambda tb, **p: ("fig", int(tb["y"].iloc[0])), t)[1] == int(t["y"].iloc[0])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert not errors
+    assert len(cache) <= 4
+    assert cache.hits + cache.misses == 8 * 300
+
+
+def test_same_table_and_params_hit():
+    cache = FigureCache()
+    t = pd.DataFrame({"x": ["a"], "y": [1.0]})
+    first = cache.get_or_build("pie", lambda tb, **p: object(), t, title="A")
+    assert cache.get_or_build("pie", lambda tb, **p: object(), t.copy(), title="A") is first
+    assert cache.get_or_build("pie", lambda tb, **p: object(), t, title="B") is not first
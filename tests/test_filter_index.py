@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.filter_index import FilterIndex, IncrementalFilter
+from tests.helpers import scan_rows
+
+STATES = [
+    {"gender": ["Female"]},
+    {"category": ["Shoes", "Toys"], "price": (20.0, 1500.0)},
+    {"price": (35.84, 35.84)},
+    {"total_spend": (100.0, 2500.0), "shopping_mall": ["Kanyon"]},
+    {"age": (30, 45), "payment_method": ["Cash", "Debit Card"], "invoice_date_year": (2022, 2023)},
+    {"category": ["bukan kategori"]},
+]
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_index_matches_row_scan(insight_frame, state):
+    rows = FilterIndex(insight_frame).rows(state)
+    assert np.array_equal(rows, scan_rows(insight_frame, state))
+
+
+def test_unrestrictive_filters_return_none(insight_frame):
+    index = FilterIndex(insight_frame)
+    lo, hi = float(insight_frame["price"].min()), float(insight_frame["price"].max())
+    assert index.rows({}) is None
+    assert index.rows({"price": (lo, hi), "gender": [], "category": list(insight_frame["category"].cat.categories)}) is None
+    # total_spend punya nilai kosong: range penuh tetap membuang baris NaN, sama seperti between
+    full = (float(insight_frame["total_spend"].min()), float(insight_frame["total_spend"].max()))
+    assert np.array_equal(index.rows({"total_spend": full}), scan_rows(insight_frame, {"total_spend": full}))
+
+
+def test_incremental_filter_matches_full_evaluation(insight_frame):
+    index = FilterIndex(insight_frame)
+    incremental = IncrementalFilter(index)
+    sequence = STATES + [STATES[1], {}, STATES[4], {**STATES[4], "age": (18, 70)}]
+    for state in sequence:
+        got = incremental.rows(state)
+        expected = index.rows(state)
+        assert (got is None and expected is None) or np.array_equal(got, expected)
+
+
+def test_incremental_filter_recomputes_only_changed_columns(insight_frame):
+    index = FilterIndex(insight_frame)
+    incremental = IncrementalFilter(index)
+    computed = []
+    column_bits = index.column_bits
+
+    def spy(col, sel):
+        computed.append(col)
+        return column_bits(col, sel)
+
+    index.column_bits = spy
+    state = {"gender": ["Female"], "category": ["Shoes", "Toys"], "price": (20.0, 1500.0)}
+    incremental.rows(state)
+    assert sorted(computed) == ["category", "gender", "price"]
+
+    steps = [
+        ({**state, "category": ["Shoes"]}, ["category"]),
+        ({**state, "category": ["Shoes"]}, []),
+        ({**state, "category": ["Shoes"], "price": (50.0, 900.0)}, ["price"]),
+        ({"gender": ["Female"], "price": (50.0, 900.0)}, []),
+        ({"gender": ["Male"], "price": (50.0, 900.0), "age": (20, 40)}, ["gender", "age"]),
+    ]
+    for new_state, changed in steps:
+        computed.clear()
+        got = incremental.rows(new_state)
+        assert sorted(computed) == sorted(changed)
+        assert np.array_equal(got, scan_rows(insight_frame, new_state))
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.insight_awal import StatsAccumulator, build_insights
+
+
+@pytest.fixture(scope="module")
+def frame(insight_frame):
+    df = insight_frame.copy()
+    rng = np.random.default_rng(3)
+    # nilai kosong tidak serentak di semua kolom, supaya korelasi pairwise-complete teruji
+    for col in ("age", "price", "quantity"):
+        df[col] = df[col].astype("float64")
+        df.loc[rng.random(len(df)) < 0.03, col] = np.nan
+    # skala besar: rumus jumlah kuadrat naif kehilangan presisi di sini
+    df["shifted"] = df["price"] + 1e9
+    return df
+
+
+def _num(df: pd.DataFrame) -> pd.DataFrame:
+    return df.select_dtypes(include="number")
+
+
+def _corr_reference(a: np.ndarray, b: np.ndarray) -> float:
+    # korelasi pairwise-complete dengan presisi extended, sebagai pembanding kolom berskala besar
+    ok = ~(np.isnan(a) | np.isnan(b))
+    a, b = a[ok].astype(np.longdouble), b[ok].astype(np.longdouble)
+    a, b = a - a.mean(), b - b.mean()
+    return float((a * b).sum() / np.sqrt((a * a).sum() * (b * b).sum()))
+
+
+def test_corr_matches_pandas(frame):
+    got = build_insights(frame)["corr"]
+    expected = _num(frame).corr()
+    assert list(got.columns) == list(expected.columns)
+    cols = [c for c in expected.columns if c != "shifted"]
+    diff = np.abs(got.loc[cols, cols].to_numpy() - expected.loc[cols, cols].to_numpy())
+    assert np.nanmax(diff) < 1e-12
+    assert np.array_equal(np.isnan(got.to_numpy()), np.isnan(expected.to_numpy()))
+
+
+def test_corr_keeps_precision_on_large_offsets(frame):
+    # DataFrame.corr sendiri meleset ~1e-11 di sini, jadi dibandingkan dengan presisi extended
+    got = build_insights(frame)["corr"]
+    shifted = frame["shifted"].to_numpy(dtype="float64")
+    for col in ("age", "quantity", "total_spend", "price_class"):
+        ref = _corr_reference(frame[col].to_numpy(dtype="float64", na_value=np.nan), shifted)
+        assert abs(got.loc[col, "shifted"] - ref) < 1e-13
+
+
+@pytest.mark.parametrize("parts", [2, 7])
+def test_merged_partitions_equal_single_pass(frame, parts):
+    whole = StatsAccumulator.from_frame(frame)
+    bounds = np.linspace(0, len(frame), parts + 1).astype(int)
+    accs = [StatsAccumulator.from_frame(frame.iloc[a:b], block_rows=500) for a, b in zip(bounds[:-1], bounds[1:])]
+    merged = accs[0]
+    for acc in accs[1:]:
+        merged.merge(acc)
+    assert merged.n_rows == whole.n_rows
+    assert np.array_equal(merged.nulls, whole.nulls)
+    assert np.array_equal(merged.n, whole.n)
+    np.testing.assert_array_equal(merged.min, whole.min)
+    np.testing.assert_array_equal(merged.max, whole.max)
+    assert np.nanmax(np.abs(merged.corr().to_numpy() - whole.corr().to_numpy())) < 1e-12
+
+
+def test_merge_with_empty_partition_is_identity(frame):
+    acc = StatsAccumulator.from_frame(frame)
+    before = acc.corr().to_numpy().copy()
+    acc.merge(StatsAccumulator.from_frame(frame.iloc[:0]))
+    np.testing.assert_array_equal(acc.corr().to_numpy(), before)
+
+
+def test_profile_matches_pandas(frame):
+    profile = StatsAccumulator.from_frame(frame, block_rows=1000).profile()
+    num = _num(frame)
+    assert profile["n_null"].tolist() == frame.isna().sum().tolist()
+    assert profile["count"].tolist() == frame.notna().sum().tolist()
+    np.testing.assert_allclose(profile.loc[num.columns, "mean"], num.mean(), rtol=1e-12)
+    np.testing.assert_allclose(profile.loc[num.columns, "std"], num.std(), rtol=1e-9)
+    np.testing.assert_array_equal(profile.loc[num.columns, "min"], num.min())
+    np.testing.assert_array_equal(profile.loc[num.columns, "max"], num.max())
+
+
+def test_dict_roundtrip_and_column_mismatch(frame):
+    acc = StatsAccumulator.from_frame(frame)
+    back = StatsAccumulator.from_dict(acc.to_dict())
+    pd.testing.assert_frame_equal(back.corr(), acc.corr())
+    with pytest.raises(ValueError):
+        acc.merge(StatsAccumulator.from_frame(frame[["age", "price"]]))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import parallel
+from src.aggregate import RowView, group_cells
+from src.parallel import ParallelRowView, SharedColumns, parallel_group_cells, use_parallel
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    return pd.DataFrame({
+        "shopping_mall": pd.Categorical(rng.choice(["Kanyon", "Zorlu", "Metrocity"], n)),
+        "invoice_date_year": rng.choice([2021, 2022, 2023], n),
+        "total_spend": rng.gamma(2.0, 500.0, n),
+    })
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(monkeypatch):
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_ROWS", 1)
+
+
+def _sorted(cells, cols):
+    return cells.astype({c: str for c in cols}).sort_values(cols).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("partition_col", [None, "invoice_date_year"])
+def test_parallel_matches_serial(frame, partition_col):
+    cols = ["shopping_mall", "invoice_date_year"]
+    rows = np.flatnonzero(frame["total_spend"].to_numpy() > 800)
+    expected = _sorted(group_cells(frame[cols + ["total_spend"]].take(rows), cols), cols)
+    got = _sorted(parallel_group_cells(frame, cols, rows=rows, partition_col=partition_col, workers=2), cols)
+    pd.testing.assert_frame_equal(got[cols + ["transaksi_count", "total_spend_n"]], expected[cols + ["transaksi_count", "total_spend_n"]], check_dtype=False)
+    np.testing.assert_allclose(got["total_spend_sum"], expected["total_spend_sum"], rtol=1e-12)
+
+
+def test_shared_columns_exported_once(frame):
+    shared = SharedColumns(frame)
+    cols = ["shopping_mall", "invoice_date_year"]
+    first = shared.specs(cols + ["total_spend"])
+    for lo in (100, 800, 2000):
+        rows = np.flatnonzero(frame["total_spend"].to_numpy() > lo)
+        parallel_group_cells(frame, cols, rows=rows, workers=2, shared=shared)
+    assert shared.specs(cols + ["total_spend"]) == first
+    assert len(shared._blocks) == 3
+    shared.close()
+    assert not shared._blocks
+
+
+def test_serial_fallback_skips_pool(frame, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("pool tidak boleh dipakai")
+
+    monkeypatch.setattr(parallel, "get_pool", no_pool)
+    cols = ["shopping_mall", "invoice_date_year"]
+    assert not use_parallel(len(frame), workers=1)
+    got = parallel_group_cells(frame, cols, workers=1)
+    pd.testing.assert_frame_equal(got, group_cells(frame[cols + ["total_spend"]], cols))
+    # di bawah ambang baris juga serial walaupun workers > 1
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_ROWS", len(frame) + 1)
+    assert not use_parallel(len(frame), workers=2)
+    parallel_group_cells(frame, cols, workers=2)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_row_view_matches_row_view(frame, workers):
+    rows = np.flatnonzero(frame["total_spend"].to_numpy() > 500)
+    expected_view = RowView(frame, rows)
+    view = ParallelRowView(frame, rows, workers=workers)
+    for group_col, where in [("shopping_mall", None), ("shopping_mall", {"invoice_date_year": 2022})]:
+        expected = expected_view.insight(group_col, where)
+        got = view.insight(group_col, where)
+        pd.testing.assert_frame_equal(got[["transaksi_count"]], expected[["transaksi_count"]], check_dtype=False)
+        np.testing.assert_allclose(got["total_spend_sum"], expected["total_spend_sum"], rtol=1e-12)
+        np.testing.assert_allclose(got["total_spend_avg"], expected["total_spend_avg"], rtol=1e-12)
+    assert view.totals() == expected_view.totals()
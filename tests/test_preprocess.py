@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from src.preprocess import AGE_CLASS_EDGES, PRICE_CLASS_EDGES, age_class, date_parts, parse_dates, price_class
+
+
+def test_iso_dates_are_not_read_dayfirst():
+    s = pd.Series(["5/8/2022", "2022-03-04", "2022-03-04 10:30:00", "13/1/2023", None])
+    out = parse_dates(s)
+    assert out.tolist()[:4] == [
+        pd.Timestamp("2022-08-05"),
+        pd.Timestamp("2022-03-04"),
+        pd.Timestamp("2022-03-04 10:30:00"),
+        pd.Timestamp("2023-01-13"),
+    ]
+    assert pd.isna(out.iloc[4])
+
+
+def test_non_iso_fallback_stays_dayfirst():
+    out = parse_dates(pd.Series(["04.03.2022", "2022-03-04"]))
+    assert out.dt.month.tolist() == [3, 3]
+    assert out.dt.day.tolist() == [4, 4]
+
+
+def test_date_parts_match_per_row_parse():
+    s = pd.Series(["1/2/2021", "2021-02-01", "28/12/2022", "1/2/2021"])
+    parts = date_parts(s)
+    assert parts["day"].tolist() == [1, 1, 28, 1]
+    assert parts["month"].tolist() == [2, 2, 12, 2]
+    assert np.array_equal(parts["year"].to_numpy(), [2021, 2021, 2022, 2021])
+
+
+def _per_row(values) -> pd.Series:
+    # referensi notebook: tiap string diparse sendiri dengan dayfirst, gagal -> NaT
+    def one(v):
+        try:
+            return pd.to_datetime(v, dayfirst=True)
+        except (ValueError, TypeError):
+            return pd.NaT
+
+    return pd.Series([one(v) for v in values], dtype="datetime64[ns]")
+
+
+def test_weekday_and_iso_week_match_per_row_parse():
+    # termasuk tanggal di batas tahun ISO (1/1/2021 = minggu 53 tahun 2020, 31/12/2024 = minggu 1)
+    dates = pd.date_range("2020-12-25", "2025-01-08", freq="D")
+    values = [f"{d.day}/{d.month}/{d.year}" for d in dates] + ["1/1/2021", "bukan tanggal", None]
+    parts = date_parts(pd.Series(values))
+    ref = _per_row(values)
+    expected_weekday = ref.dt.weekday.astype("float64")
+    expected_week = ref.dt.isocalendar()["week"].astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+    np.testing.assert_array_equal(parts["weekday"].to_numpy(), expected_weekday.to_numpy())
+    np.testing.assert_array_equal(parts["week"].to_numpy(), expected_week)
+    assert parts["week"].iloc[values.index("1/1/2021")] == 53
+    assert parts["week"].iloc[values.index("31/12/2024")] == 1
+    assert np.isnan(parts["weekday"].iloc[-1]) and np.isnan(parts["week"].iloc[-2])
+
+
+def test_dayfirst_fallback_for_strings_failing_explicit_format():
+    # tidak cocok %d/%m/%Y -> dicoba ulang dengan dayfirst (bukan tebakan bulan dulu)
+    values = ["04.03.2022", "4-3-2022", "04/03/22", "5 Aug 2022", "13.1.2023", "29/2/2023", "xx", "5/8/2022"]
+    parts = date_parts(pd.Series(values))
+    ref = _per_row(values)
+    pd.testing.assert_series_equal(parts["time"], ref, check_names=False)
+    for name, field in [("day", "day"), ("month", "month"), ("year", "year")]:
+        np.testing.assert_array_equal(parts[name].to_numpy(), getattr(ref.dt, field).astype("float64").to_numpy())
+    assert parts["month"].tolist()[:3] == [3, 3, 3]
+
+
+def test_age_class_matches_pd_cut_on_notebook_edges():
+    # map_age notebook: <=20 -> 1, 21-30 -> 2, ..., 61-70 -> 6, sisanya 0
+    age = np.concatenate([np.arange(0, 90), np.array(AGE_CLASS_EDGES) + 1, [np.nan]])
+    ref = pd.cut(age, [-np.inf, 20, 30, 40, 50, 60, 70], right=True, labels=[1, 2, 3, 4, 5, 6])
+    expected = pd.Series(ref).astype("float64").fillna(0).astype("int8").to_numpy()
+    np.testing.assert_array_equal(age_class(age), expected)
+
+
+def test_price_class_matches_pd_cut_on_notebook_edges():
+    # map_price_class notebook: <=20 -> 0, <=50 -> 1, ..., <=2000 -> 5, di atas 2000 -> 6
+    edges = np.array(PRICE_CLASS_EDGES, dtype="float64")
+    price = np.concatenate([edges, edges + 0.01, edges - 0.01, [0.0, 5.23, 1050.0, 5250.0, 1e9]])
+    ref = pd.cut(price, [-np.inf, 20, 50, 100, 500, 1000, 2000, np.inf], right=True, labels=range(7))
+    np.testing.assert_array_equal(price_class(price), np.asarray(ref, dtype="int8"))
+    # NaN: semua perbandingan di notebook gagal -> kelas terakhir
+    assert price_class([np.nan])[0] == 6
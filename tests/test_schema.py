@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from src.schema import coerce_schema
+
+
+def _raw(n: int = 50_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    price = rng.integers(500, 500_000, n) / 100
+    quantity = rng.integers(1, 6, n)
+    return pd.DataFrame({
+        "category": rng.choice(["Books", "Shoes", "Toys"], n),
+        "quantity": quantity.astype(str),
+        "price": price.astype(str),
+        "total_spend": (price * quantity).round(2).astype(str),
+    })
+
+
+def test_money_columns_match_float64_baseline():
+    raw = _raw()
+    out = coerce_schema(raw)
+    for col in ("price", "total_spend"):
+        baseline = pd.to_numeric(raw[col]).astype("float64")
+        assert out[col].dtype == np.float64
+        assert out[col].sum() == baseline.sum()
+        pd.testing.assert_series_equal(
+            out.groupby("category", observed=True)[col].sum(),
+            baseline.groupby(out["category"], observed=True).sum(),
+            check_names=False,
+        )
+
+
+def test_price_displays_without_float32_artifacts():
+    out = coerce_schema(pd.DataFrame({"price": ["2400.68", "15.15"]}))
+    assert out["price"].tolist() == [2400.68, 15.15]
+    assert str(out["price"].iloc[0]) == "2400.68"
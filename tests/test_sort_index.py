@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sort_index import SortIndex
+
+N = 2000
+
+
+@pytest.fixture(scope="module")
+def frame():
+    # banyak nilai kembar dan nilai kosong di tiap tipe kolom
+    rng = np.random.default_rng(9)
+    price = rng.integers(0, 40, N).astype("float64")
+    price[rng.random(N) < 0.1] = np.nan
+    dates = pd.Series(pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 30, N), unit="D"))
+    dates[rng.random(N) < 0.05] = pd.NaT
+    category = pd.Series(rng.choice(["Books", "Shoes", "Toys"], N), dtype="category")
+    category[rng.random(N) < 0.05] = np.nan
+    mall = pd.Series(rng.choice(["Kanyon", "Zorlu Center", "Metrocity", "Forum Istanbul"], N), dtype="str")
+    mall[rng.random(N) < 0.05] = np.nan
+    return pd.DataFrame({
+        "quantity": rng.integers(1, 6, N),
+        "price": price,
+        "invoice_date_time": dates,
+        "category": category,
+        "shopping_mall": mall,
+    })
+
+
+def _expected(df, col, ascending):
+    return df.sort_values(col, ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+@pytest.mark.parametrize("col", ["quantity", "price", "invoice_date_time", "category", "shopping_mall"])
+def test_order_matches_stable_sort_values(frame, col, ascending):
+    np.testing.assert_array_equal(SortIndex(frame).order(col, ascending), _expected(frame, col, ascending))
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+@pytest.mark.parametrize("col", ["quantity", "price", "invoice_date_time", "category", "shopping_mall"])
+def test_top_k_is_prefix_of_order(frame, col, ascending):
+    expected = _expected(frame, col, ascending)
+    n_valid = int(frame[col].notna().sum())
+    for k in [1, 7, 100, 401, n_valid - 1, n_valid, n_valid + 3, N, N + 10]:
+        # index baru tiap k: top_k tidak boleh tertolong urutan penuh yang sudah tersimpan
+        got = SortIndex(frame).top_k(col, k, ascending)
+        np.testing.assert_array_equal(got, expected[:k], err_msg=f"k={k}")
+    index = SortIndex(frame)
+    index.order(col, ascending)
+    np.testing.assert_array_equal(index.top_k(col, 50, ascending), expected[:50])
+
+
+def test_page_walks_the_full_order(frame):
+    index = SortIndex(frame)
+    expected = _expected(frame, "price", False)
+    pages = [index.page("price", False, p, 300) for p in range(1, 8)]
+    np.testing.assert_array_equal(np.concatenate(pages), expected)
@@ -0,0 +1,75 @@
+import json
+import threading
+import tracemalloc
+
+import numpy as np
+
+from src import stage_timer
+from src.stage_timer import RerunTimer
+
+
+def test_other_session_does_not_stop_tracing_or_reset_peak():
+    a = RerunTimer("a", enabled=True, trace_alloc=True)
+    with a.stage("build"):
+        # sesi lain membuka lalu menutup panel debug di tengah tahap sesi a
+        b = RerunTimer("b", enabled=True, trace_alloc=True)
+        with b.stage("other"):
+            pass
+        b.close()
+        RerunTimer("c", enabled=False).close()
+        assert tracemalloc.is_tracing()
+        block = np.ones(40 * 2**20 // 8)
+    del block
+    assert a.stages["build"]["alloc_bytes"] >= 40 * 2**20
+    a.close()
+    assert not tracemalloc.is_tracing()
+
+
+def test_nested_stage_peak_propagates():
+    t = RerunTimer("p", enabled=True, trace_alloc=True)
+    with t.stage("outer"):
+        with t.stage("inner"):
+            block = np.ones(10 * 2**20 // 8)
+            del block
+    t.close()
+    assert t.stages["inner"]["alloc_bytes"] >= 10 * 2**20
+    assert t.stages["outer"]["alloc_bytes"] >= t.stages["inner"]["alloc_bytes"]
+
+
+def test_concurrent_log_lines_do_not_interleave(tmp_path):
+    path = tmp_path / "timing.jsonl"
+
+    def write(i):
+        t = RerunTimer(f"page{i}", enabled=True, trace_alloc=False)
+        for j in range(20):
+            with t.stage(f"stage{j}" * 50):
+                pass
+        for _ in range(20):
+            t.write_log(path)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    [th.start() for th in threads]
+    [th.join() for th in threads]
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 8 * 20
+    assert all(json.loads(line)["stages"] for line in lines)
+    assert stage_timer._trace_users == 0
+
+
+def test_alloc_tracing_off_by_default_and_logged(tmp_path):
+    assert stage_timer.TRACE_ALLOC is False
+    path = tmp_path / "timing.jsonl"
+    t = RerunTimer("p", enabled=True)
+    with t.stage("build"):
+        assert not tracemalloc.is_tracing()
+    t.write_log(path)
+    t.close()
+    u = RerunTimer("p", enabled=True, trace_alloc=True)
+    with u.stage("build"):
+        pass
+    u.write_log(path)
+    u.close()
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["trace_alloc"] for line in lines] == [False, True]
+    assert lines[0]["stages"][0]["alloc_bytes"] is None
+    assert lines[1]["stages"][0]["alloc_bytes"] is not None
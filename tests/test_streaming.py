@@ -0,0 +1,80 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregate import group_cells
+from src.benchmark import generate_raw
+from src.bundle import STATS_FILE, open_bundle
+from src.cube import cube_dims
+from src.insight_awal import StatsAccumulator
+from src.preprocess import prepare_raw
+from src.schema import coerce_schema, read_dtypes
+from src.streaming import CUBE_DIR, stream_csv_to_bundle
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False, date_format="%Y-%m-%d").encode()
+
+
+def _in_memory(data: bytes, raw: bool = False) -> pd.DataFrame:
+    # jalur lama: seluruh CSV dibaca lalu dirapikan sekaligus
+    df = pd.read_csv(io.BytesIO(data), dtype=read_dtypes())
+    return coerce_schema(prepare_raw(df) if raw else df)
+
+
+def _streamed(data: bytes, path, chunk_rows: int) -> pd.DataFrame:
+    stream_csv_to_bundle(io.BytesIO(data), path, chunk_rows=chunk_rows)
+    df, _ = open_bundle(path)
+    # kolom mmap dibaca penuh supaya bisa dibandingkan
+    return df.copy()
+
+
+def _assert_same(got: pd.DataFrame, expected: pd.DataFrame):
+    assert list(got.columns) == list(expected.columns)
+    for col in expected.columns:
+        g, e = got[col], expected[col]
+        if isinstance(e.dtype, pd.CategoricalDtype):
+            # kategori dari gabungan potongan; nilainya harus sama
+            assert g.astype(str).tolist() == e.astype(str).tolist(), col
+        else:
+            assert g.dtype == e.dtype, col
+            pd.testing.assert_series_equal(g, e, check_names=False, obj=col)
+
+
+@pytest.mark.parametrize("chunk_rows", [700, 1_000_000])
+def test_streamed_insight_csv_matches_in_memory(insight_frame, tmp_path, chunk_rows):
+    data = _csv(insight_frame)
+    _assert_same(_streamed(data, tmp_path / "b", chunk_rows), _in_memory(data))
+
+
+def test_streamed_raw_csv_matches_in_memory(tmp_path):
+    raw = generate_raw(3000, seed=2)
+    raw.loc[::113, "price"] = np.nan
+    data = _csv(raw)
+    _assert_same(_streamed(data, tmp_path / "b", 450), _in_memory(data, raw=True))
+
+
+def test_streamed_cube_and_stats_match_full_frame(insight_frame, tmp_path):
+    path = tmp_path / "b"
+    streamed = _streamed(_csv(insight_frame), path, 700)
+    dims = cube_dims(streamed.columns)
+
+    cells, _ = open_bundle(path / CUBE_DIR)
+    expected = group_cells(streamed, dims).astype({d: str for d in dims}).sort_values(dims).reset_index(drop=True)
+    got = cells.astype({d: str for d in dims}).sort_values(dims).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False, rtol=1e-12)
+
+    stats = StatsAccumulator.from_dict(json.loads((path / STATS_FILE).read_text(encoding="utf-8")))
+    full = StatsAccumulator.from_frame(streamed)
+    assert stats.n_rows == full.n_rows == len(insight_frame)
+    assert np.array_equal(stats.nulls, full.nulls)
+    np.testing.assert_allclose(stats.corr().to_numpy(), full.corr().to_numpy(), rtol=0, atol=1e-12)
+
+
+def test_empty_csv_writes_empty_bundle(tmp_path):
+    data = b"gender,age,total_spend\n"
+    df = _streamed(data, tmp_path / "b", 100)
+    assert list(df.columns) == ["gender", "age", "total_spend"] and len(df) == 0